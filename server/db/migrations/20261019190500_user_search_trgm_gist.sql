@@ -0,0 +1,7 @@
+-- migrate:up
+DROP INDEX idx_users_name_email_trgm;
+CREATE INDEX idx_users_name_email_trgm ON public."user" USING gist ((name || ' ' || email) gist_trgm_ops) WHERE privacy_preference = 'public';
+
+-- migrate:down
+DROP INDEX idx_users_name_email_trgm;
+CREATE INDEX idx_users_name_email_trgm ON public."user" USING gin ((name || ' ' || email) gin_trgm_ops);
@@ -0,0 +1,28 @@
+-- migrate:up
+CREATE TABLE activity_feed_item (
+    feed_user_id UUID NOT NULL,
+    actor_user_id UUID NOT NULL,
+    recipe_id UUID NOT NULL,
+    cooked_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (feed_user_id, cooked_at, recipe_id, actor_user_id),
+    FOREIGN KEY (feed_user_id) REFERENCES "user"(id) ON DELETE CASCADE,
+    FOREIGN KEY (actor_user_id) REFERENCES "user"(id) ON DELETE CASCADE,
+    FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE
+);
+
+INSERT INTO activity_feed_item (feed_user_id, actor_user_id, recipe_id, cooked_at)
+SELECT u.id, feed.user_id, feed.recipe_id, feed.cooked_at
+FROM "user" u
+CROSS JOIN LATERAL (
+    SELECT l.user_id, l.recipe_id, l.cooked_at
+    FROM friendship f
+    JOIN recipe_cooking_log l ON l.user_id = f.friend_user_id
+    WHERE
+        f.user_id = u.id
+        AND f.status = 'accepted'
+    ORDER BY l.cooked_at DESC
+    LIMIT 500
+) feed;
+
+-- migrate:down
+DROP TABLE activity_feed_item;
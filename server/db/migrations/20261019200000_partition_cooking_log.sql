@@ -0,0 +1,126 @@
+-- migrate:up
+CREATE TABLE recipe_monthly_cook_count (
+    user_id UUID NOT NULL,
+    recipe_id UUID NOT NULL,
+    month DATE NOT NULL,
+    cook_count INT NOT NULL,
+    last_cooked_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (user_id, recipe_id, month),
+    FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE,
+    FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE
+);
+
+ALTER TABLE recipe_cooking_log RENAME TO recipe_cooking_log_unpartitioned;
+ALTER TABLE recipe_cooking_log_unpartitioned RENAME CONSTRAINT recipe_cooking_log_pkey TO recipe_cooking_log_unpartitioned_pkey;
+
+CREATE TABLE recipe_cooking_log (
+    user_id UUID NOT NULL,
+    recipe_id UUID NOT NULL,
+    cooked_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (user_id, cooked_at, recipe_id),
+    FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE,
+    FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE
+) PARTITION BY RANGE (cooked_at);
+
+CREATE FUNCTION ensure_recipe_cooking_log_partitions(from_month DATE, to_month DATE)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month DATE;
+    partition_name TEXT;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', from_month),
+            date_trunc('month', to_month),
+            INTERVAL '1 month'
+        )::DATE
+    LOOP
+        partition_name := 'recipe_cooking_log_' || to_char(month, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        PERFORM pg_advisory_xact_lock(hashtext('recipe_cooking_log_partitions'));
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF recipe_cooking_log FOR VALUES FROM (%L) TO (%L)',
+            partition_name,
+            month::TIMESTAMP AT TIME ZONE 'UTC',
+            (month + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END;
+$$;
+
+CREATE FUNCTION rollup_recipe_cooking_log(before_month DATE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month DATE;
+    partition_name TEXT;
+    rolled_up INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('recipe_cooking_log_partitions'));
+
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'recipe_cooking_log'::REGCLASS
+        ORDER BY c.relname
+    LOOP
+        month := to_date(right(partition_name, 7), 'YYYY_MM');
+        CONTINUE WHEN month >= date_trunc('month', before_month);
+
+        EXECUTE format(
+            'INSERT INTO recipe_monthly_cook_count (user_id, recipe_id, month, cook_count, last_cooked_at)
+            SELECT user_id, recipe_id, %L, COUNT(*), MAX(cooked_at)
+            FROM %I
+            GROUP BY user_id, recipe_id
+            ON CONFLICT (user_id, recipe_id, month) DO UPDATE
+            SET
+                cook_count = recipe_monthly_cook_count.cook_count + EXCLUDED.cook_count,
+                last_cooked_at = GREATEST(recipe_monthly_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)',
+            month,
+            partition_name
+        );
+        EXECUTE format('DROP TABLE %I', partition_name);
+
+        rolled_up := rolled_up + 1;
+    END LOOP;
+
+    RETURN rolled_up;
+END;
+$$;
+
+SELECT ensure_recipe_cooking_log_partitions(
+    COALESCE((SELECT MIN(cooked_at) FROM recipe_cooking_log_unpartitioned), NOW())::DATE,
+    (NOW() + INTERVAL '3 months')::DATE
+);
+
+INSERT INTO recipe_cooking_log (user_id, recipe_id, cooked_at)
+SELECT user_id, recipe_id, cooked_at
+FROM recipe_cooking_log_unpartitioned;
+
+DROP TABLE recipe_cooking_log_unpartitioned;
+
+-- migrate:down
+CREATE TABLE recipe_cooking_log_unpartitioned (
+    user_id UUID NOT NULL,
+    recipe_id UUID NOT NULL,
+    cooked_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE,
+    FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE
+);
+
+INSERT INTO recipe_cooking_log_unpartitioned (user_id, recipe_id, cooked_at)
+SELECT user_id, recipe_id, cooked_at
+FROM recipe_cooking_log;
+
+DROP TABLE recipe_cooking_log;
+ALTER TABLE recipe_cooking_log_unpartitioned RENAME TO recipe_cooking_log;
+ALTER TABLE recipe_cooking_log ADD CONSTRAINT recipe_cooking_log_pkey PRIMARY KEY (user_id, cooked_at, recipe_id);
+
+DROP FUNCTION rollup_recipe_cooking_log(DATE);
+DROP FUNCTION ensure_recipe_cooking_log_partitions(DATE, DATE);
+DROP TABLE recipe_monthly_cook_count;
@@ -0,0 +1,110 @@
+-- migrate:up
+CREATE TABLE recipe_cook_count (
+    user_id UUID NOT NULL,
+    recipe_id UUID NOT NULL,
+    cook_count INT NOT NULL,
+    last_cooked_at TIMESTAMPTZ NOT NULL,
+    PRIMARY KEY (user_id, recipe_id),
+    FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE,
+    FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_recipe_cook_count_user_id_cook_count ON recipe_cook_count USING btree (user_id, cook_count DESC, recipe_id);
+CREATE INDEX idx_recipe_monthly_cook_count_user_id_month ON recipe_monthly_cook_count USING btree (user_id, month);
+
+INSERT INTO recipe_monthly_cook_count (user_id, recipe_id, month, cook_count, last_cooked_at)
+SELECT
+    user_id,
+    recipe_id,
+    date_trunc('month', cooked_at AT TIME ZONE 'UTC')::DATE,
+    COUNT(*),
+    MAX(cooked_at)
+FROM recipe_cooking_log
+GROUP BY 1, 2, 3
+ON CONFLICT (user_id, recipe_id, month) DO UPDATE
+SET
+    cook_count = EXCLUDED.cook_count,
+    last_cooked_at = EXCLUDED.last_cooked_at;
+
+INSERT INTO recipe_cook_count (user_id, recipe_id, cook_count, last_cooked_at)
+SELECT user_id, recipe_id, SUM(cook_count), MAX(last_cooked_at)
+FROM recipe_monthly_cook_count
+GROUP BY user_id, recipe_id;
+
+-- recipe_monthly_cook_count is now maintained on every write, so retiring
+-- old months only needs to drop the raw partitions
+CREATE OR REPLACE FUNCTION rollup_recipe_cooking_log(before_month DATE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month DATE;
+    partition_name TEXT;
+    rolled_up INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('recipe_cooking_log_partitions'));
+
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'recipe_cooking_log'::REGCLASS
+        ORDER BY c.relname
+    LOOP
+        month := to_date(right(partition_name, 7), 'YYYY_MM');
+        CONTINUE WHEN month >= date_trunc('month', before_month);
+
+        EXECUTE format('DROP TABLE %I', partition_name);
+
+        rolled_up := rolled_up + 1;
+    END LOOP;
+
+    RETURN rolled_up;
+END;
+$$;
+
+-- migrate:down
+CREATE OR REPLACE FUNCTION rollup_recipe_cooking_log(before_month DATE)
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month DATE;
+    partition_name TEXT;
+    rolled_up INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('recipe_cooking_log_partitions'));
+
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'recipe_cooking_log'::REGCLASS
+        ORDER BY c.relname
+    LOOP
+        month := to_date(right(partition_name, 7), 'YYYY_MM');
+        CONTINUE WHEN month >= date_trunc('month', before_month);
+
+        EXECUTE format(
+            'INSERT INTO recipe_monthly_cook_count (user_id, recipe_id, month, cook_count, last_cooked_at)
+            SELECT user_id, recipe_id, %L, COUNT(*), MAX(cooked_at)
+            FROM %I
+            GROUP BY user_id, recipe_id
+            ON CONFLICT (user_id, recipe_id, month) DO UPDATE
+            SET
+                cook_count = recipe_monthly_cook_count.cook_count + EXCLUDED.cook_count,
+                last_cooked_at = GREATEST(recipe_monthly_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)',
+            month,
+            partition_name
+        );
+        EXECUTE format('DROP TABLE %I', partition_name);
+
+        rolled_up := rolled_up + 1;
+    END LOOP;
+
+    RETURN rolled_up;
+END;
+$$;
+
+DROP INDEX idx_recipe_monthly_cook_count_user_id_month;
+DROP TABLE recipe_cook_count;
@@ -0,0 +1,42 @@
+-- migrate:up
+CREATE TABLE recipe_search_document (
+    recipe_id UUID PRIMARY KEY REFERENCES recipe(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    author TEXT NOT NULL,
+    cuisine TEXT NOT NULL,
+    notes TEXT NOT NULL,
+    tags TEXT NOT NULL,
+    ingredients TEXT NOT NULL,
+    dietary_restrictions TEXT NOT NULL
+);
+
+INSERT INTO recipe_search_document (recipe_id, name, author, cuisine, notes, tags, ingredients, dietary_restrictions)
+SELECT
+    r.id,
+    r.name,
+    r.author,
+    r.cuisine,
+    COALESCE(r.notes, ''),
+    COALESCE((SELECT STRING_AGG(t.tag, ' ') FROM recipe_tag t WHERE t.recipe_id = r.id), ''),
+    COALESCE((SELECT STRING_AGG(i.name, ' ') FROM recipe_ingredient i WHERE i.recipe_id = r.id), ''),
+    COALESCE((SELECT STRING_AGG(REPLACE(d.dietary_restriction::TEXT, '_', ' '), ' ') FROM recipe_dietary_restriction_met d WHERE d.recipe_id = r.id), '')
+FROM recipe r;
+
+CREATE INDEX recipe_search_document_idx ON recipe_search_document
+USING bm25 (recipe_id, name, author, cuisine, notes, tags, ingredients, dietary_restrictions)
+WITH (
+    key_field='recipe_id',
+    text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}, "notes": {"tokenizer": {"type": "default", "stemmer": "English"}}, "tags": {"tokenizer": {"type": "default", "stemmer": "English"}}, "ingredients": {"tokenizer": {"type": "default", "stemmer": "English"}}, "dietary_restrictions": {"tokenizer": {"type": "default", "stemmer": "English"}}}'
+);
+
+DROP INDEX recipe_search_idx;
+
+-- migrate:down
+CREATE INDEX recipe_search_idx ON recipe
+USING bm25 (name, author, cuisine, notes, id)
+WITH (
+    key_field='id',
+    text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}, "notes": {"tokenizer": {"type": "default", "stemmer": "English"}}}'
+);
+
+DROP TABLE recipe_search_document;
@@ -0,0 +1,24 @@
+-- migrate:up
+CREATE TABLE canonical_ingredient (
+    id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE recipe_ingredient
+ADD COLUMN canonical_ingredient_id INT REFERENCES canonical_ingredient(id);
+
+CREATE INDEX idx_recipe_ingredient_canonical_ingredient_id ON recipe_ingredient USING btree (canonical_ingredient_id, recipe_id);
+
+-- existing rows are canonicalized in batches by the maintenance job, which
+-- walks this index until it's empty
+CREATE INDEX idx_recipe_ingredient_uncanonicalized ON recipe_ingredient USING btree (id) WHERE canonical_ingredient_id IS NULL;
+
+-- migrate:down
+DROP INDEX idx_recipe_ingredient_uncanonicalized;
+DROP INDEX idx_recipe_ingredient_canonical_ingredient_id;
+
+ALTER TABLE recipe_ingredient
+DROP COLUMN canonical_ingredient_id;
+
+DROP TABLE canonical_ingredient;
@@ -0,0 +1,18 @@
+-- migrate:up
+-- peak_months has bit (m - 1) set when month m is in season for any of the
+-- recipe's ingredients, per the region's seasonal calendar
+CREATE TABLE recipe_seasonality (
+    recipe_id UUID NOT NULL,
+    region TEXT NOT NULL,
+    peak_months INT NOT NULL,
+    PRIMARY KEY (recipe_id, region),
+    FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE
+);
+
+-- seasonal ranking and pantry matching no longer search raw ingredient names
+DROP INDEX recipe_ingredient_search_idx;
+
+-- migrate:down
+CREATE INDEX recipe_ingredient_search_idx ON recipe_ingredient USING bm25 (id, name, recipe_id) WITH (key_field=id, text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}}');
+
+DROP TABLE recipe_seasonality;
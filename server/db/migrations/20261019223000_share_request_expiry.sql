@@ -0,0 +1,10 @@
+-- migrate:up
+CREATE INDEX idx_recipe_share_request_to_user_id_expires_at ON recipe_share_request USING btree (to_user_id, expires_at);
+CREATE INDEX idx_recipe_share_request_expires_at ON recipe_share_request USING btree (expires_at);
+
+DELETE FROM recipe_share_request
+WHERE expires_at <= NOW();
+
+-- migrate:down
+DROP INDEX idx_recipe_share_request_expires_at;
+DROP INDEX idx_recipe_share_request_to_user_id_expires_at;
@@ -0,0 +1,34 @@
+-- migrate:up
+CREATE TYPE notification_status AS ENUM (
+    'pending',
+    'sent',
+    'failed'
+);
+
+-- push notifications are written here in the same transaction as the change
+-- that triggers them, and delivered to Expo by a background worker
+CREATE TABLE notification_outbox (
+    id UUID NOT NULL DEFAULT gen_random_uuid() PRIMARY KEY,
+    user_id UUID NOT NULL,
+    title TEXT NOT NULL,
+    body TEXT NOT NULL,
+    data JSONB NOT NULL DEFAULT '{}'::JSONB,
+    status notification_status NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expo_push_token TEXT,
+    ticket_id TEXT,
+    last_error TEXT,
+    sent_at TIMESTAMPTZ,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_notification_outbox_pending ON notification_outbox USING btree (next_attempt_at) WHERE status = 'pending';
+CREATE INDEX idx_notification_outbox_sent ON notification_outbox USING btree (sent_at) WHERE status = 'sent';
+CREATE INDEX idx_notification_outbox_failed ON notification_outbox USING btree (updated_at) WHERE status = 'failed';
+
+-- migrate:down
+DROP TABLE notification_outbox;
+DROP TYPE notification_status;
@@ -0,0 +1,7 @@
+-- migrate:up
+-- the primary key covers lookups by user_id; this covers incoming friend
+-- requests and the reverse side of a user's friendships
+CREATE INDEX idx_friendship_friend_user_id_status ON friendship USING btree (friend_user_id, status);
+
+-- migrate:down
+DROP INDEX idx_friendship_friend_user_id_status;
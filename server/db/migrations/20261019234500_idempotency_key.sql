@@ -0,0 +1,17 @@
+-- migrate:up
+-- responses to mutations sent with an Idempotency-Key header, replayed when
+-- a client retries the same request
+CREATE TABLE idempotency_key (
+    user_id UUID NOT NULL,
+    key TEXT NOT NULL,
+    request_path TEXT NOT NULL,
+    response JSONB,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (user_id, key),
+    FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE
+);
+
+CREATE INDEX idx_idempotency_key_created_at ON idempotency_key USING btree (created_at);
+
+-- migrate:down
+DROP TABLE idempotency_key;
@@ -0,0 +1,16 @@
+-- migrate:up
+-- ingredients whose names don't normalize to anything never get a canonical
+-- id, so the backfill marks every row it checks rather than rechecking those
+-- on every run
+ALTER TABLE recipe_ingredient
+ADD COLUMN canonicalized_at TIMESTAMPTZ;
+
+DROP INDEX idx_recipe_ingredient_uncanonicalized;
+CREATE INDEX idx_recipe_ingredient_uncanonicalized ON recipe_ingredient USING btree (id) WHERE canonical_ingredient_id IS NULL AND canonicalized_at IS NULL;
+
+-- migrate:down
+DROP INDEX idx_recipe_ingredient_uncanonicalized;
+CREATE INDEX idx_recipe_ingredient_uncanonicalized ON recipe_ingredient USING btree (id) WHERE canonical_ingredient_id IS NULL;
+
+ALTER TABLE recipe_ingredient
+DROP COLUMN canonicalized_at;
@@ -0,0 +1,9 @@
+-- migrate:up
+-- the region whose seasonal calendar ranks this user's recipes; NULL uses the
+-- server's default region
+ALTER TABLE "user"
+ADD COLUMN seasonal_region TEXT;
+
+-- migrate:down
+ALTER TABLE "user"
+DROP COLUMN seasonal_region;
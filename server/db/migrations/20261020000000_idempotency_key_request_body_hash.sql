@@ -0,0 +1,9 @@
+-- migrate:up
+-- a key reused with a different body is rejected rather than replayed; keys
+-- claimed before this column existed have no hash and aren't checked
+ALTER TABLE idempotency_key
+ADD COLUMN request_body_hash TEXT;
+
+-- migrate:down
+ALTER TABLE idempotency_key
+DROP COLUMN request_body_hash;
@@ -1,9 +1,63 @@
+-- name: ListActivityFeed :many
+WITH recipes_cooked AS (
+    (
+        SELECT recipe_id, cooked_at
+        FROM activity_feed_item
+        WHERE
+            feed_user_id = @userId::UUID
+            AND (cooked_at, recipe_id) < (
+                COALESCE(sqlc.narg('before_cooked_at')::TIMESTAMPTZ, 'infinity'),
+                COALESCE(sqlc.narg('before_recipe_id')::UUID, 'ffffffff-ffff-ffff-ffff-ffffffffffff')
+            )
+        ORDER BY cooked_at DESC, recipe_id DESC
+        LIMIT @recentCooksLimit::INT + @recentCooksOffset::INT
+    )
+    UNION ALL
+    (
+        SELECT recipe_id, cooked_at
+        FROM recipe_cooking_log
+        WHERE
+            @includeOwn::BOOLEAN
+            AND user_id = @userId::UUID
+            AND (cooked_at, recipe_id) < (
+                COALESCE(sqlc.narg('before_cooked_at')::TIMESTAMPTZ, 'infinity'),
+                COALESCE(sqlc.narg('before_recipe_id')::UUID, 'ffffffff-ffff-ffff-ffff-ffffffffffff')
+            )
+        ORDER BY cooked_at DESC, recipe_id DESC
+        LIMIT @recentCooksLimit::INT + @recentCooksOffset::INT
+    )
+    ORDER BY cooked_at DESC, recipe_id DESC
+    LIMIT @recentCooksLimit::INT
+    OFFSET @recentCooksOffset::INT
+)
+
+SELECT
+    r.*,
+    rc.cooked_at,
+    u.name AS user_name
+FROM recipes_cooked rc
+JOIN recipe r ON r.id = rc.recipe_id
+JOIN "user" u ON (u.id = r.user_id)
+ORDER BY rc.cooked_at DESC, rc.recipe_id DESC
+;
+
 -- name: ListRecentRecipeCooks :many
 WITH recipes_cooked AS (
-    SELECT *
-    FROM recipe_cooking_log
-    WHERE user_id = ANY(@userIds::UUID[])
-    ORDER BY cooked_at DESC
+    SELECT l.recipe_id, l.cooked_at
+    FROM UNNEST(@userIds::UUID[]) AS cook(user_id)
+    CROSS JOIN LATERAL (
+        SELECT recipe_id, cooked_at
+        FROM recipe_cooking_log
+        WHERE
+            user_id = cook.user_id
+            AND (cooked_at, recipe_id) < (
+                COALESCE(sqlc.narg('before_cooked_at')::TIMESTAMPTZ, 'infinity'),
+                COALESCE(sqlc.narg('before_recipe_id')::UUID, 'ffffffff-ffff-ffff-ffff-ffffffffffff')
+            )
+        ORDER BY cooked_at DESC, recipe_id DESC
+        LIMIT @recentCooksLimit::INT + @recentCooksOffset::INT
+    ) l
+    ORDER BY l.cooked_at DESC, l.recipe_id DESC
     LIMIT @recentCooksLimit::INT
     OFFSET @recentCooksOffset::INT
 )
@@ -15,25 +69,171 @@ SELECT
 FROM recipes_cooked rc
 JOIN recipe r ON r.id = rc.recipe_id
 JOIN "user" u ON (u.id = r.user_id)
-ORDER BY rc.cooked_at DESC
+ORDER BY rc.cooked_at DESC, rc.recipe_id DESC
 ;
 
 -- name: MarkRecipeCooked :one
-WITH new_log AS (
+WITH updated AS (
+    UPDATE recipe
+    SET
+        last_made_at = NOW(),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE
+        id = @recipeId::UUID
+        AND user_id = @userId::UUID
+    RETURNING *
+), new_log AS (
+    -- every write below reads from the updated recipe, so nothing is logged,
+    -- counted or fanned out for a recipe the user doesn't own
     INSERT INTO recipe_cooking_log (recipe_id, user_id, cooked_at)
-    VALUES (
-        @recipeId::UUID,
-        @userId::UUID,
-        NOW()
-    )
+    SELECT id, user_id, last_made_at
+    FROM updated
     RETURNING *
+), fanned_out AS (
+    INSERT INTO activity_feed_item (feed_user_id, actor_user_id, recipe_id, cooked_at)
+    SELECT f.friend_user_id, nl.user_id, nl.recipe_id, nl.cooked_at
+    FROM new_log nl
+    JOIN friendship f ON f.user_id = nl.user_id
+    WHERE f.status = 'accepted'
+), counted AS (
+    INSERT INTO recipe_cook_count (user_id, recipe_id, cook_count, last_cooked_at)
+    SELECT user_id, recipe_id, 1, cooked_at
+    FROM new_log
+    ON CONFLICT (user_id, recipe_id) DO UPDATE
+    SET
+        cook_count = recipe_cook_count.cook_count + EXCLUDED.cook_count,
+        last_cooked_at = GREATEST(recipe_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)
+), counted_monthly AS (
+    INSERT INTO recipe_monthly_cook_count (user_id, recipe_id, month, cook_count, last_cooked_at)
+    SELECT user_id, recipe_id, date_trunc('month', cooked_at AT TIME ZONE 'UTC')::DATE, 1, cooked_at
+    FROM new_log
+    ON CONFLICT (user_id, recipe_id, month) DO UPDATE
+    SET
+        cook_count = recipe_monthly_cook_count.cook_count + EXCLUDED.cook_count,
+        last_cooked_at = GREATEST(recipe_monthly_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)
 )
 
-UPDATE recipe
-SET
-    last_made_at = (SELECT cooked_at FROM new_log),
-    updated_at = CURRENT_TIMESTAMP
+SELECT *
+FROM updated;
+
+-- name: BackfillActivityFeed :exec
+INSERT INTO activity_feed_item (feed_user_id, actor_user_id, recipe_id, cooked_at)
+SELECT pair.feed_user_id, l.user_id, l.recipe_id, l.cooked_at
+FROM (
+    VALUES
+        (@userId::UUID, @friendUserId::UUID),
+        (@friendUserId::UUID, @userId::UUID)
+) AS pair (feed_user_id, actor_user_id)
+CROSS JOIN LATERAL (
+    SELECT user_id, recipe_id, cooked_at
+    FROM recipe_cooking_log
+    WHERE user_id = pair.actor_user_id
+    ORDER BY cooked_at DESC
+    LIMIT @feedCap::INT
+) l
+ON CONFLICT DO NOTHING
+;
+
+-- name: TrimActivityFeeds :exec
+DELETE FROM activity_feed_item a
+USING (
+    SELECT
+        f.friend_user_id AS feed_user_id,
+        (
+            SELECT cooked_at
+            FROM activity_feed_item
+            WHERE feed_user_id = f.friend_user_id
+            ORDER BY cooked_at DESC
+            OFFSET @feedCap::INT
+            LIMIT 1
+        ) AS cutoff
+    FROM friendship f
+    WHERE
+        f.user_id = @actorUserId::UUID
+        AND f.status = 'accepted'
+) feeds
 WHERE
-    id = @recipeId::UUID
-    AND user_id = @userId::UUID
-RETURNING *;
\ No newline at end of file
+    a.feed_user_id = feeds.feed_user_id
+    AND a.cooked_at <= feeds.cutoff
+;
+
+-- name: TrimActivityFeedsForUsers :exec
+DELETE FROM activity_feed_item a
+USING (
+    SELECT
+        feed.user_id AS feed_user_id,
+        (
+            SELECT cooked_at
+            FROM activity_feed_item
+            WHERE feed_user_id = feed.user_id
+            ORDER BY cooked_at DESC
+            OFFSET @feedCap::INT
+            LIMIT 1
+        ) AS cutoff
+    FROM UNNEST(@feedUserIds::UUID[]) AS feed(user_id)
+) feeds
+WHERE
+    a.feed_user_id = feeds.feed_user_id
+    AND a.cooked_at <= feeds.cutoff
+;
+
+-- name: EnsureRecipeCookingLogPartitions :exec
+SELECT ensure_recipe_cooking_log_partitions(@fromMonth::DATE, @toMonth::DATE)
+;
+
+-- name: RollupRecipeCookingLog :exec
+SELECT rollup_recipe_cooking_log(@beforeMonth::DATE)
+;
+
+-- name: ListCookingTotals :many
+SELECT
+    u.id AS user_id,
+    u.name AS user_name,
+    COALESCE(total.cook_count, 0)::INT AS total_cooks,
+    COALESCE(this_month.cook_count, 0)::INT AS cooked_this_month
+FROM "user" u
+LEFT JOIN LATERAL (
+    SELECT SUM(cook_count) AS cook_count
+    FROM recipe_cook_count
+    WHERE user_id = u.id
+) total ON TRUE
+LEFT JOIN LATERAL (
+    SELECT SUM(cook_count) AS cook_count
+    FROM recipe_monthly_cook_count
+    WHERE
+        user_id = u.id
+        AND month = @month::DATE
+) this_month ON TRUE
+WHERE u.id = ANY(@userIds::UUID[])
+;
+
+-- name: ListMostCookedRecipes :many
+SELECT
+    cook.user_id,
+    r.id AS recipe_id,
+    r.name AS recipe_name,
+    c.cook_count,
+    c.last_cooked_at
+FROM UNNEST(@userIds::UUID[]) AS cook(user_id)
+CROSS JOIN LATERAL (
+    SELECT recipe_id, cook_count, last_cooked_at
+    FROM recipe_cook_count
+    WHERE user_id = cook.user_id
+    ORDER BY cook_count DESC, recipe_id
+    LIMIT @recipeLimit::INT
+) c
+JOIN recipe r ON r.id = c.recipe_id
+ORDER BY cook.user_id, c.cook_count DESC, c.recipe_id
+;
+
+-- name: ListCuisineCookCounts :many
+SELECT
+    c.user_id,
+    r.cuisine,
+    SUM(c.cook_count)::INT AS cook_count
+FROM recipe_cook_count c
+JOIN recipe r ON r.id = c.recipe_id
+WHERE c.user_id = ANY(@userIds::UUID[])
+GROUP BY c.user_id, r.cuisine
+ORDER BY c.user_id, cook_count DESC, r.cuisine
+;
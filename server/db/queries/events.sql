@@ -0,0 +1,40 @@
+-- name: NotifyFriendCooked :exec
+SELECT pg_notify(
+    'recipebox_events',
+    json_build_object(
+        'type', 'activity',
+        'user_id', f.friend_user_id,
+        'data', json_build_object(
+            'recipe_id', r.id,
+            'recipe_name', r.name,
+            'user_id', cook.id,
+            'user_name', cook.name,
+            'cooked_at', r.last_made_at
+        )
+    )::TEXT
+)
+FROM recipe r
+JOIN "user" cook ON cook.id = r.user_id
+JOIN friendship f ON f.user_id = cook.id AND f.status = 'accepted'
+WHERE
+    r.id = @recipeId::UUID
+    AND r.user_id = @userId::UUID
+;
+
+-- name: NotifyRecipeShareRequests :exec
+SELECT pg_notify(
+    'recipebox_events',
+    json_build_object(
+        'type', 'share_request',
+        'user_id', s.to_user_id,
+        'data', json_build_object(
+            'id', r.id,
+            'recipe_name', r.name,
+            'from_user_name', u.name
+        )
+    )::TEXT
+)
+FROM UNNEST(@recipeIds::UUID[], @toUserIds::UUID[]) AS s(recipe_id, to_user_id)
+JOIN recipe r ON r.id = s.recipe_id
+JOIN "user" u ON u.id = @sharerId::UUID
+;
@@ -0,0 +1,40 @@
+-- name: ClaimIdempotencyKey :one
+WITH claimed AS (
+    INSERT INTO idempotency_key (user_id, key, request_path, request_body_hash)
+    VALUES (@userId::UUID, @key::TEXT, @requestPath::TEXT, @requestBodyHash::TEXT)
+    ON CONFLICT (user_id, key) DO NOTHING
+    RETURNING *
+)
+
+-- no row means the key was claimed by a request that hasn't finished yet
+SELECT TRUE AS claimed, request_path, request_body_hash, response
+FROM claimed
+UNION ALL
+SELECT FALSE AS claimed, request_path, request_body_hash, response
+FROM idempotency_key
+WHERE user_id = @userId::UUID
+  AND key = @key::TEXT
+;
+
+-- name: SetIdempotencyKeyResponse :exec
+UPDATE idempotency_key
+SET response = @response::JSONB
+WHERE user_id = @userId::UUID
+  AND key = @key::TEXT
+;
+
+-- name: DeleteExpiredIdempotencyKeys :execrows
+WITH expired AS (
+    SELECT user_id, key
+    FROM idempotency_key
+    WHERE created_at < NOW() - make_interval(secs => @ttlSeconds::FLOAT)
+    ORDER BY created_at
+    LIMIT @batchSize::INT
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM idempotency_key ik
+USING expired e
+WHERE
+    ik.user_id = e.user_id
+    AND ik.key = e.key
+;
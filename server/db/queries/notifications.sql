@@ -0,0 +1,132 @@
+-- name: EnqueueFriendRequestNotification :exec
+INSERT INTO notification_outbox (user_id, title, body, data)
+SELECT
+    recipient.id,
+    'New friend request',
+    sender.name || ' sent you a friend request',
+    jsonb_build_object('type', 'friend_request', 'from_user_id', sender.id)
+FROM "user" recipient
+JOIN "user" sender ON sender.id = @userId::UUID
+WHERE
+    recipient.id = @friendUserId::UUID
+    AND recipient.push_permission = 'accepted'
+;
+
+-- name: EnqueueRecipeShareNotifications :exec
+INSERT INTO notification_outbox (user_id, title, body, data)
+SELECT
+    recipient.id,
+    'New recipe shared with you',
+    sender.name || ' shared ' || r.name || ' with you',
+    jsonb_build_object('type', 'recipe_share', 'recipe_id', r.id, 'from_user_id', sender.id)
+FROM UNNEST(@recipeIds::UUID[], @toUserIds::UUID[]) AS s(recipe_id, to_user_id)
+JOIN recipe r ON r.id = s.recipe_id
+JOIN "user" sender ON sender.id = @sharerId::UUID
+JOIN "user" recipient ON recipient.id = s.to_user_id
+WHERE recipient.push_permission = 'accepted'
+;
+
+-- name: EnqueueFriendCookedNotifications :exec
+INSERT INTO notification_outbox (user_id, title, body, data)
+SELECT
+    recipient.id,
+    cook.name || ' cooked something',
+    cook.name || ' made ' || r.name,
+    jsonb_build_object('type', 'friend_cooked', 'recipe_id', r.id, 'from_user_id', cook.id)
+FROM recipe r
+JOIN "user" cook ON cook.id = r.user_id
+JOIN friendship f ON f.user_id = cook.id AND f.status = 'accepted'
+JOIN "user" recipient ON recipient.id = f.friend_user_id
+WHERE
+    r.id = @recipeId::UUID
+    AND r.user_id = @userId::UUID
+    AND recipient.push_permission = 'accepted'
+;
+
+-- name: ClaimDueNotifications :many
+WITH due AS (
+    SELECT id
+    FROM notification_outbox
+    WHERE
+        status = 'pending'
+        AND next_attempt_at <= NOW()
+    ORDER BY next_attempt_at
+    LIMIT @batchSize::INT
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE notification_outbox n
+SET
+    -- claimed rows are pushed back by an exponential backoff up front, so a
+    -- notification whose delivery is never recorded is retried later
+    attempts = n.attempts + 1,
+    next_attempt_at = NOW() + make_interval(secs => @backoffSeconds::FLOAT * 2 ^ n.attempts),
+    expo_push_token = u.expo_push_token,
+    updated_at = NOW()
+FROM due d, "user" u
+WHERE
+    n.id = d.id
+    AND u.id = n.user_id
+RETURNING n.id, n.expo_push_token, n.title, n.body, n.data, n.attempts;
+
+-- name: MarkNotificationsSent :exec
+UPDATE notification_outbox n
+SET
+    status = 'sent',
+    ticket_id = t.ticket_id,
+    last_error = NULL,
+    sent_at = NOW(),
+    updated_at = NOW()
+FROM UNNEST(@ids::UUID[], @ticketIds::TEXT[]) AS t(id, ticket_id)
+WHERE n.id = t.id;
+
+-- name: RecordNotificationErrors :exec
+UPDATE notification_outbox n
+SET
+    -- rows that aren't failed stay as they are, to be retried or have their
+    -- receipt checked again
+    status = CASE WHEN e.failed THEN 'failed' ELSE n.status END,
+    last_error = e.error,
+    updated_at = NOW()
+FROM UNNEST(@ids::UUID[], @errors::TEXT[], @failed::BOOLEAN[]) AS e(id, error, failed)
+WHERE n.id = e.id;
+
+-- name: ListSentNotifications :many
+SELECT
+    id,
+    ticket_id,
+    expo_push_token
+FROM notification_outbox
+WHERE
+    status = 'sent'
+    AND sent_at <= NOW() - make_interval(secs => @receiptDelaySeconds::FLOAT)
+ORDER BY sent_at
+LIMIT @batchSize::INT;
+
+-- name: DeleteNotifications :exec
+DELETE FROM notification_outbox
+WHERE id = ANY(@ids::UUID[]);
+
+-- name: ClearExpoPushTokens :exec
+UPDATE "user"
+SET
+    expo_push_token = NULL,
+    -- reset along with the token, per check_push_token_set_if_permission_accepted
+    push_permission = 'none',
+    updated_at = NOW()
+WHERE expo_push_token = ANY(@tokens::TEXT[]);
+
+-- name: DeleteStaleNotifications :execrows
+WITH stale AS (
+    SELECT id
+    FROM notification_outbox
+    WHERE
+        -- Expo keeps receipts for a day, so a sent row whose receipt never
+        -- showed up is dropped after that; failed rows are kept for a week
+        (status = 'sent' AND sent_at < NOW() - INTERVAL '1 day')
+        OR (status = 'failed' AND updated_at < NOW() - INTERVAL '7 days')
+    LIMIT @batchSize::INT
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM notification_outbox n
+USING stale s
+WHERE n.id = s.id;
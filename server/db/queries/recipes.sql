@@ -72,16 +72,19 @@ WITH ingredients AS (
     SELECT
         UNNEST(@names::TEXT[]) AS name,
         UNNEST(@quantities::FLOAT8[]) AS quantity,
-        UNNEST(@units::TEXT[]) AS units
+        UNNEST(@units::TEXT[]) AS units,
+        UNNEST(@canonicalNames::TEXT[]) AS canonical_name
 )
 
-INSERT INTO recipe_ingredient (recipe_id, name, quantity, units)
+INSERT INTO recipe_ingredient (recipe_id, name, quantity, units, canonical_ingredient_id)
 SELECT
     @recipeId::UUID,
-    name,
-    quantity,
-    units
-FROM ingredients
+    i.name,
+    i.quantity,
+    i.units,
+    c.id
+FROM ingredients i
+LEFT JOIN canonical_ingredient c ON c.name = i.canonical_name
 ON CONFLICT DO NOTHING
 RETURNING *;
 
@@ -107,21 +110,22 @@ ON CONFLICT DO NOTHING
 RETURNING *;
 
 -- name: ListRecipes :many
-WITH ingredient_seasonality_score AS (
+WITH search_score AS (
     SELECT
-        i.recipe_id,
-        SUM(paradedb.score(i.id)) AS total_ingredient_score
-    FROM recipe_ingredient i
-    JOIN recipe r ON r.id = i.recipe_id
+        recipe_id,
+        paradedb.score(recipe_id) AS score
+    FROM recipe_search_document
     WHERE
-        i.id @@@ paradedb.parse(@seasonalIngredients::TEXT, lenient => true)
-        AND r.user_id = @userId::UUID
-    GROUP BY i.recipe_id
+        sqlc.narg('search')::TEXT IS NOT NULL
+        AND recipe_id @@@ paradedb.parse(sqlc.narg('search')::TEXT, lenient => true)
 )
 SELECT r.*
 FROM recipe r
 JOIN "user" u ON u.id = r.user_id
-LEFT JOIN ingredient_seasonality_score iss ON r.id = iss.recipe_id
+LEFT JOIN recipe_seasonality rs
+    ON r.id = rs.recipe_id
+    AND rs.region = @seasonalRegion::TEXT
+LEFT JOIN search_score ss ON r.id = ss.recipe_id
 WHERE
     (
         (
@@ -137,14 +141,32 @@ WHERE
             AND r.user_id = @userId::UUID
         )
     )
-    AND (
-        sqlc.narg('search')::TEXT IS NULL
-        OR r.id @@@ paradedb.parse(sqlc.narg('search')::TEXT, lenient => true)
-    )
+    AND (sqlc.narg('search')::TEXT IS NULL OR ss.recipe_id IS NOT NULL)
     AND (sqlc.narg('cuisine')::TEXT IS NULL OR LOWER(r.cuisine) = LOWER(sqlc.narg('cuisine')::TEXT))
     AND (sqlc.narg('meal')::meal IS NULL OR r.meal = sqlc.narg('meal')::meal)
     AND (sqlc.narg('type')::recipe_type IS NULL OR r.type = sqlc.narg('type')::recipe_type)
+    AND (
+        sqlc.narg('tag')::TEXT IS NULL
+        OR EXISTS (
+            SELECT 1
+            FROM recipe_tag t
+            WHERE
+                t.recipe_id = r.id
+                AND t.tag = sqlc.narg('tag')::TEXT
+        )
+    )
+    AND (
+        sqlc.narg('dietary_restriction')::dietary_restriction IS NULL
+        OR EXISTS (
+            SELECT 1
+            FROM recipe_dietary_restriction_met d
+            WHERE
+                d.recipe_id = r.id
+                AND d.dietary_restriction = sqlc.narg('dietary_restriction')::dietary_restriction
+        )
+    )
 ORDER BY
+    ss.score DESC NULLS LAST,
     CASE WHEN @onlyUser::BOOLEAN THEN
         CASE
             -- don't surface long recipes on weekdays
@@ -156,10 +178,133 @@ ORDER BY
             WHEN r.last_made_at IS NULL THEN 1.0
             ELSE GREATEST(1.0, LEAST(3.0, (NOW()::DATE - r.last_made_at::DATE) / 30.0))
         END *
-        COALESCE(iss.total_ingredient_score + 1.0, 1.0)
+        -- favor recipes with an ingredient in season this month
+        CASE
+            WHEN rs.peak_months & (1 << (EXTRACT(MONTH FROM NOW())::INT - 1)) <> 0 THEN 2.0
+            ELSE 1.0
+        END
     ELSE NULL END DESC NULLS LAST,
     r.updated_at DESC,
     r.id
+LIMIT sqlc.narg('recipe_limit')::INT
+OFFSET @recipeOffset::INT
+;
+
+-- name: ListPantryMatches :many
+WITH matched_ingredient AS (
+    SELECT
+        i.id,
+        i.recipe_id
+    FROM canonical_ingredient c
+    JOIN recipe_ingredient i ON i.canonical_ingredient_id = c.id
+    JOIN recipe r ON r.id = i.recipe_id
+    WHERE
+        c.name = ANY(@canonicalNames::TEXT[])
+        AND r.user_id = ANY(@userIds::UUID[])
+), coverage AS (
+    SELECT
+        i.recipe_id,
+        COUNT(mi.id) AS matched_ingredient_count,
+        COUNT(*) AS ingredient_count,
+        COALESCE(
+            ARRAY_AGG(i.name ORDER BY i.name) FILTER (WHERE mi.id IS NULL),
+            '{}'
+        )::TEXT[] AS missing_ingredients
+    FROM recipe_ingredient i
+    LEFT JOIN matched_ingredient mi ON mi.id = i.id
+    WHERE i.recipe_id IN (SELECT recipe_id FROM matched_ingredient)
+    GROUP BY i.recipe_id
+)
+SELECT
+    r.*,
+    c.matched_ingredient_count,
+    c.ingredient_count,
+    c.missing_ingredients
+FROM coverage c
+JOIN recipe r ON r.id = c.recipe_id
+ORDER BY
+    c.matched_ingredient_count::FLOAT / c.ingredient_count DESC,
+    c.matched_ingredient_count DESC,
+    r.id
+LIMIT @recipeLimit::INT;
+
+-- name: ListRecipeSearchFacetCounts :many
+WITH matching AS (
+    SELECT r.id, r.cuisine, r.meal, r.type
+    FROM recipe r
+    WHERE
+        (
+            (
+                @onlyUser::BOOLEAN = FALSE
+                AND r.parent_recipe_id IS NULL
+                AND r.user_id != @userId::UUID
+            )
+            OR (
+                @onlyUser::BOOLEAN
+                AND r.user_id = @userId::UUID
+            )
+        )
+        AND (
+            sqlc.narg('search')::TEXT IS NULL
+            OR r.id IN (
+                SELECT recipe_id
+                FROM recipe_search_document
+                WHERE
+                    sqlc.narg('search')::TEXT IS NOT NULL
+                    AND recipe_id @@@ paradedb.parse(sqlc.narg('search')::TEXT, lenient => true)
+            )
+        )
+        AND (sqlc.narg('cuisine')::TEXT IS NULL OR LOWER(r.cuisine) = LOWER(sqlc.narg('cuisine')::TEXT))
+        AND (sqlc.narg('meal')::meal IS NULL OR r.meal = sqlc.narg('meal')::meal)
+        AND (sqlc.narg('type')::recipe_type IS NULL OR r.type = sqlc.narg('type')::recipe_type)
+        AND (
+            sqlc.narg('tag')::TEXT IS NULL
+            OR EXISTS (
+                SELECT 1
+                FROM recipe_tag t
+                WHERE
+                    t.recipe_id = r.id
+                    AND t.tag = sqlc.narg('tag')::TEXT
+            )
+        )
+        AND (
+            sqlc.narg('dietary_restriction')::dietary_restriction IS NULL
+            OR EXISTS (
+                SELECT 1
+                FROM recipe_dietary_restriction_met d
+                WHERE
+                    d.recipe_id = r.id
+                    AND d.dietary_restriction = sqlc.narg('dietary_restriction')::dietary_restriction
+            )
+        )
+)
+
+-- the total number of matching recipes, for paging
+SELECT 'total'::TEXT AS facet, ''::TEXT AS value, COUNT(*)::INT AS recipe_count
+FROM matching
+UNION ALL
+SELECT 'cuisine', cuisine::TEXT, COUNT(*)::INT
+FROM matching
+GROUP BY cuisine
+UNION ALL
+SELECT 'meal', meal::TEXT, COUNT(*)::INT
+FROM matching
+GROUP BY meal
+UNION ALL
+SELECT 'type', type::TEXT, COUNT(*)::INT
+FROM matching
+GROUP BY type
+UNION ALL
+SELECT 'tag', t.tag, COUNT(*)::INT
+FROM matching m
+JOIN recipe_tag t ON t.recipe_id = m.id
+GROUP BY t.tag
+UNION ALL
+SELECT 'dietary_restriction', d.dietary_restriction::TEXT, COUNT(*)::INT
+FROM matching m
+JOIN recipe_dietary_restriction_met d ON d.recipe_id = m.id
+GROUP BY d.dietary_restriction
+ORDER BY facet, recipe_count DESC, value
 ;
 
 -- name: GetRecipe :one
@@ -186,7 +331,7 @@ WHERE id = @recipeId::UUID
 RETURNING *
 ;
 
--- name: DeleteRecipe :exec
+-- name: DeleteRecipe :one
 DELETE FROM recipe
 WHERE id = @recipeId::UUID
 RETURNING *
@@ -217,10 +362,400 @@ WHERE recipe_id = ANY(@recipeIds::UUID[])
 ORDER BY step_number ASC
 ;
 
--- name: ListRecipeFilterOptions :one
+-- name: ListRecipeFacetCounts :many
 SELECT
-    ARRAY_AGG(DISTINCT meal)::meal[] AS meals,
-    ARRAY_AGG(DISTINCT type)::recipe_type[] AS types,
-    ARRAY_AGG(DISTINCT cuisine)::TEXT[] AS cuisines
+    CASE
+        WHEN GROUPING(meal) = 0 THEN 'meal'
+        WHEN GROUPING(type) = 0 THEN 'type'
+        ELSE 'cuisine'
+    END::TEXT AS facet,
+    COALESCE(meal::TEXT, type::TEXT, cuisine)::TEXT AS value,
+    COUNT(*)::INT AS recipe_count
 FROM recipe
-WHERE user_id = @userId::UUID;
\ No newline at end of file
+WHERE user_id = @userId::UUID
+GROUP BY GROUPING SETS ((meal), (type), (cuisine))
+ORDER BY facet, recipe_count DESC, value
+;
+
+-- name: ListRecipesByUser :many
+SELECT *
+FROM recipe
+WHERE user_id = @userId::UUID
+ORDER BY created_at, id
+;
+
+-- name: ListRecipeCookingLog :many
+SELECT *
+FROM recipe_cooking_log
+WHERE
+    user_id = @userId::UUID
+    AND recipe_id = ANY(@recipeIds::UUID[])
+ORDER BY cooked_at
+;
+
+-- name: CreateRecipes :many
+WITH new_recipes AS (
+    SELECT
+        UNNEST(@ids::UUID[]) AS id,
+        UNNEST(@names::TEXT[]) AS name,
+        UNNEST(@authors::TEXT[]) AS author,
+        UNNEST(@cuisines::TEXT[]) AS cuisine,
+        UNNEST(@locations::JSONB[]) AS location,
+        UNNEST(@timeEstimateMinutes::INTEGER[]) AS time_estimate_minutes,
+        UNNEST(@notes::TEXT[]) AS notes,
+        UNNEST(@types::recipe_type[]) AS type,
+        UNNEST(@meals::meal[]) AS meal,
+        UNNEST(@parentRecipeIds::UUID[]) AS parent_recipe_id
+)
+
+INSERT INTO recipe (
+    id,
+    user_id,
+    name,
+    author,
+    cuisine,
+    location,
+    time_estimate_minutes,
+    notes,
+    type,
+    meal,
+    parent_recipe_id
+)
+SELECT
+    nr.id,
+    @userId::UUID,
+    nr.name,
+    nr.author,
+    nr.cuisine,
+    nr.location,
+    nr.time_estimate_minutes,
+    NULLIF(nr.notes, ''),
+    nr.type,
+    nr.meal,
+    -- only keep links to parents that still exist on this server
+    parent.id
+FROM new_recipes nr
+LEFT JOIN recipe parent ON parent.id = nr.parent_recipe_id
+RETURNING *;
+
+-- name: CreateRecipeIngredientsForRecipes :exec
+WITH ingredients AS (
+    SELECT
+        UNNEST(@recipeIds::UUID[]) AS recipe_id,
+        UNNEST(@names::TEXT[]) AS name,
+        UNNEST(@quantities::FLOAT8[]) AS quantity,
+        UNNEST(@units::TEXT[]) AS units,
+        UNNEST(@canonicalNames::TEXT[]) AS canonical_name
+)
+
+INSERT INTO recipe_ingredient (recipe_id, name, quantity, units, canonical_ingredient_id)
+SELECT
+    i.recipe_id,
+    i.name,
+    i.quantity,
+    i.units,
+    c.id
+FROM ingredients i
+LEFT JOIN canonical_ingredient c ON c.name = i.canonical_name
+ON CONFLICT DO NOTHING;
+
+-- name: CreateRecipeInstructionsForRecipes :exec
+WITH instructions AS (
+    SELECT
+        UNNEST(@recipeIds::UUID[]) AS recipe_id,
+        UNNEST(@stepNumbers::INT[]) AS step_number,
+        UNNEST(@contents::TEXT[]) AS content
+)
+
+INSERT INTO recipe_instruction (recipe_id, step_number, content)
+SELECT
+    recipe_id,
+    step_number,
+    content
+FROM instructions
+ON CONFLICT DO NOTHING;
+
+-- name: CreateRecipeTagsForRecipes :exec
+WITH tags AS (
+    SELECT
+        UNNEST(@recipeIds::UUID[]) AS recipe_id,
+        UNNEST(@tags::TEXT[]) AS tag
+)
+
+INSERT INTO recipe_tag (recipe_id, tag)
+SELECT
+    recipe_id,
+    tag
+FROM tags
+ON CONFLICT DO NOTHING;
+
+-- name: CreateRecipeDietaryRestrictionsMetForRecipes :exec
+WITH restrictions AS (
+    SELECT
+        UNNEST(@recipeIds::UUID[]) AS recipe_id,
+        UNNEST(@dietaryRestrictionsMets::dietary_restriction[]) AS dietary_restriction
+)
+
+INSERT INTO recipe_dietary_restriction_met (recipe_id, dietary_restriction)
+SELECT
+    recipe_id,
+    dietary_restriction
+FROM restrictions
+ON CONFLICT DO NOTHING;
+
+-- name: CreateRecipeCookingLogs :exec
+WITH logs AS (
+    SELECT
+        UNNEST(@recipeIds::UUID[]) AS recipe_id,
+        UNNEST(@cookedAts::TIMESTAMPTZ[]) AS cooked_at
+), inserted AS (
+    INSERT INTO recipe_cooking_log (user_id, recipe_id, cooked_at)
+    SELECT
+        @userId::UUID,
+        recipe_id,
+        cooked_at
+    FROM logs
+    ON CONFLICT DO NOTHING
+    RETURNING *
+), fanned_out AS (
+    INSERT INTO activity_feed_item (feed_user_id, actor_user_id, recipe_id, cooked_at)
+    SELECT f.friend_user_id, recent.user_id, recent.recipe_id, recent.cooked_at
+    FROM (
+        SELECT *
+        FROM inserted
+        ORDER BY cooked_at DESC
+        LIMIT @feedCap::INT
+    ) recent
+    JOIN friendship f ON f.user_id = recent.user_id
+    WHERE f.status = 'accepted'
+    ON CONFLICT DO NOTHING
+), counted AS (
+    INSERT INTO recipe_cook_count (user_id, recipe_id, cook_count, last_cooked_at)
+    SELECT user_id, recipe_id, COUNT(*), MAX(cooked_at)
+    FROM inserted
+    GROUP BY user_id, recipe_id
+    ON CONFLICT (user_id, recipe_id) DO UPDATE
+    SET
+        cook_count = recipe_cook_count.cook_count + EXCLUDED.cook_count,
+        last_cooked_at = GREATEST(recipe_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)
+), counted_monthly AS (
+    INSERT INTO recipe_monthly_cook_count (user_id, recipe_id, month, cook_count, last_cooked_at)
+    SELECT
+        user_id,
+        recipe_id,
+        date_trunc('month', cooked_at AT TIME ZONE 'UTC')::DATE,
+        COUNT(*),
+        MAX(cooked_at)
+    FROM inserted
+    GROUP BY 1, 2, 3
+    ON CONFLICT (user_id, recipe_id, month) DO UPDATE
+    SET
+        cook_count = recipe_monthly_cook_count.cook_count + EXCLUDED.cook_count,
+        last_cooked_at = GREATEST(recipe_monthly_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)
+)
+
+UPDATE recipe r
+SET last_made_at = latest.cooked_at
+FROM (
+    SELECT recipe_id, MAX(cooked_at) AS cooked_at
+    FROM inserted
+    GROUP BY recipe_id
+) latest
+WHERE
+    r.id = latest.recipe_id
+    AND r.user_id = @userId::UUID;
+
+-- name: RefreshRecipeSearchDocuments :exec
+INSERT INTO recipe_search_document (
+    recipe_id,
+    name,
+    author,
+    cuisine,
+    notes,
+    tags,
+    ingredients,
+    dietary_restrictions
+)
+SELECT
+    r.id,
+    r.name,
+    r.author,
+    r.cuisine,
+    COALESCE(r.notes, ''),
+    COALESCE(tags.text, ''),
+    COALESCE(ingredients.text, ''),
+    COALESCE(dietary_restrictions.text, '')
+FROM recipe r
+LEFT JOIN LATERAL (
+    SELECT STRING_AGG(t.tag, ' ') AS text
+    FROM recipe_tag t
+    WHERE t.recipe_id = r.id
+) tags ON TRUE
+LEFT JOIN LATERAL (
+    SELECT STRING_AGG(i.name, ' ') AS text
+    FROM recipe_ingredient i
+    WHERE i.recipe_id = r.id
+) ingredients ON TRUE
+LEFT JOIN LATERAL (
+    SELECT STRING_AGG(REPLACE(d.dietary_restriction::TEXT, '_', ' '), ' ') AS text
+    FROM recipe_dietary_restriction_met d
+    WHERE d.recipe_id = r.id
+) dietary_restrictions ON TRUE
+WHERE r.id = ANY(@recipeIds::UUID[])
+ON CONFLICT (recipe_id) DO UPDATE
+SET
+    name = EXCLUDED.name,
+    author = EXCLUDED.author,
+    cuisine = EXCLUDED.cuisine,
+    notes = EXCLUDED.notes,
+    tags = EXCLUDED.tags,
+    ingredients = EXCLUDED.ingredients,
+    dietary_restrictions = EXCLUDED.dietary_restrictions
+;
+
+-- name: CreateCanonicalIngredients :exec
+INSERT INTO canonical_ingredient (name)
+SELECT DISTINCT name
+FROM UNNEST(@names::TEXT[]) AS name
+WHERE name <> ''
+ORDER BY name
+ON CONFLICT (name) DO NOTHING;
+
+-- name: ListUncanonicalizedRecipeIngredients :many
+SELECT
+    id,
+    name
+FROM recipe_ingredient
+WHERE
+    canonical_ingredient_id IS NULL
+    AND canonicalized_at IS NULL
+    AND id > @afterId::UUID
+ORDER BY id
+LIMIT @batchSize::INT;
+
+-- name: SetRecipeIngredientCanonicalIngredients :exec
+WITH canonicalized AS (
+    SELECT
+        UNNEST(@ids::UUID[]) AS id,
+        UNNEST(@canonicalNames::TEXT[]) AS canonical_name
+)
+
+-- rows without a canonical ingredient are still marked, so they aren't
+-- checked again
+UPDATE recipe_ingredient i
+SET
+    canonical_ingredient_id = c.id,
+    canonicalized_at = NOW()
+FROM canonicalized ci
+LEFT JOIN canonical_ingredient c ON c.name = ci.canonical_name
+WHERE
+    i.id = ci.id
+    AND i.canonical_ingredient_id IS NULL;
+
+-- name: UpsertRecipeSeasonality :exec
+INSERT INTO recipe_seasonality (recipe_id, region, peak_months)
+SELECT
+    UNNEST(@recipeIds::UUID[]),
+    UNNEST(@regions::TEXT[]),
+    UNNEST(@peakMonths::INT[])
+ON CONFLICT (recipe_id, region) DO UPDATE
+SET peak_months = EXCLUDED.peak_months;
+
+-- name: ListRecipesMissingSeasonality :many
+SELECT
+    r.id,
+    COALESCE(
+        ARRAY_AGG(i.name) FILTER (WHERE i.name IS NOT NULL),
+        '{}'
+    )::TEXT[] AS ingredient_names
+FROM recipe r
+LEFT JOIN recipe_ingredient i ON i.recipe_id = r.id
+WHERE
+    r.id > @afterId::UUID
+    -- recipes missing a row for any of the regions
+    AND (
+        SELECT COUNT(*)
+        FROM recipe_seasonality rs
+        WHERE
+            rs.recipe_id = r.id
+            AND rs.region = ANY(@regions::TEXT[])
+    ) < CARDINALITY(@regions::TEXT[])
+GROUP BY r.id
+ORDER BY r.id
+LIMIT @batchSize::INT;
+
+-- name: CloneRecipe :one
+WITH cloned AS (
+    INSERT INTO recipe (
+        user_id,
+        name,
+        author,
+        cuisine,
+        location,
+        time_estimate_minutes,
+        type,
+        meal,
+        parent_recipe_id
+    )
+    SELECT
+        @userId::UUID,
+        name,
+        author,
+        cuisine,
+        location,
+        time_estimate_minutes,
+        type,
+        meal,
+        id
+    FROM recipe
+    WHERE id = @recipeId::UUID
+    RETURNING *
+), cloned_ingredients AS (
+    INSERT INTO recipe_ingredient (recipe_id, name, quantity, units, canonical_ingredient_id)
+    SELECT c.id, i.name, i.quantity, i.units, i.canonical_ingredient_id
+    FROM cloned c
+    JOIN recipe_ingredient i ON i.recipe_id = c.parent_recipe_id
+), cloned_instructions AS (
+    INSERT INTO recipe_instruction (recipe_id, step_number, content)
+    SELECT c.id, i.step_number, i.content
+    FROM cloned c
+    JOIN recipe_instruction i ON i.recipe_id = c.parent_recipe_id
+), cloned_tags AS (
+    INSERT INTO recipe_tag (recipe_id, tag)
+    SELECT c.id, t.tag
+    FROM cloned c
+    JOIN recipe_tag t ON t.recipe_id = c.parent_recipe_id
+), cloned_dietary_restrictions_met AS (
+    INSERT INTO recipe_dietary_restriction_met (recipe_id, dietary_restriction)
+    SELECT c.id, d.dietary_restriction
+    FROM cloned c
+    JOIN recipe_dietary_restriction_met d ON d.recipe_id = c.parent_recipe_id
+), cloned_search_document AS (
+    -- copies don't carry over the source's notes
+    INSERT INTO recipe_search_document (
+        recipe_id,
+        name,
+        author,
+        cuisine,
+        notes,
+        tags,
+        ingredients,
+        dietary_restrictions
+    )
+    SELECT c.id, d.name, d.author, d.cuisine, '', d.tags, d.ingredients, d.dietary_restrictions
+    FROM cloned c
+    JOIN recipe_search_document d ON d.recipe_id = c.parent_recipe_id
+), cloned_seasonality AS (
+    INSERT INTO recipe_seasonality (recipe_id, region, peak_months)
+    SELECT c.id, s.region, s.peak_months
+    FROM cloned c
+    JOIN recipe_seasonality s ON s.recipe_id = c.parent_recipe_id
+), accepted_share_request AS (
+    DELETE FROM recipe_share_request rsr
+    USING cloned c
+    WHERE
+        rsr.recipe_id = c.parent_recipe_id
+        AND rsr.to_user_id = c.user_id
+)
+SELECT *
+FROM cloned;
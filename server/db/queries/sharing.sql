@@ -39,4 +39,73 @@ DELETE FROM recipe_share_request
 WHERE
     recipe_id = @recipeId::UUID
     AND to_user_id = @toUserId::UUID
-RETURNING *;
\ No newline at end of file
+RETURNING *;
+
+-- name: ShareRecipes :many
+WITH pairs AS (
+    SELECT DISTINCT
+        r.recipe_id,
+        u.to_user_id
+    FROM UNNEST(@recipeIds::UUID[]) AS r(recipe_id)
+    CROSS JOIN UNNEST(@toUserIds::UUID[]) AS u(to_user_id)
+), shared AS (
+    INSERT INTO recipe_share_request (recipe_id, to_user_id, expires_at)
+    SELECT
+        p.recipe_id,
+        p.to_user_id,
+        @expiresAt::TIMESTAMPTZ
+    FROM pairs p
+    -- only the sharer's own recipes can be shared
+    JOIN recipe r
+        ON r.id = p.recipe_id
+        AND r.user_id = @sharerId::UUID
+    JOIN "user" u ON u.id = p.to_user_id
+    ORDER BY p.recipe_id, p.to_user_id
+    -- a pending request is left alone, an expired one is renewed
+    ON CONFLICT (recipe_id, to_user_id) DO UPDATE
+    SET
+        created_at = NOW(),
+        expires_at = EXCLUDED.expires_at
+    WHERE recipe_share_request.expires_at <= NOW()
+    RETURNING *
+)
+SELECT
+    p.recipe_id,
+    p.to_user_id,
+    CASE
+        WHEN u.id IS NULL THEN 'recipient_not_found'
+        WHEN r.id IS NULL THEN 'recipe_not_found'
+        WHEN s.recipe_id IS NOT NULL THEN 'shared'
+        ELSE 'already_pending'
+    END::TEXT AS status,
+    COALESCE(s.created_at, existing.created_at) AS created_at,
+    COALESCE(s.expires_at, existing.expires_at) AS expires_at
+FROM pairs p
+LEFT JOIN recipe r
+    ON r.id = p.recipe_id
+    AND r.user_id = @sharerId::UUID
+LEFT JOIN "user" u ON u.id = p.to_user_id
+LEFT JOIN shared s
+    ON s.recipe_id = p.recipe_id
+    AND s.to_user_id = p.to_user_id
+LEFT JOIN recipe_share_request existing
+    ON existing.recipe_id = r.id
+    AND existing.to_user_id = p.to_user_id
+ORDER BY p.recipe_id, p.to_user_id;
+
+-- name: DeleteExpiredRecipeShareRequests :execrows
+WITH expired AS (
+    SELECT
+        recipe_id,
+        to_user_id
+    FROM recipe_share_request
+    WHERE expires_at <= NOW()
+    ORDER BY expires_at
+    LIMIT @batchSize::INT
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM recipe_share_request rsr
+USING expired e
+WHERE
+    rsr.recipe_id = e.recipe_id
+    AND rsr.to_user_id = e.to_user_id;
@@ -22,6 +22,15 @@ WHERE id = @userId::UUID
 RETURNING *
 ;
 
+-- name: SetSeasonalRegion :one
+UPDATE "user"
+SET
+    seasonal_region = sqlc.narg('seasonal_region')::TEXT,
+    updated_at = NOW()
+WHERE id = @userId::UUID
+RETURNING *
+;
+
 -- name: CreateUserPassword :exec
 INSERT INTO user_password (
     user_id,
@@ -61,18 +70,48 @@ LIMIT COALESCE(@userLimit::INT, 25)
 OFFSET COALESCE(@userOffset::INT, 0)
 ;
 
+-- name: SearchUsersTypeahead :many
+SELECT
+    id,
+    name,
+    (@query::TEXT <<-> (name || ' ' || email))::REAL AS distance
+FROM "user"
+WHERE
+    @query::TEXT <% (name || ' ' || email)
+    AND privacy_preference = 'public'
+    AND id != @userId::UUID
+    AND (
+        (@query::TEXT <<-> (name || ' ' || email))::REAL,
+        id
+    ) > (@afterDistance::REAL, @afterId::UUID)
+ORDER BY @query::TEXT <<-> (name || ' ' || email), id
+LIMIT @userLimit::INT
+;
+
 -- name: CreateFriendRequest :one
-INSERT INTO friendship (
-    user_id,
-    friend_user_id,
-    status
-)
-VALUES (
-    @userId::UUID,
-    @friendUserId::UUID,
-    'pending'
+WITH requested AS (
+    INSERT INTO friendship (
+        user_id,
+        friend_user_id,
+        status
+    )
+    VALUES (
+        @userId::UUID,
+        @friendUserId::UUID,
+        'pending'
+    )
+    ON CONFLICT (user_id, friend_user_id) DO NOTHING
+    RETURNING *
 )
-RETURNING *
+
+-- a repeated request returns the friendship that's already there
+SELECT *, TRUE AS created
+FROM requested
+UNION ALL
+SELECT *, FALSE AS created
+FROM friendship
+WHERE user_id = @userId::UUID
+  AND friend_user_id = @friendUserId::UUID
 ;
 
 -- name: AcceptFriendRequest :one
@@ -84,16 +123,30 @@ WITH updated AS (
     AND friend_user_id = @userId::UUID
     AND status = 'pending'
     RETURNING *
+), inserted AS (
+    INSERT INTO friendship (
+        user_id,
+        friend_user_id,
+        status
+    )
+    SELECT friend_user_id, user_id, 'accepted'
+    FROM updated
+    -- a pending request the other way is accepted along with this one
+    ON CONFLICT (user_id, friend_user_id) DO UPDATE
+    SET status = 'accepted',
+        updated_at = NOW()
+    RETURNING *
 )
 
-INSERT INTO friendship (
-    user_id,
-    friend_user_id,
-    status
-)
-SELECT friend_user_id, user_id, 'accepted'
-FROM updated
-RETURNING *
+-- accepting again returns the friendship that's already there
+SELECT *, TRUE AS accepted
+FROM inserted
+UNION ALL
+SELECT *, FALSE AS accepted
+FROM friendship
+WHERE user_id = @userId::UUID
+  AND friend_user_id = @requestFromUserId::UUID
+  AND status = 'accepted'
 ;
 
 -- name: ListFriends :many
@@ -111,4 +164,25 @@ JOIN friendship f ON u.id = f.user_id
 WHERE f.friend_user_id = @userId::UUID
   AND f.status = 'pending'
 ORDER BY f.created_at DESC
-;
\ No newline at end of file
+;
+
+-- name: ListFriendIdsForUsers :many
+SELECT user_id, friend_user_id
+FROM friendship
+WHERE user_id = ANY(@userIds::UUID[])
+  AND status = 'accepted'
+;
+
+-- name: ListFriendshipsForUser :many
+SELECT *
+FROM friendship
+WHERE user_id = @userId::UUID
+  OR friend_user_id = @userId::UUID
+;
+
+-- name: ListPublicUsersByIds :many
+SELECT id, name
+FROM "user"
+WHERE id = ANY(@userIds::UUID[])
+  AND privacy_preference = 'public'
+;
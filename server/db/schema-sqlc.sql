@@ -37,6 +37,11 @@ CREATE TYPE meal AS ENUM (
     'dinner',
     'other'
 );
+CREATE TYPE notification_status AS ENUM (
+    'pending',
+    'sent',
+    'failed'
+);
 CREATE TYPE push_permission_status AS ENUM (
     'none',
     'accepted',
@@ -56,6 +61,75 @@ CREATE TYPE user_privacy_preference AS ENUM (
     'public',
     'private'
 );
+CREATE FUNCTION ensure_recipe_cooking_log_partitions(from_month date, to_month date) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    month DATE;
+    partition_name TEXT;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', from_month),
+            date_trunc('month', to_month),
+            INTERVAL '1 month'
+        )::DATE
+    LOOP
+        partition_name := 'recipe_cooking_log_' || to_char(month, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+        PERFORM pg_advisory_xact_lock(hashtext('recipe_cooking_log_partitions'));
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF recipe_cooking_log FOR VALUES FROM (%L) TO (%L)',
+            partition_name,
+            month::TIMESTAMP AT TIME ZONE 'UTC',
+            (month + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END;
+$$;
+CREATE FUNCTION rollup_recipe_cooking_log(before_month date) RETURNS integer
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    month DATE;
+    partition_name TEXT;
+    rolled_up INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('recipe_cooking_log_partitions'));
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'recipe_cooking_log'::REGCLASS
+        ORDER BY c.relname
+    LOOP
+        month := to_date(right(partition_name, 7), 'YYYY_MM');
+        CONTINUE WHEN month >= date_trunc('month', before_month);
+        EXECUTE format('DROP TABLE %I', partition_name);
+        rolled_up := rolled_up + 1;
+    END LOOP;
+    RETURN rolled_up;
+END;
+$$;
+CREATE TABLE activity_feed_item (
+    feed_user_id uuid NOT NULL,
+    actor_user_id uuid NOT NULL,
+    recipe_id uuid NOT NULL,
+    cooked_at timestamp with time zone NOT NULL
+);
+CREATE TABLE canonical_ingredient (
+    id integer NOT NULL,
+    name text NOT NULL,
+    created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+ALTER TABLE canonical_ingredient ALTER COLUMN id ADD GENERATED ALWAYS AS IDENTITY (
+    SEQUENCE NAME canonical_ingredient_id_seq
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1
+);
 CREATE TABLE friendship (
     user_id uuid NOT NULL,
     friend_user_id uuid NOT NULL,
@@ -63,6 +137,30 @@ CREATE TABLE friendship (
     created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
     updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
 );
+CREATE TABLE idempotency_key (
+    user_id uuid NOT NULL,
+    key text NOT NULL,
+    request_path text NOT NULL,
+    response jsonb,
+    created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    request_body_hash text
+);
+CREATE TABLE notification_outbox (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    user_id uuid NOT NULL,
+    title text NOT NULL,
+    body text NOT NULL,
+    data jsonb DEFAULT '{}'::jsonb NOT NULL,
+    status notification_status DEFAULT 'pending'::notification_status NOT NULL,
+    attempts integer DEFAULT 0 NOT NULL,
+    next_attempt_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    expo_push_token text,
+    ticket_id text,
+    last_error text,
+    sent_at timestamp with time zone,
+    created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
 CREATE TABLE recipe (
     id uuid DEFAULT gen_random_uuid() NOT NULL,
     user_id uuid NOT NULL,
@@ -79,11 +177,18 @@ CREATE TABLE recipe (
     meal meal DEFAULT 'dinner'::meal NOT NULL,
     parent_recipe_id uuid
 );
+CREATE TABLE recipe_cook_count (
+    user_id uuid NOT NULL,
+    recipe_id uuid NOT NULL,
+    cook_count integer NOT NULL,
+    last_cooked_at timestamp with time zone NOT NULL
+);
 CREATE TABLE recipe_cooking_log (
     user_id uuid NOT NULL,
     recipe_id uuid NOT NULL,
     cooked_at timestamp with time zone DEFAULT now() NOT NULL
-);
+)
+PARTITION BY RANGE (cooked_at);
 CREATE TABLE recipe_dietary_restriction_met (
     id uuid DEFAULT gen_random_uuid() NOT NULL,
     recipe_id uuid NOT NULL,
@@ -96,7 +201,9 @@ CREATE TABLE recipe_ingredient (
     quantity double precision NOT NULL,
     units text NOT NULL,
     created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
-    updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
+    updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    canonical_ingredient_id integer,
+    canonicalized_at timestamp with time zone
 );
 CREATE TABLE recipe_instruction (
     id uuid DEFAULT gen_random_uuid() NOT NULL,
@@ -106,6 +213,28 @@ CREATE TABLE recipe_instruction (
     created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
     updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
 );
+CREATE TABLE recipe_monthly_cook_count (
+    user_id uuid NOT NULL,
+    recipe_id uuid NOT NULL,
+    month date NOT NULL,
+    cook_count integer NOT NULL,
+    last_cooked_at timestamp with time zone NOT NULL
+);
+CREATE TABLE recipe_seasonality (
+    recipe_id uuid NOT NULL,
+    region text NOT NULL,
+    peak_months integer NOT NULL
+);
+CREATE TABLE recipe_search_document (
+    recipe_id uuid NOT NULL,
+    name text NOT NULL,
+    author text NOT NULL,
+    cuisine text NOT NULL,
+    notes text NOT NULL,
+    tags text NOT NULL,
+    ingredients text NOT NULL,
+    dietary_restrictions text NOT NULL
+);
 CREATE TABLE recipe_share_request (
     to_user_id uuid NOT NULL,
     recipe_id uuid NOT NULL,
@@ -129,6 +258,7 @@ CREATE TABLE "user" (
     privacy_preference user_privacy_preference DEFAULT 'public'::user_privacy_preference NOT NULL,
     expo_push_token text,
     push_permission push_permission_status DEFAULT 'none'::push_permission_status NOT NULL,
+    seasonal_region text,
     CONSTRAINT check_push_token_set_if_permission_accepted CHECK ((((push_permission = 'accepted'::push_permission_status) AND (expo_push_token IS NOT NULL)) OR ((push_permission = ANY (ARRAY['none'::push_permission_status, 'rejected'::push_permission_status])) AND (expo_push_token IS NULL))))
 );
 CREATE TABLE user_password (
@@ -137,8 +267,20 @@ CREATE TABLE user_password (
     created_at timestamp with time zone DEFAULT now() NOT NULL,
     updated_at timestamp with time zone DEFAULT now() NOT NULL
 );
+ALTER TABLE ONLY activity_feed_item
+    ADD CONSTRAINT activity_feed_item_pkey PRIMARY KEY (feed_user_id, cooked_at, recipe_id, actor_user_id);
+ALTER TABLE ONLY canonical_ingredient
+    ADD CONSTRAINT canonical_ingredient_name_key UNIQUE (name);
+ALTER TABLE ONLY canonical_ingredient
+    ADD CONSTRAINT canonical_ingredient_pkey PRIMARY KEY (id);
 ALTER TABLE ONLY friendship
     ADD CONSTRAINT friendship_pkey PRIMARY KEY (user_id, friend_user_id);
+ALTER TABLE ONLY idempotency_key
+    ADD CONSTRAINT idempotency_key_pkey PRIMARY KEY (user_id, key);
+ALTER TABLE ONLY notification_outbox
+    ADD CONSTRAINT notification_outbox_pkey PRIMARY KEY (id);
+ALTER TABLE ONLY recipe_cook_count
+    ADD CONSTRAINT recipe_cook_count_pkey PRIMARY KEY (user_id, recipe_id);
 ALTER TABLE ONLY recipe_cooking_log
     ADD CONSTRAINT recipe_cooking_log_pkey PRIMARY KEY (user_id, cooked_at, recipe_id);
 ALTER TABLE ONLY recipe_dietary_restriction_met
@@ -149,6 +291,12 @@ ALTER TABLE ONLY recipe_instruction
     ADD CONSTRAINT recipe_instruction_pkey PRIMARY KEY (recipe_id, step_number);
 ALTER TABLE ONLY recipe
     ADD CONSTRAINT recipe_pkey PRIMARY KEY (id);
+ALTER TABLE ONLY recipe_monthly_cook_count
+    ADD CONSTRAINT recipe_monthly_cook_count_pkey PRIMARY KEY (user_id, recipe_id, month);
+ALTER TABLE ONLY recipe_seasonality
+    ADD CONSTRAINT recipe_seasonality_pkey PRIMARY KEY (recipe_id, region);
+ALTER TABLE ONLY recipe_search_document
+    ADD CONSTRAINT recipe_search_document_pkey PRIMARY KEY (recipe_id);
 ALTER TABLE ONLY recipe_share_request
     ADD CONSTRAINT recipe_share_request_pkey PRIMARY KEY (recipe_id, to_user_id);
 ALTER TABLE ONLY recipe_tag
@@ -161,26 +309,60 @@ ALTER TABLE ONLY user_password
     ADD CONSTRAINT user_password_pkey PRIMARY KEY (user_id);
 ALTER TABLE ONLY "user"
     ADD CONSTRAINT user_pkey PRIMARY KEY (id);
+CREATE INDEX idx_friendship_friend_user_id_status ON friendship USING btree (friend_user_id, status);
+CREATE INDEX idx_idempotency_key_created_at ON idempotency_key USING btree (created_at);
+CREATE INDEX idx_notification_outbox_failed ON notification_outbox USING btree (updated_at) WHERE (status = 'failed'::notification_status);
+CREATE INDEX idx_notification_outbox_pending ON notification_outbox USING btree (next_attempt_at) WHERE (status = 'pending'::notification_status);
+CREATE INDEX idx_notification_outbox_sent ON notification_outbox USING btree (sent_at) WHERE (status = 'sent'::notification_status);
+CREATE INDEX idx_recipe_cook_count_user_id_cook_count ON recipe_cook_count USING btree (user_id, cook_count DESC, recipe_id);
+CREATE INDEX idx_recipe_ingredient_canonical_ingredient_id ON recipe_ingredient USING btree (canonical_ingredient_id, recipe_id);
+CREATE INDEX idx_recipe_ingredient_uncanonicalized ON recipe_ingredient USING btree (id) WHERE ((canonical_ingredient_id IS NULL) AND (canonicalized_at IS NULL));
+CREATE INDEX idx_recipe_monthly_cook_count_user_id_month ON recipe_monthly_cook_count USING btree (user_id, month);
+CREATE INDEX idx_recipe_share_request_expires_at ON recipe_share_request USING btree (expires_at);
+CREATE INDEX idx_recipe_share_request_to_user_id_expires_at ON recipe_share_request USING btree (to_user_id, expires_at);
 CREATE INDEX idx_recipe_user_id_parent_recipe_id ON recipe USING btree (user_id, parent_recipe_id);
-CREATE INDEX idx_users_name_email_trgm ON "user" USING gin ((((name || ' '::text) || email)) gin_trgm_ops);
-CREATE INDEX recipe_ingredient_search_idx ON recipe_ingredient USING bm25 (id, name, recipe_id) WITH (key_field=id, text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}}');
-CREATE INDEX recipe_search_idx ON recipe USING bm25 (name, author, cuisine, notes, id) WITH (key_field=id, text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}, "notes": {"tokenizer": {"type": "default", "stemmer": "English"}}}');
+CREATE INDEX idx_users_name_email_trgm ON "user" USING gist ((((name || ' '::text) || email)) gist_trgm_ops) WHERE (privacy_preference = 'public'::user_privacy_preference);
+CREATE INDEX recipe_search_document_idx ON recipe_search_document USING bm25 (recipe_id, name, author, cuisine, notes, tags, ingredients, dietary_restrictions) WITH (key_field=recipe_id, text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}, "notes": {"tokenizer": {"type": "default", "stemmer": "English"}}, "tags": {"tokenizer": {"type": "default", "stemmer": "English"}}, "ingredients": {"tokenizer": {"type": "default", "stemmer": "English"}}, "dietary_restrictions": {"tokenizer": {"type": "default", "stemmer": "English"}}}');
+ALTER TABLE ONLY activity_feed_item
+    ADD CONSTRAINT activity_feed_item_actor_user_id_fkey FOREIGN KEY (actor_user_id) REFERENCES "user"(id) ON DELETE CASCADE;
+ALTER TABLE ONLY activity_feed_item
+    ADD CONSTRAINT activity_feed_item_feed_user_id_fkey FOREIGN KEY (feed_user_id) REFERENCES "user"(id) ON DELETE CASCADE;
+ALTER TABLE ONLY activity_feed_item
+    ADD CONSTRAINT activity_feed_item_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
 ALTER TABLE ONLY friendship
     ADD CONSTRAINT friendship_friend_user_id_fkey FOREIGN KEY (friend_user_id) REFERENCES "user"(id) ON DELETE CASCADE;
 ALTER TABLE ONLY friendship
     ADD CONSTRAINT friendship_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE;
-ALTER TABLE ONLY recipe_cooking_log
+ALTER TABLE ONLY idempotency_key
+    ADD CONSTRAINT idempotency_key_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE;
+ALTER TABLE ONLY notification_outbox
+    ADD CONSTRAINT notification_outbox_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE;
+ALTER TABLE ONLY recipe_cook_count
+    ADD CONSTRAINT recipe_cook_count_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
+ALTER TABLE ONLY recipe_cook_count
+    ADD CONSTRAINT recipe_cook_count_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE;
+ALTER TABLE recipe_cooking_log
     ADD CONSTRAINT recipe_cooking_log_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
-ALTER TABLE ONLY recipe_cooking_log
+ALTER TABLE recipe_cooking_log
     ADD CONSTRAINT recipe_cooking_log_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE;
 ALTER TABLE ONLY recipe_dietary_restriction_met
     ADD CONSTRAINT recipe_dietary_restriction_met_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
+ALTER TABLE ONLY recipe_ingredient
+    ADD CONSTRAINT recipe_ingredient_canonical_ingredient_id_fkey FOREIGN KEY (canonical_ingredient_id) REFERENCES canonical_ingredient(id);
 ALTER TABLE ONLY recipe_ingredient
     ADD CONSTRAINT recipe_ingredient_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
 ALTER TABLE ONLY recipe_instruction
     ADD CONSTRAINT recipe_instruction_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
 ALTER TABLE ONLY recipe
     ADD CONSTRAINT recipe_parent_recipe_id_fkey FOREIGN KEY (parent_recipe_id) REFERENCES recipe(id) ON DELETE SET NULL;
+ALTER TABLE ONLY recipe_monthly_cook_count
+    ADD CONSTRAINT recipe_monthly_cook_count_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
+ALTER TABLE ONLY recipe_monthly_cook_count
+    ADD CONSTRAINT recipe_monthly_cook_count_user_id_fkey FOREIGN KEY (user_id) REFERENCES "user"(id) ON DELETE CASCADE;
+ALTER TABLE ONLY recipe_seasonality
+    ADD CONSTRAINT recipe_seasonality_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
+ALTER TABLE ONLY recipe_search_document
+    ADD CONSTRAINT recipe_search_document_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
 ALTER TABLE ONLY recipe_share_request
     ADD CONSTRAINT recipe_share_request_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES recipe(id) ON DELETE CASCADE;
 ALTER TABLE ONLY recipe_share_request
@@ -208,4 +390,18 @@ INSERT INTO schema_migrations (version) VALUES
     ('20250909235457'),
     ('20250912212801'),
     ('20250914141917'),
-    ('20260707003048');
+    ('20260707003048'),
+    ('20261019190500'),
+    ('20261019193000'),
+    ('20261019200000'),
+    ('20261019203000'),
+    ('20261019210000'),
+    ('20261019213000'),
+    ('20261019220000'),
+    ('20261019223000'),
+    ('20261019230000'),
+    ('20261019233000'),
+    ('20261019234500'),
+    ('20261019235000'),
+    ('20261019235500'),
+    ('20261020000000');
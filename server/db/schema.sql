@@ -193,6 +193,17 @@ CREATE TYPE public.meal AS ENUM (
 );
 
 
+--
+-- Name: notification_status; Type: TYPE; Schema: public; Owner: -
+--
+
+CREATE TYPE public.notification_status AS ENUM (
+    'pending',
+    'sent',
+    'failed'
+);
+
+
 --
 -- Name: push_permission_status; Type: TYPE; Schema: public; Owner: -
 --
@@ -230,10 +241,114 @@ CREATE TYPE public.user_privacy_preference AS ENUM (
 );
 
 
+--
+-- Name: ensure_recipe_cooking_log_partitions(date, date); Type: FUNCTION; Schema: public; Owner: -
+--
+
+CREATE FUNCTION public.ensure_recipe_cooking_log_partitions(from_month date, to_month date) RETURNS void
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    month DATE;
+    partition_name TEXT;
+BEGIN
+    FOR month IN
+        SELECT generate_series(
+            date_trunc('month', from_month),
+            date_trunc('month', to_month),
+            INTERVAL '1 month'
+        )::DATE
+    LOOP
+        partition_name := 'recipe_cooking_log_' || to_char(month, 'YYYY_MM');
+        CONTINUE WHEN to_regclass(partition_name) IS NOT NULL;
+
+        PERFORM pg_advisory_xact_lock(hashtext('recipe_cooking_log_partitions'));
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF recipe_cooking_log FOR VALUES FROM (%L) TO (%L)',
+            partition_name,
+            month::TIMESTAMP AT TIME ZONE 'UTC',
+            (month + INTERVAL '1 month')::TIMESTAMP AT TIME ZONE 'UTC'
+        );
+    END LOOP;
+END;
+$$;
+
+
+--
+-- Name: rollup_recipe_cooking_log(date); Type: FUNCTION; Schema: public; Owner: -
+--
+
+CREATE FUNCTION public.rollup_recipe_cooking_log(before_month date) RETURNS integer
+    LANGUAGE plpgsql
+    AS $$
+DECLARE
+    month DATE;
+    partition_name TEXT;
+    rolled_up INT := 0;
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext('recipe_cooking_log_partitions'));
+
+    FOR partition_name IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'recipe_cooking_log'::REGCLASS
+        ORDER BY c.relname
+    LOOP
+        month := to_date(right(partition_name, 7), 'YYYY_MM');
+        CONTINUE WHEN month >= date_trunc('month', before_month);
+
+        EXECUTE format('DROP TABLE %I', partition_name);
+
+        rolled_up := rolled_up + 1;
+    END LOOP;
+
+    RETURN rolled_up;
+END;
+$$;
+
+
 SET default_tablespace = '';
 
 SET default_table_access_method = heap;
 
+--
+-- Name: activity_feed_item; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.activity_feed_item (
+    feed_user_id uuid NOT NULL,
+    actor_user_id uuid NOT NULL,
+    recipe_id uuid NOT NULL,
+    cooked_at timestamp with time zone NOT NULL
+);
+
+
+--
+-- Name: canonical_ingredient; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.canonical_ingredient (
+    id integer NOT NULL,
+    name text NOT NULL,
+    created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+
+--
+-- Name: canonical_ingredient_id_seq; Type: SEQUENCE; Schema: public; Owner: -
+--
+
+ALTER TABLE public.canonical_ingredient ALTER COLUMN id ADD GENERATED ALWAYS AS IDENTITY (
+    SEQUENCE NAME public.canonical_ingredient_id_seq
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1
+);
+
+
 --
 -- Name: friendship; Type: TABLE; Schema: public; Owner: -
 --
@@ -247,6 +362,42 @@ CREATE TABLE public.friendship (
 );
 
 
+--
+-- Name: idempotency_key; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.idempotency_key (
+    user_id uuid NOT NULL,
+    key text NOT NULL,
+    request_path text NOT NULL,
+    response jsonb,
+    created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    request_body_hash text
+);
+
+
+--
+-- Name: notification_outbox; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.notification_outbox (
+    id uuid DEFAULT gen_random_uuid() NOT NULL,
+    user_id uuid NOT NULL,
+    title text NOT NULL,
+    body text NOT NULL,
+    data jsonb DEFAULT '{}'::jsonb NOT NULL,
+    status public.notification_status DEFAULT 'pending'::public.notification_status NOT NULL,
+    attempts integer DEFAULT 0 NOT NULL,
+    next_attempt_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    expo_push_token text,
+    ticket_id text,
+    last_error text,
+    sent_at timestamp with time zone,
+    created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
+);
+
+
 --
 -- Name: recipe; Type: TABLE; Schema: public; Owner: -
 --
@@ -269,6 +420,18 @@ CREATE TABLE public.recipe (
 );
 
 
+--
+-- Name: recipe_cook_count; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.recipe_cook_count (
+    user_id uuid NOT NULL,
+    recipe_id uuid NOT NULL,
+    cook_count integer NOT NULL,
+    last_cooked_at timestamp with time zone NOT NULL
+);
+
+
 --
 -- Name: recipe_cooking_log; Type: TABLE; Schema: public; Owner: -
 --
@@ -277,7 +440,9 @@ CREATE TABLE public.recipe_cooking_log (
     user_id uuid NOT NULL,
     recipe_id uuid NOT NULL,
     cooked_at timestamp with time zone DEFAULT now() NOT NULL
-);
+
+)
+PARTITION BY RANGE (cooked_at);
 
 
 --
@@ -302,7 +467,9 @@ CREATE TABLE public.recipe_ingredient (
     quantity double precision NOT NULL,
     units text NOT NULL,
     created_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
-    updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL
+    updated_at timestamp with time zone DEFAULT CURRENT_TIMESTAMP NOT NULL,
+    canonical_ingredient_id integer,
+    canonicalized_at timestamp with time zone
 );
 
 
@@ -320,6 +487,46 @@ CREATE TABLE public.recipe_instruction (
 );
 
 
+--
+-- Name: recipe_monthly_cook_count; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.recipe_monthly_cook_count (
+    user_id uuid NOT NULL,
+    recipe_id uuid NOT NULL,
+    month date NOT NULL,
+    cook_count integer NOT NULL,
+    last_cooked_at timestamp with time zone NOT NULL
+);
+
+
+--
+-- Name: recipe_seasonality; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.recipe_seasonality (
+    recipe_id uuid NOT NULL,
+    region text NOT NULL,
+    peak_months integer NOT NULL
+);
+
+
+--
+-- Name: recipe_search_document; Type: TABLE; Schema: public; Owner: -
+--
+
+CREATE TABLE public.recipe_search_document (
+    recipe_id uuid NOT NULL,
+    name text NOT NULL,
+    author text NOT NULL,
+    cuisine text NOT NULL,
+    notes text NOT NULL,
+    tags text NOT NULL,
+    ingredients text NOT NULL,
+    dietary_restrictions text NOT NULL
+);
+
+
 --
 -- Name: recipe_share_request; Type: TABLE; Schema: public; Owner: -
 --
@@ -365,6 +572,7 @@ CREATE TABLE public."user" (
     privacy_preference public.user_privacy_preference DEFAULT 'public'::public.user_privacy_preference NOT NULL,
     expo_push_token text,
     push_permission public.push_permission_status DEFAULT 'none'::public.push_permission_status NOT NULL,
+    seasonal_region text,
     CONSTRAINT check_push_token_set_if_permission_accepted CHECK ((((push_permission = 'accepted'::public.push_permission_status) AND (expo_push_token IS NOT NULL)) OR ((push_permission = ANY (ARRAY['none'::public.push_permission_status, 'rejected'::public.push_permission_status])) AND (expo_push_token IS NULL))))
 );
 
@@ -381,6 +589,30 @@ CREATE TABLE public.user_password (
 );
 
 
+--
+-- Name: activity_feed_item activity_feed_item_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.activity_feed_item
+    ADD CONSTRAINT activity_feed_item_pkey PRIMARY KEY (feed_user_id, cooked_at, recipe_id, actor_user_id);
+
+
+--
+-- Name: canonical_ingredient canonical_ingredient_name_key; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.canonical_ingredient
+    ADD CONSTRAINT canonical_ingredient_name_key UNIQUE (name);
+
+
+--
+-- Name: canonical_ingredient canonical_ingredient_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.canonical_ingredient
+    ADD CONSTRAINT canonical_ingredient_pkey PRIMARY KEY (id);
+
+
 --
 -- Name: friendship friendship_pkey; Type: CONSTRAINT; Schema: public; Owner: -
 --
@@ -389,6 +621,30 @@ ALTER TABLE ONLY public.friendship
     ADD CONSTRAINT friendship_pkey PRIMARY KEY (user_id, friend_user_id);
 
 
+--
+-- Name: idempotency_key idempotency_key_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.idempotency_key
+    ADD CONSTRAINT idempotency_key_pkey PRIMARY KEY (user_id, key);
+
+
+--
+-- Name: notification_outbox notification_outbox_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.notification_outbox
+    ADD CONSTRAINT notification_outbox_pkey PRIMARY KEY (id);
+
+
+--
+-- Name: recipe_cook_count recipe_cook_count_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_cook_count
+    ADD CONSTRAINT recipe_cook_count_pkey PRIMARY KEY (user_id, recipe_id);
+
+
 --
 -- Name: recipe_cooking_log recipe_cooking_log_pkey; Type: CONSTRAINT; Schema: public; Owner: -
 --
@@ -429,6 +685,30 @@ ALTER TABLE ONLY public.recipe
     ADD CONSTRAINT recipe_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: recipe_monthly_cook_count recipe_monthly_cook_count_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_monthly_cook_count
+    ADD CONSTRAINT recipe_monthly_cook_count_pkey PRIMARY KEY (user_id, recipe_id, month);
+
+
+--
+-- Name: recipe_seasonality recipe_seasonality_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_seasonality
+    ADD CONSTRAINT recipe_seasonality_pkey PRIMARY KEY (recipe_id, region);
+
+
+--
+-- Name: recipe_search_document recipe_search_document_pkey; Type: CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_search_document
+    ADD CONSTRAINT recipe_search_document_pkey PRIMARY KEY (recipe_id);
+
+
 --
 -- Name: recipe_share_request recipe_share_request_pkey; Type: CONSTRAINT; Schema: public; Owner: -
 --
@@ -477,6 +757,83 @@ ALTER TABLE ONLY public."user"
     ADD CONSTRAINT user_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: idx_friendship_friend_user_id_status; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_friendship_friend_user_id_status ON public.friendship USING btree (friend_user_id, status);
+
+
+--
+-- Name: idx_idempotency_key_created_at; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_idempotency_key_created_at ON public.idempotency_key USING btree (created_at);
+
+
+--
+-- Name: idx_notification_outbox_failed; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_notification_outbox_failed ON public.notification_outbox USING btree (updated_at) WHERE (status = 'failed'::public.notification_status);
+
+
+--
+-- Name: idx_notification_outbox_pending; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_notification_outbox_pending ON public.notification_outbox USING btree (next_attempt_at) WHERE (status = 'pending'::public.notification_status);
+
+
+--
+-- Name: idx_notification_outbox_sent; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_notification_outbox_sent ON public.notification_outbox USING btree (sent_at) WHERE (status = 'sent'::public.notification_status);
+
+
+--
+-- Name: idx_recipe_cook_count_user_id_cook_count; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_recipe_cook_count_user_id_cook_count ON public.recipe_cook_count USING btree (user_id, cook_count DESC, recipe_id);
+
+
+--
+-- Name: idx_recipe_ingredient_canonical_ingredient_id; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_recipe_ingredient_canonical_ingredient_id ON public.recipe_ingredient USING btree (canonical_ingredient_id, recipe_id);
+
+
+--
+-- Name: idx_recipe_ingredient_uncanonicalized; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_recipe_ingredient_uncanonicalized ON public.recipe_ingredient USING btree (id) WHERE ((canonical_ingredient_id IS NULL) AND (canonicalized_at IS NULL));
+
+
+--
+-- Name: idx_recipe_monthly_cook_count_user_id_month; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_recipe_monthly_cook_count_user_id_month ON public.recipe_monthly_cook_count USING btree (user_id, month);
+
+
+--
+-- Name: idx_recipe_share_request_expires_at; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_recipe_share_request_expires_at ON public.recipe_share_request USING btree (expires_at);
+
+
+--
+-- Name: idx_recipe_share_request_to_user_id_expires_at; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX idx_recipe_share_request_to_user_id_expires_at ON public.recipe_share_request USING btree (to_user_id, expires_at);
+
+
 --
 -- Name: idx_recipe_user_id_parent_recipe_id; Type: INDEX; Schema: public; Owner: -
 --
@@ -488,21 +845,38 @@ CREATE INDEX idx_recipe_user_id_parent_recipe_id ON public.recipe USING btree (u
 -- Name: idx_users_name_email_trgm; Type: INDEX; Schema: public; Owner: -
 --
 
-CREATE INDEX idx_users_name_email_trgm ON public."user" USING gin ((((name || ' '::text) || email)) public.gin_trgm_ops);
+CREATE INDEX idx_users_name_email_trgm ON public."user" USING gist ((((name || ' '::text) || email)) public.gist_trgm_ops) WHERE (privacy_preference = 'public'::public.user_privacy_preference);
+
+
+--
+-- Name: recipe_search_document_idx; Type: INDEX; Schema: public; Owner: -
+--
+
+CREATE INDEX recipe_search_document_idx ON public.recipe_search_document USING bm25 (recipe_id, name, author, cuisine, notes, tags, ingredients, dietary_restrictions) WITH (key_field=recipe_id, text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}, "notes": {"tokenizer": {"type": "default", "stemmer": "English"}}, "tags": {"tokenizer": {"type": "default", "stemmer": "English"}}, "ingredients": {"tokenizer": {"type": "default", "stemmer": "English"}}, "dietary_restrictions": {"tokenizer": {"type": "default", "stemmer": "English"}}}');
+
+
+--
+-- Name: activity_feed_item activity_feed_item_actor_user_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.activity_feed_item
+    ADD CONSTRAINT activity_feed_item_actor_user_id_fkey FOREIGN KEY (actor_user_id) REFERENCES public."user"(id) ON DELETE CASCADE;
 
 
 --
--- Name: recipe_ingredient_search_idx; Type: INDEX; Schema: public; Owner: -
+-- Name: activity_feed_item activity_feed_item_feed_user_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
 --
 
-CREATE INDEX recipe_ingredient_search_idx ON public.recipe_ingredient USING bm25 (id, name, recipe_id) WITH (key_field=id, text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}}');
+ALTER TABLE ONLY public.activity_feed_item
+    ADD CONSTRAINT activity_feed_item_feed_user_id_fkey FOREIGN KEY (feed_user_id) REFERENCES public."user"(id) ON DELETE CASCADE;
 
 
 --
--- Name: recipe_search_idx; Type: INDEX; Schema: public; Owner: -
+-- Name: activity_feed_item activity_feed_item_recipe_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
 --
 
-CREATE INDEX recipe_search_idx ON public.recipe USING bm25 (name, author, cuisine, notes, id) WITH (key_field=id, text_fields='{"name": {"tokenizer": {"type": "default", "stemmer": "English"}}, "notes": {"tokenizer": {"type": "default", "stemmer": "English"}}}');
+ALTER TABLE ONLY public.activity_feed_item
+    ADD CONSTRAINT activity_feed_item_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES public.recipe(id) ON DELETE CASCADE;
 
 
 --
@@ -521,11 +895,43 @@ ALTER TABLE ONLY public.friendship
     ADD CONSTRAINT friendship_user_id_fkey FOREIGN KEY (user_id) REFERENCES public."user"(id) ON DELETE CASCADE;
 
 
+--
+-- Name: idempotency_key idempotency_key_user_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.idempotency_key
+    ADD CONSTRAINT idempotency_key_user_id_fkey FOREIGN KEY (user_id) REFERENCES public."user"(id) ON DELETE CASCADE;
+
+
+--
+-- Name: notification_outbox notification_outbox_user_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.notification_outbox
+    ADD CONSTRAINT notification_outbox_user_id_fkey FOREIGN KEY (user_id) REFERENCES public."user"(id) ON DELETE CASCADE;
+
+
+--
+-- Name: recipe_cook_count recipe_cook_count_recipe_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_cook_count
+    ADD CONSTRAINT recipe_cook_count_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES public.recipe(id) ON DELETE CASCADE;
+
+
+--
+-- Name: recipe_cook_count recipe_cook_count_user_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_cook_count
+    ADD CONSTRAINT recipe_cook_count_user_id_fkey FOREIGN KEY (user_id) REFERENCES public."user"(id) ON DELETE CASCADE;
+
+
 --
 -- Name: recipe_cooking_log recipe_cooking_log_recipe_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
 --
 
-ALTER TABLE ONLY public.recipe_cooking_log
+ALTER TABLE public.recipe_cooking_log
     ADD CONSTRAINT recipe_cooking_log_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES public.recipe(id) ON DELETE CASCADE;
 
 
@@ -533,7 +939,7 @@ ALTER TABLE ONLY public.recipe_cooking_log
 -- Name: recipe_cooking_log recipe_cooking_log_user_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
 --
 
-ALTER TABLE ONLY public.recipe_cooking_log
+ALTER TABLE public.recipe_cooking_log
     ADD CONSTRAINT recipe_cooking_log_user_id_fkey FOREIGN KEY (user_id) REFERENCES public."user"(id) ON DELETE CASCADE;
 
 
@@ -545,6 +951,14 @@ ALTER TABLE ONLY public.recipe_dietary_restriction_met
     ADD CONSTRAINT recipe_dietary_restriction_met_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES public.recipe(id) ON DELETE CASCADE;
 
 
+--
+-- Name: recipe_ingredient recipe_ingredient_canonical_ingredient_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_ingredient
+    ADD CONSTRAINT recipe_ingredient_canonical_ingredient_id_fkey FOREIGN KEY (canonical_ingredient_id) REFERENCES public.canonical_ingredient(id);
+
+
 --
 -- Name: recipe_ingredient recipe_ingredient_recipe_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
 --
@@ -569,6 +983,38 @@ ALTER TABLE ONLY public.recipe
     ADD CONSTRAINT recipe_parent_recipe_id_fkey FOREIGN KEY (parent_recipe_id) REFERENCES public.recipe(id) ON DELETE SET NULL;
 
 
+--
+-- Name: recipe_monthly_cook_count recipe_monthly_cook_count_recipe_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_monthly_cook_count
+    ADD CONSTRAINT recipe_monthly_cook_count_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES public.recipe(id) ON DELETE CASCADE;
+
+
+--
+-- Name: recipe_monthly_cook_count recipe_monthly_cook_count_user_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_monthly_cook_count
+    ADD CONSTRAINT recipe_monthly_cook_count_user_id_fkey FOREIGN KEY (user_id) REFERENCES public."user"(id) ON DELETE CASCADE;
+
+
+--
+-- Name: recipe_seasonality recipe_seasonality_recipe_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_seasonality
+    ADD CONSTRAINT recipe_seasonality_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES public.recipe(id) ON DELETE CASCADE;
+
+
+--
+-- Name: recipe_search_document recipe_search_document_recipe_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
+--
+
+ALTER TABLE ONLY public.recipe_search_document
+    ADD CONSTRAINT recipe_search_document_recipe_id_fkey FOREIGN KEY (recipe_id) REFERENCES public.recipe(id) ON DELETE CASCADE;
+
+
 --
 -- Name: recipe_share_request recipe_share_request_recipe_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: -
 --
@@ -635,4 +1081,18 @@ INSERT INTO public.schema_migrations (version) VALUES
     ('20250909235457'),
     ('20250912212801'),
     ('20250914141917'),
-    ('20260707003048');
+    ('20260707003048'),
+    ('20261019190500'),
+    ('20261019193000'),
+    ('20261019200000'),
+    ('20261019203000'),
+    ('20261019210000'),
+    ('20261019213000'),
+    ('20261019220000'),
+    ('20261019223000'),
+    ('20261019230000'),
+    ('20261019233000'),
+    ('20261019234500'),
+    ('20261019235000'),
+    ('20261019235500'),
+    ('20261020000000');
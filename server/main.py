@@ -1,24 +1,49 @@
+import asyncio
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.controllers import activity, auth, recipes, sharing, users
+from src.controllers import activity, auth, events, recipes, sharing, users
 from src.dependencies import close_db_engine
 from src.logger import get_logger
+from src.middleware import UploadSizeLimitMiddleware
+from src.services.events import run_event_listener_forever
+from src.services.maintenance import run_maintenance_forever
+from src.services.notifications import run_notification_worker_forever
+from src.settings import settings
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncGenerator[None, None]:
+    ## push delivery runs in the background, off the request path
+    background_tasks = [
+        asyncio.create_task(run_maintenance_forever()),
+        asyncio.create_task(run_notification_worker_forever()),
+        asyncio.create_task(run_event_listener_forever()),
+    ]
+
     try:
         yield
     finally:
+        for task in background_tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
         await close_db_engine()
 
 
 app = FastAPI(lifespan=lifespan)
 
+## added before CORS so the 413s it sends get CORS headers too
+app.add_middleware(
+    UploadSizeLimitMiddleware,
+    max_bytes=settings.recipe_image_upload_max_bytes,
+    paths={"/recipes/cookbook", "/recipes/cookbook/stream"},
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -37,5 +62,6 @@ app.include_router(recipes)
 app.include_router(users)
 app.include_router(sharing)
 app.include_router(activity)
+app.include_router(events)
 
 logger = get_logger(__name__)
@@ -1,7 +1,8 @@
 from src.controllers.activity import activity
 from src.controllers.auth import auth
+from src.controllers.events import events
 from src.controllers.recipes import recipes
 from src.controllers.sharing import sharing
 from src.controllers.users import users
 
-__all__ = ["activity", "auth", "recipes", "sharing", "users"]
+__all__ = ["activity", "auth", "events", "recipes", "sharing", "users"]
@@ -1,15 +1,25 @@
-from typing import Literal
+from collections import defaultdict
+from datetime import UTC, datetime
+from typing import Annotated, Literal
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, Query, status
 from pydantic import BaseModel
 
 from src.crud.activity import AsyncQuerier as ActivityQuerier
-from src.crud.activity import ListRecentRecipeCooksRow
+from src.crud.activity import (
+    ListActivityFeedParams,
+    ListRecentRecipeCooksParams,
+    ListRecentRecipeCooksRow,
+)
+from src.crud.events import AsyncQuerier as EventQuerier
 from src.crud.models import Recipe
+from src.crud.notifications import AsyncQuerier as NotificationQuerier
 from src.crud.users import AsyncQuerier as UserQuerier
 from src.dependencies import Connection, User
 from src.logger import get_logger
+from src.services.friends import get_friend_ids
+from src.settings import settings
 
 activity = APIRouter(prefix="/activity")
 logger = get_logger(__name__)
@@ -27,11 +37,24 @@ async def mark_recipe_cooked(
 ) -> Recipe | None:
     querier = ActivityQuerier(conn)
 
-    return await querier.mark_recipe_cooked(
+    recipe = await querier.mark_recipe_cooked(
         recipeid=body.recipe_id,
         userid=user.id,
     )
 
+    if recipe:
+        await querier.trim_activity_feeds(
+            feedcap=settings.activity_feed_cap, actoruserid=user.id
+        )
+        await NotificationQuerier(conn).enqueue_friend_cooked_notifications(
+            recipeid=body.recipe_id, userid=user.id
+        )
+        await EventQuerier(conn).notify_friend_cooked(
+            recipeid=body.recipe_id, userid=user.id
+        )
+
+    return recipe
+
 
 @activity.get("")
 async def list_recent_activity(
@@ -39,25 +62,122 @@ async def list_recent_activity(
     user: User,
     who: Literal["me", "friends", "both"],
     limit: int,
-    offset: int,
+    offset: int = 0,
+    before_cooked_at: datetime | None = None,
+    before_recipe_id: UUID | None = None,
 ) -> list[ListRecentRecipeCooksRow]:
+    ## `before_*` is the (cooked_at, id) of the last item on the previous page
+    if (before_cooked_at is None) != (before_recipe_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="before_cooked_at and before_recipe_id must be passed together",
+        )
+
     activity = ActivityQuerier(conn)
-    users = UserQuerier(conn)
 
     if who == "me":
         cooks = activity.list_recent_recipe_cooks(
-            userids=[user.id], recentcookslimit=limit, recentcooksoffset=offset
+            ListRecentRecipeCooksParams(
+                userids=[user.id],
+                before_cooked_at=before_cooked_at,
+                before_recipe_id=before_recipe_id,
+                recentcookslimit=limit,
+                recentcooksoffset=offset,
+            )
         )
 
         return [c async for c in cooks]
 
-    user_ids = [u.id async for u in users.list_friends(userid=user.id)]
+    feed = activity.list_activity_feed(
+        ListActivityFeedParams(
+            userid=user.id,
+            before_cooked_at=before_cooked_at,
+            before_recipe_id=before_recipe_id,
+            recentcookslimit=limit,
+            recentcooksoffset=offset,
+            includeown=who == "both",
+        )
+    )
+
+    return [ListRecentRecipeCooksRow(**c.model_dump()) async for c in feed]
+
+
+MAX_MOST_COOKED_LIMIT = 50
+
+
+class MostCookedRecipe(BaseModel):
+    recipe_id: UUID
+    name: str
+    cook_count: int
+    last_cooked_at: datetime
 
-    if who == "both":
-        user_ids.append(user.id)
 
-    cooks = activity.list_recent_recipe_cooks(
-        userids=user_ids, recentcookslimit=limit, recentcooksoffset=offset
+class CuisineCookCount(BaseModel):
+    cuisine: str
+    cook_count: int
+
+
+class CookingStats(BaseModel):
+    user_id: UUID
+    user_name: str
+    total_cooks: int
+    cooked_this_month: int
+    most_cooked: list[MostCookedRecipe]
+    cuisines: list[CuisineCookCount]
+
+
+@activity.get("/stats")
+async def get_cooking_stats(
+    conn: Connection,
+    user: User,
+    who: Literal["me", "friends", "both"] = "both",
+    most_cooked_limit: Annotated[int, Query(ge=1, le=MAX_MOST_COOKED_LIMIT)] = 5,
+) -> list[CookingStats]:
+    activity = ActivityQuerier(conn)
+    users = UserQuerier(conn)
+
+    user_ids = (
+        [] if who == "me" else list(await get_friend_ids(db=users, user_id=user.id))
     )
 
-    return [c async for c in cooks]
+    if who != "friends":
+        user_ids.insert(0, user.id)
+
+    most_cooked = defaultdict[UUID, list[MostCookedRecipe]](list)
+    async for r in activity.list_most_cooked_recipes(
+        userids=user_ids, recipelimit=most_cooked_limit
+    ):
+        most_cooked[r.user_id].append(
+            MostCookedRecipe(
+                recipe_id=r.recipe_id,
+                name=r.recipe_name,
+                cook_count=r.cook_count,
+                last_cooked_at=r.last_cooked_at,
+            )
+        )
+
+    cuisines = defaultdict[UUID, list[CuisineCookCount]](list)
+    async for c in activity.list_cuisine_cook_counts(userids=user_ids):
+        cuisines[c.user_id].append(
+            CuisineCookCount(cuisine=c.cuisine, cook_count=c.cook_count)
+        )
+
+    totals = {
+        t.user_id: t
+        async for t in activity.list_cooking_totals(
+            month=datetime.now(UTC).date().replace(day=1), userids=user_ids
+        )
+    }
+
+    return [
+        CookingStats(
+            user_id=user_id,
+            user_name=totals[user_id].user_name,
+            total_cooks=totals[user_id].total_cooks,
+            cooked_this_month=totals[user_id].cooked_this_month,
+            most_cooked=most_cooked[user_id],
+            cuisines=cuisines[user_id],
+        )
+        for user_id in user_ids
+        if user_id in totals
+    ]
@@ -0,0 +1,17 @@
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+from src.dependencies import User
+from src.services.events import subscribe
+
+events = APIRouter(prefix="/events")
+
+
+@events.get("")
+async def stream_events(user: User) -> StreamingResponse:
+    ## new activity items and share requests, as server-sent events
+    return StreamingResponse(
+        subscribe(user_id=user.id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
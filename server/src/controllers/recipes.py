@@ -1,26 +1,45 @@
-from datetime import UTC, datetime
-from typing import Literal
+import re
+from collections.abc import AsyncGenerator
+from typing import Annotated, Literal
 from uuid import UUID
 
-from fastapi import APIRouter, Form, HTTPException, UploadFile
-from pydantic import BaseModel
+import anthropic
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Form,
+    HTTPException,
+    Query,
+    Response,
+    UploadFile,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter
 
 from src.crud.models import DietaryRestriction, Meal, RecipeType
 from src.crud.models import Recipe as DbRecipe
 from src.crud.recipes import (
     AsyncQuerier,
-    ListRecipeFilterOptionsRow,
+    CreateRecipeIngredientsParams,
+    ListRecipeSearchFacetCountsParams,
     ListRecipesParams,
     UpdateRecipeParams,
 )
-from src.crud.sharing import AsyncQuerier as Sharing
-from src.dependencies import Connection, User
+from src.crud.users import AsyncQuerier as UserQuerier
+from src.dependencies import Connection, User, create_db_connection
 from src.logger import get_logger
 from src.parsing import (
+    ExtractionRetry,
+    PartialRecipe,
+    RecipeExtractionUpdate,
     extract_recipe_markdown_from_url,
+    image_recipe_prompt,
     image_to_recipe,
+    markdown_recipe_prompt,
     markdown_to_recipe,
+    stream_recipe_extraction,
 )
+from src.responses import to_json_response
 from src.schemas import (
     CookbookRecipeLocation,
     CreateMadeUpRecipeLocation,
@@ -32,122 +51,66 @@ from src.schemas import (
     RecipeInstruction,
     RecipeLocation,
 )
-from src.services.recipe import ingest_recipe, populate_recipe_data
+from src.services.archive import export_recipe_archive, import_recipe_archive
+from src.services.friends import get_friend_ids
+from src.services.idempotency import Idempotent
+from src.services.images import prepare_recipe_images
+from src.services.ingredients import (
+    canonicalize_ingredient_names,
+    normalize_ingredient_name,
+)
+from src.services.recipe import (
+    RecipeFilterOptions,
+    get_recipe_filter_options,
+    ingest_recipe,
+    invalidate_recipe_filter_options,
+    populate_recipe_data,
+    populate_recipe_data_in_chunks,
+)
+from src.services.seasonality import update_recipe_seasonality, user_seasonal_region
+from src.settings import settings
 
 recipes = APIRouter(prefix="/recipes")
 logger = get_logger(__name__)
 
-ingredient_to_peak_months = {
-    "apples": [8, 9, 10, 11, 12, 1, 2, 3],
-    "arugula": [4, 5, 6, 9, 10, 11],
-    "asparagus": [4, 5],
-    "basil": [6, 7, 8, 9],
-    "beans": [7, 8, 9],
-    "beets": [1, 2, 3, 4, 6, 7, 8, 9, 10, 11, 12],
-    "blackberries": [7, 8],
-    "blueberries": [7, 8, 9],
-    "bok_choy": [4, 5, 9, 10, 11],
-    "broccoli": [5, 6, 9, 10, 11],
-    "brussels": [4, 5, 9, 10, 11],
-    "brussels_sprouts": [9, 10, 11, 12, 1],
-    "butternut_squash": [9, 10, 11, 12, 1, 2],
-    "cabbage": [1, 2, 6, 7, 8, 9, 10, 11, 12],
-    "carrots": [1, 2, 3, 4, 6, 7, 8, 9, 10, 11, 12],
-    "cauliflower": [6, 7, 8, 9, 10, 11],
-    "celeriac": [10, 11, 12, 1, 2],
-    "celery": [7, 8, 9, 10],
-    "chard": [5, 6, 7, 8, 9, 10, 11],
-    "chives": [4, 5, 6, 7, 8, 9, 10],
-    "cilantro": [5, 6, 7, 8, 9, 10],
-    "collard_greens": [1, 2, 6, 7, 8, 9, 10, 11, 12],
-    "corn": [7, 8, 9],
-    "cranberries": [10, 11],
-    "cucumber": [7, 8, 9],
-    "currants": [7],
-    "dill": [6, 7, 8, 9],
-    "eggplant": [7, 8, 9],
-    "endive": [9, 10, 11],
-    "escarole": [9, 10, 11],
-    "fennel": [8, 9, 10, 11],
-    "figs": [8, 9],
-    "garlic": [7, 8, 9],
-    "garlic_scapes": [6],
-    "gooseberries": [7],
-    "green_beans": [7, 8, 9],
-    "herbs": [5, 6, 7, 8, 9, 10],
-    "jerusalem_artichokes": [10, 11, 12, 1],
-    "kale": [1, 2, 3, 4, 5, 6, 9, 10, 11, 12],
-    "kohlrabi": [6, 7, 8, 9, 10],
-    "leeks": [8, 9, 10, 11, 12, 1, 2],
-    "lettuce": [5, 6, 7, 8, 9, 10],
-    "maple_syrup": [3, 4],
-    "mesclun": [4, 5, 6, 9, 10],
-    "mint": [6, 7, 8, 9],
-    "mushrooms": [9, 10, 11],
-    "mustard_greens": [4, 5, 9, 10, 11],
-    "okra": [8, 9],
-    "onions": [1, 2, 3, 7, 8, 9, 10, 11, 12],
-    "oregano": [6, 7, 8, 9],
-    "parsley": [5, 6, 7, 8, 9, 10, 11],
-    "parsnips": [1, 2, 3, 4, 10, 11, 12],
-    "peaches": [8, 9],
-    "pears": [9, 10, 11],
-    "peas": [5, 6],
-    "peppers": [7, 8, 9, 10],
-    "plums": [8, 9],
-    "potatoes": [1, 2, 3, 7, 8, 9, 10, 11, 12],
-    "pumpkins": [9, 10, 11],
-    "radishes": [4, 5, 6, 9, 10, 11],
-    "ramps": [4, 5],
-    "raspberries": [7, 8],
-    "rhubarb": [5, 6, 7],
-    "rosemary": [6, 7, 8, 9, 10, 11],
-    "rutabaga": [10, 11, 12, 1, 2],
-    "sage": [6, 7, 8, 9, 10, 11],
-    "scallions": [4, 5, 6, 7, 8, 9, 10],
-    "shallots": [7, 8, 9],
-    "snap_peas": [5, 6, 7],
-    "spinach": [4, 5, 6, 9, 10, 11],
-    "strawberries": [6, 7],
-    "summer_squash": [6, 7, 8, 9],
-    "sweet_corn": [7, 8, 9],
-    "sweet_potatoes": [9, 10, 11, 12],
-    "swiss_chard": [5, 6, 7, 8, 9, 10, 11],
-    "tatsoi": [4, 5, 9, 10, 11],
-    "thyme": [6, 7, 8, 9, 10],
-    "tomatoes": [7, 8, 9, 10],
-    "turnips": [1, 2, 3, 4, 6, 7, 8, 9, 10, 11, 12],
-    "watercress": [4, 5, 6, 9, 10],
-    "winter_squash": [1, 2, 9, 10, 11, 12],
-    "zucchini": [6, 7, 8, 9],
-}
+recipe_adapter = TypeAdapter(Recipe)
+recipe_list_adapter = TypeAdapter(list[Recipe])
 
-month_to_ingredients = {
-    month: [
-        ingredient.replace("_", " ")
-        for ingredient, peak_months in ingredient_to_peak_months.items()
-        if month in peak_months
-    ]
-    for month in range(1, 13)
-}
+STREAM_CHUNK_SIZE = 100
 
 
 def recipe_row_to_recipe(user_id: UUID, recipe: DbRecipe) -> DbRecipe:
-    return DbRecipe(
-        id=recipe.id,
-        user_id=recipe.user_id,
-        name=recipe.name,
-        author=recipe.author,
-        cuisine=recipe.cuisine,
-        location=recipe.location,
-        time_estimate_minutes=recipe.time_estimate_minutes,
-        notes=recipe.notes if user_id == recipe.user_id else None,
-        last_made_at=recipe.last_made_at if user_id == recipe.user_id else None,
-        created_at=recipe.created_at,
-        updated_at=recipe.updated_at,
-        type=recipe.type,
-        meal=recipe.meal,
-        parent_recipe_id=recipe.parent_recipe_id,
+    if user_id == recipe.user_id:
+        return recipe
+
+    return recipe.model_copy(update={"notes": None, "last_made_at": None})
+
+
+def list_recipes_params(
+    user_id: UUID,
+    search: str | None,
+    only_user: bool,
+    seasonal_region: str,
+    cuisine: str | None = None,
+    meal: Meal | None = None,
+    type: RecipeType | None = None,
+    tag: str | None = None,
+    dietary_restriction: DietaryRestriction | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+) -> ListRecipesParams:
+    return ListRecipesParams(
+        userid=user_id,
+        onlyuser=only_user,
+        search=get_recipe_search_query(search) if search else None,
+        seasonalregion=seasonal_region,
+        cuisine=cuisine,
+        meal=meal,
+        type=type,
+        tag=tag,
+        dietary_restriction=dietary_restriction,
+        recipe_limit=limit,
+        recipeoffset=offset,
     )
 
 
@@ -155,22 +118,27 @@ async def list_recipes_from_db(
     user_id: UUID,
     search: str | None,
     only_user: bool,
+    seasonal_region: str,
     db: AsyncQuerier,
     cuisine: str | None = None,
     meal: Meal | None = None,
     type: RecipeType | None = None,
+    tag: str | None = None,
+    dietary_restriction: DietaryRestriction | None = None,
 ) -> list[Recipe]:
     recipes = [
         recipe_row_to_recipe(user_id, r)
         async for r in db.list_recipes(
-            arg=ListRecipesParams(
-                userid=user_id,
-                onlyuser=only_user,
+            arg=list_recipes_params(
+                user_id=user_id,
                 search=search,
-                seasonalingredients=get_seasonal_search_query(),
+                only_user=only_user,
+                seasonal_region=seasonal_region,
                 cuisine=cuisine,
                 meal=meal,
                 type=type,
+                tag=tag,
+                dietary_restriction=dietary_restriction,
             ),
         )
     ]
@@ -178,7 +146,27 @@ async def list_recipes_from_db(
     return await populate_recipe_data(db=db, recipes=recipes)
 
 
-@recipes.get("")
+async def stream_recipes_ndjson(
+    user_id: UUID,
+    params: ListRecipesParams,
+) -> AsyncGenerator[bytes]:
+    ## the request's connection is released before the body is sent, so the
+    ## stream holds its own connection (and server-side cursor) while it runs
+    async with create_db_connection() as conn, conn.begin():
+        db = AsyncQuerier(conn)
+        rows = (recipe_row_to_recipe(user_id, r) async for r in db.list_recipes(params))
+
+        async for chunk in populate_recipe_data_in_chunks(
+            db=db,
+            recipes=rows,
+            chunk_size=STREAM_CHUNK_SIZE,
+        ):
+            yield b"".join(
+                recipe.model_dump_json().encode() + b"\n" for recipe in chunk
+            )
+
+
+@recipes.get("", response_model=list[Recipe])
 async def list_recipes(
     user: User,
     conn: Connection,
@@ -186,60 +174,281 @@ async def list_recipes(
     cuisine: str | None = None,
     meal: Meal | None = None,
     type: RecipeType | None = None,
+    tag: str | None = None,
+    dietary_restriction: DietaryRestriction | None = None,
     only_user: bool = False,
-) -> list[Recipe]:
+) -> list[Recipe] | Response:
     db = AsyncQuerier(conn)
-    return await list_recipes_from_db(
+    result = await list_recipes_from_db(
         user_id=user.id,
         only_user=only_user,
+        seasonal_region=user_seasonal_region(user),
         db=db,
         search=search,
         cuisine=cuisine,
         meal=meal,
         type=type,
+        tag=tag,
+        dietary_restriction=dietary_restriction,
     )
 
+    if settings.fast_json_responses:
+        return to_json_response(recipe_list_adapter, result)
 
-def get_seasonal_search_query() -> str:
-    month = datetime.now(UTC).month
+    return result
 
-    seasonal_ingredients = month_to_ingredients[month]
 
-    return " OR ".join([f"name:{ingredient}" for ingredient in seasonal_ingredients])
+@recipes.get("/stream")
+async def stream_recipes(
+    user: User,
+    search: str | None = None,
+    cuisine: str | None = None,
+    meal: Meal | None = None,
+    type: RecipeType | None = None,
+    tag: str | None = None,
+    dietary_restriction: DietaryRestriction | None = None,
+    only_user: bool = False,
+) -> StreamingResponse:
+    params = list_recipes_params(
+        user_id=user.id,
+        search=search,
+        only_user=only_user,
+        seasonal_region=user_seasonal_region(user),
+        cuisine=cuisine,
+        meal=meal,
+        type=type,
+        tag=tag,
+        dietary_restriction=dietary_restriction,
+    )
+
+    return StreamingResponse(
+        stream_recipes_ndjson(user_id=user.id, params=params),
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+class RecipeFacets(BaseModel):
+    cuisines: dict[str, int]
+    meals: dict[Meal, int]
+    types: dict[RecipeType, int]
+    tags: dict[str, int]
+    dietary_restrictions: dict[DietaryRestriction, int]
 
 
-class RecipeFilterOptions(BaseModel):
-    meals: list[Meal]
-    types: list[RecipeType]
-    cuisines: list[str]
+class FacetedRecipes(BaseModel):
+    recipes: list[Recipe]
+    total: int
+    facets: RecipeFacets
+
+
+MAX_FACETED_RECIPES_LIMIT = 100
+
+FACET_TO_FIELD = {
+    "cuisine": "cuisines",
+    "meal": "meals",
+    "type": "types",
+    "tag": "tags",
+    "dietary_restriction": "dietary_restrictions",
+}
+
+
+@recipes.get("/faceted")
+async def list_recipes_faceted(
+    user: User,
+    conn: Connection,
+    search: str | None = None,
+    cuisine: str | None = None,
+    meal: Meal | None = None,
+    type: RecipeType | None = None,
+    tag: str | None = None,
+    dietary_restriction: DietaryRestriction | None = None,
+    only_user: bool = False,
+    limit: Annotated[int, Query(ge=1, le=MAX_FACETED_RECIPES_LIMIT)] = 50,
+    offset: Annotated[int, Query(ge=0)] = 0,
+) -> FacetedRecipes:
+    db = AsyncQuerier(conn)
+    params = list_recipes_params(
+        user_id=user.id,
+        search=search,
+        only_user=only_user,
+        seasonal_region=user_seasonal_region(user),
+        cuisine=cuisine,
+        meal=meal,
+        type=type,
+        tag=tag,
+        dietary_restriction=dietary_restriction,
+        limit=limit,
+        offset=offset,
+    )
+
+    page = [recipe_row_to_recipe(user.id, r) async for r in db.list_recipes(params)]
+
+    total = 0
+    facets: dict[str, dict[str, int]] = {field: {} for field in FACET_TO_FIELD.values()}
+    async for facet in db.list_recipe_search_facet_counts(
+        ListRecipeSearchFacetCountsParams(
+            **params.model_dump(
+                exclude={"seasonalregion", "recipe_limit", "recipeoffset"}
+            )
+        )
+    ):
+        if facet.facet == "total":
+            total = facet.recipe_count
+        else:
+            facets[FACET_TO_FIELD[facet.facet]][facet.value] = facet.recipe_count
+
+    return FacetedRecipes(
+        recipes=await populate_recipe_data(db=db, recipes=page),
+        total=total,
+        facets=RecipeFacets.model_validate(facets),
+    )
+
+
+class PantryMatch(BaseModel):
+    recipe: Recipe
+    matched_ingredient_count: int
+    ingredient_count: int
+    missing_ingredients: list[str]
+
+
+@recipes.get("/pantry")
+async def list_pantry_matches(
+    conn: Connection,
+    user: User,
+    ingredients: Annotated[list[str], Query(min_length=1, max_length=100)],
+    who: Literal["me", "friends", "both"] = "me",
+    limit: Annotated[int, Query(ge=1, le=100)] = 20,
+) -> list[PantryMatch]:
+    canonical_names = {
+        name for i in ingredients if (name := normalize_ingredient_name(i))
+    }
+    if not canonical_names:
+        raise HTTPException(status_code=400, detail="No ingredients to match")
+
+    user_ids = (
+        []
+        if who == "me"
+        else list(await get_friend_ids(db=UserQuerier(conn), user_id=user.id))
+    )
+
+    if who != "friends":
+        user_ids.insert(0, user.id)
+
+    db = AsyncQuerier(conn)
+    matches = [
+        m
+        async for m in db.list_pantry_matches(
+            canonicalnames=list(canonical_names),
+            userids=user_ids,
+            recipelimit=limit,
+        )
+    ]
+
+    recipes = await populate_recipe_data(
+        db=db,
+        recipes=[
+            recipe_row_to_recipe(user.id, DbRecipe.model_validate(m.model_dump()))
+            for m in matches
+        ],
+    )
+
+    return [
+        PantryMatch(
+            recipe=recipe,
+            matched_ingredient_count=m.matched_ingredient_count,
+            ingredient_count=m.ingredient_count,
+            missing_ingredients=m.missing_ingredients,
+        )
+        for recipe, m in zip(recipes, matches, strict=True)
+    ]
+
+
+@recipes.get("/export")
+async def export_recipes(user: User) -> StreamingResponse:
+    return StreamingResponse(
+        export_recipe_archive(user_id=user.id),
+        media_type="application/gzip",
+        headers={
+            "Content-Disposition": 'attachment; filename="recipebox.ndjson.gz"',
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
+class RecipeImportResult(BaseModel):
+    imported: int
+
+
+@recipes.post("/import")
+async def import_recipes(user: User, file: UploadFile) -> RecipeImportResult:
+    imported = await import_recipe_archive(user_id=user.id, file=file.file)
+
+    return RecipeImportResult(imported=imported)
+
+
+## every term has to match somewhere in the search document, with hits on
+## the name ranked above tags, ingredients and cuisine, and those above the
+## author and notes
+RECIPE_SEARCH_FIELD_BOOSTS = {
+    "name": 3,
+    "tags": 2,
+    "ingredients": 2,
+    "dietary_restrictions": 2,
+    "cuisine": 2,
+    "author": 1,
+    "notes": 1,
+}
+
+
+def get_recipe_search_query(search: str) -> str | None:
+    terms = re.findall(r"\w+", search.lower())
+
+    if not terms:
+        return None
+
+    return " ".join(
+        "+("
+        + " ".join(
+            f"{field}:{term}^{boost}"
+            for field, boost in RECIPE_SEARCH_FIELD_BOOSTS.items()
+        )
+        + ")"
+        for term in terms
+    )
 
 
 @recipes.get("/filter-options")
 async def list_filter_options(
     conn: Connection,
     user: User,
-) -> ListRecipeFilterOptionsRow | None:
+) -> RecipeFilterOptions:
     db = AsyncQuerier(conn)
-    return await db.list_recipe_filter_options(userid=user.id)
+    return await get_recipe_filter_options(db=db, user_id=user.id)
 
 
-@recipes.get("/{id}")
+@recipes.get("/{id}", response_model=Recipe)
 async def get_recipe(
     conn: Connection,
     user: User,
     id: UUID,
-) -> Recipe:
+) -> Recipe | Response:
     db = AsyncQuerier(conn)
     recipe = await db.get_recipe(recipeid=id)
 
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
-    return await populate_recipe_data(
+    result = await populate_recipe_data(
         db=db,
         recipes=recipe_row_to_recipe(user.id, recipe),
     )
 
+    if settings.fast_json_responses:
+        return to_json_response(recipe_adapter, result)
+
+    return result
+
 
 class RecipePatch(BaseModel):
     name: str | None = None
@@ -263,6 +472,7 @@ async def update_recipe(
     user: User,
     id: UUID,
     body: RecipePatch,
+    background_tasks: BackgroundTasks,
 ) -> Recipe | None:
     db = AsyncQuerier(conn)
     recipe = await db.update_recipe(
@@ -282,6 +492,8 @@ async def update_recipe(
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
+    background_tasks.add_task(invalidate_recipe_filter_options, recipe.user_id)
+
     if body.tags:
         await db.delete_recipe_tags_by_recipe_id(recipeid=id)
         [_ async for _ in db.create_recipe_tags(recipeid=id, tags=body.tags)]
@@ -299,16 +511,27 @@ async def update_recipe(
     if body.ingredients:
         await db.delete_recipe_ingredients_by_recipe_id(recipeid=id)
 
+        canonical_names = await canonicalize_ingredient_names(
+            db=db, names=[ingredient.name for ingredient in body.ingredients]
+        )
+
         [
             _
             async for _ in db.create_recipe_ingredients(
-                recipeid=id,
-                names=[ingredient.name for ingredient in body.ingredients],
-                quantities=[ingredient.quantity for ingredient in body.ingredients],
-                units=[ingredient.units for ingredient in body.ingredients],
+                CreateRecipeIngredientsParams(
+                    recipeid=id,
+                    names=[ingredient.name for ingredient in body.ingredients],
+                    quantities=[ingredient.quantity for ingredient in body.ingredients],
+                    units=[ingredient.units for ingredient in body.ingredients],
+                    canonicalnames=canonical_names,
+                )
             )
         ]
 
+        await update_recipe_seasonality(
+            db=db, recipe_id_to_canonical_names={id: canonical_names}
+        )
+
     if body.instructions:
         await db.delete_recipe_instructions_by_recipe_id(recipeid=id)
 
@@ -321,6 +544,8 @@ async def update_recipe(
             )
         ]
 
+    await db.refresh_recipe_search_documents(recipeids=[id])
+
     return await populate_recipe_data(
         db=db,
         recipes=recipe,
@@ -329,7 +554,10 @@ async def update_recipe(
 
 @recipes.post("/made-up")
 async def create_made_up_recipe(
-    params: CreateMadeUpRecipeLocation, user: User, conn: Connection
+    params: CreateMadeUpRecipeLocation,
+    user: User,
+    conn: Connection,
+    background_tasks: BackgroundTasks,
 ) -> Recipe | None:
     db = AsyncQuerier(conn)
     md = f"""
@@ -363,6 +591,7 @@ async def create_made_up_recipe(
         raise HTTPException(status_code=400, detail="Could not parse recipe from input")
 
     location = RecipeLocation(location=MadeUpRecipeLocation(location="made_up"))
+    background_tasks.add_task(invalidate_recipe_filter_options, user.id)
 
     return await ingest_recipe(
         db=db,
@@ -378,6 +607,7 @@ async def create_made_up_recipe(
 async def create_cookbook_recipe(
     user: User,
     conn: Connection,
+    background_tasks: BackgroundTasks,
     files: list[UploadFile],
     location: Literal["cookbook"] = Form("cookbook"),
     author: str = Form(...),
@@ -387,9 +617,9 @@ async def create_cookbook_recipe(
 ) -> Recipe | None:
     db = AsyncQuerier(conn)
 
-    image_bytes = [await file.read() for file in files]
+    images = await prepare_recipe_images(files)
 
-    base = await image_to_recipe(image_bytes)
+    base = await image_to_recipe(images)
 
     if not base:
         raise HTTPException(status_code=400, detail="Could not parse recipe from image")
@@ -403,6 +633,7 @@ async def create_cookbook_recipe(
             page_number=page_number,
         )
     )
+    background_tasks.add_task(invalidate_recipe_filter_options, user.id)
 
     return await ingest_recipe(
         db=db,
@@ -416,7 +647,10 @@ async def create_cookbook_recipe(
 
 @recipes.post("/online")
 async def create_online_recipe(
-    params: CreateOnlineRecipeLocation, user: User, conn: Connection
+    params: CreateOnlineRecipeLocation,
+    user: User,
+    conn: Connection,
+    background_tasks: BackgroundTasks,
 ) -> Recipe | None:
     db = AsyncQuerier(conn)
     md = await extract_recipe_markdown_from_url(params.url)
@@ -431,6 +665,7 @@ async def create_online_recipe(
             url=params.url,
         )
     )
+    background_tasks.add_task(invalidate_recipe_filter_options, user.id)
 
     return await ingest_recipe(
         db=db,
@@ -442,57 +677,185 @@ async def create_online_recipe(
     )
 
 
+class RecipeImportEvent(BaseModel):
+    type: Literal["partial", "reset", "recipe", "error"]
+    partial: PartialRecipe | None = None
+    recipe: Recipe | None = None
+    detail: str | None = None
+
+
+def _import_event_line(event: RecipeImportEvent) -> bytes:
+    return event.model_dump_json(exclude_none=True).encode() + b"\n"
+
+
+async def stream_recipe_import_ndjson(
+    user: User,
+    updates: AsyncGenerator[RecipeExtractionUpdate],
+    location: RecipeLocation,
+    notes: str | None,
+    author: str | None = None,
+) -> AsyncGenerator[bytes]:
+    ## partial recipes are sent as they're extracted, then the created recipe.
+    ## a reset means the partials so far should be discarded
+    recipe = None
+
+    try:
+        async for update in updates:
+            if isinstance(update, PartialRecipe):
+                yield _import_event_line(
+                    RecipeImportEvent(type="partial", partial=update)
+                )
+            elif isinstance(update, ExtractionRetry):
+                yield _import_event_line(RecipeImportEvent(type="reset"))
+            else:
+                recipe = update
+    except anthropic.APIError as e:
+        ## the response has already started, so the failure is sent as the
+        ## stream's last event rather than as an error status
+        logger.warning("recipe extraction failed for %s: %s", user.id, e)
+        yield _import_event_line(
+            RecipeImportEvent(type="error", detail="Recipe extraction failed")
+        )
+        return
+
+    if not recipe:
+        yield _import_event_line(
+            RecipeImportEvent(type="error", detail="Could not parse recipe")
+        )
+        return
+
+    if author is not None:
+        recipe.author = author
+
+    try:
+        async with create_db_connection() as conn, conn.begin():
+            created = await ingest_recipe(
+                db=AsyncQuerier(conn),
+                user=user,
+                params=recipe,
+                notes=notes,
+                location=location,
+                parent_recipe_id=None,
+            )
+    except HTTPException as e:
+        yield _import_event_line(RecipeImportEvent(type="error", detail=e.detail))
+        return
+    except Exception:
+        ## as with extraction failures, the error has to go in the stream
+        logger.exception("saving an imported recipe failed for %s", user.id)
+        yield _import_event_line(
+            RecipeImportEvent(type="error", detail="Could not save recipe")
+        )
+        return
+
+    invalidate_recipe_filter_options(user.id)
+
+    yield _import_event_line(RecipeImportEvent(type="recipe", recipe=created))
+
+
+def _recipe_import_response(body: AsyncGenerator[bytes]) -> StreamingResponse:
+    return StreamingResponse(
+        body,
+        media_type="application/x-ndjson",
+        headers={"X-Accel-Buffering": "no"},
+    )
+
+
+@recipes.post("/cookbook/stream")
+async def stream_cookbook_recipe(
+    user: User,
+    files: list[UploadFile],
+    location: Literal["cookbook"] = Form("cookbook"),
+    author: str = Form(...),
+    cookbook_name: str = Form(...),
+    page_number: int = Form(...),
+    notes: str | None = Form(None),
+) -> StreamingResponse:
+    images = await prepare_recipe_images(files)
+
+    return _recipe_import_response(
+        stream_recipe_import_ndjson(
+            user=user,
+            updates=stream_recipe_extraction(image_recipe_prompt(images)),
+            location=RecipeLocation(
+                location=CookbookRecipeLocation(
+                    location=location,
+                    cookbook_name=cookbook_name,
+                    page_number=page_number,
+                )
+            ),
+            notes=notes,
+            author=author,
+        )
+    )
+
+
+@recipes.post("/online/stream")
+async def stream_online_recipe(
+    params: CreateOnlineRecipeLocation, user: User
+) -> StreamingResponse:
+    md = await extract_recipe_markdown_from_url(params.url)
+
+    return _recipe_import_response(
+        stream_recipe_import_ndjson(
+            user=user,
+            updates=stream_recipe_extraction(markdown_recipe_prompt(md)),
+            location=RecipeLocation(
+                location=OnlineRecipeLocation(location="online", url=params.url)
+            ),
+            notes=params.notes,
+        )
+    )
+
+
 @recipes.delete("/{id}")
-async def delete_recipe(conn: Connection, _: User, id: UUID) -> UUID:
+async def delete_recipe(
+    conn: Connection, user: User, id: UUID, background_tasks: BackgroundTasks
+) -> UUID:
     db = AsyncQuerier(conn)
 
-    await db.delete_recipe(recipeid=id)
+    if deleted := await db.delete_recipe(recipeid=id):
+        background_tasks.add_task(invalidate_recipe_filter_options, deleted.user_id)
 
     return id
 
 
+class ClonedRecipe(BaseModel):
+    id: UUID
+
+
 @recipes.post("/download/{recipe_id}")
 async def accept_recipe_share_request(
     conn: Connection,
     user: User,
     recipe_id: UUID,
-) -> Recipe | None:
-    sharing = Sharing(conn)
-    recipes = AsyncQuerier(conn)
+    idempotency: Idempotent,
+    background_tasks: BackgroundTasks,
+    hydrate: bool = True,
+) -> Recipe | ClonedRecipe:
+    ## a retried download returns the first copy instead of making another
+    if replay := await idempotency.replay():
+        if not hydrate:
+            return ClonedRecipe.model_validate(replay.response)
+
+        return Recipe.model_validate(replay.response)
 
-    recipe = await recipes.get_recipe(recipeid=recipe_id)
+    db = AsyncQuerier(conn)
+
+    ## copies the recipe and its children and clears any pending share
+    ## request for it, all in one statement
+    recipe = await db.clone_recipe(userid=user.id, recipeid=recipe_id)
 
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
 
-    dietary_restrictions = recipes.list_recipe_dietary_restrictions_met(
-        recipeids=[recipe.id]
-    )
-    instructions = recipes.list_recipe_instructions(recipeids=[recipe.id])
-    ingredients = recipes.list_recipe_ingredients(recipeids=[recipe.id])
-    tags = recipes.list_recipe_tags(recipeids=[recipe.id])
-    db_recipe = Recipe.from_db(
-        recipe=recipe,
-        ingredients=[i async for i in ingredients],
-        dietary_restrictions_met=[
-            d.dietary_restriction async for d in dietary_restrictions
-        ],
-        instructions=[i async for i in instructions],
-        tags=[t.tag async for t in tags],
-    )
-
-    ingest_result = await ingest_recipe(
-        db=recipes,
-        user=user,
-        params=db_recipe,
-        location=RecipeLocation.model_validate(recipe.location),
-        notes=None,
-        parent_recipe_id=recipe.id,
-    )
+    background_tasks.add_task(invalidate_recipe_filter_options, user.id)
 
-    await sharing.delete_sharing_request(
-        recipeid=recipe_id,
-        touserid=user.id,
+    cloned = (
+        await populate_recipe_data(db=db, recipes=recipe)
+        if hydrate
+        else ClonedRecipe(id=recipe.id)
     )
+    await idempotency.save(cloned)
 
-    return ingest_result
+    return cloned
@@ -1,15 +1,17 @@
 from datetime import UTC, datetime, timedelta
+from typing import Literal
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from src.crud.events import AsyncQuerier as EventQuerier
 from src.crud.models import RecipeShareRequest
-from src.crud.recipes import AsyncQuerier as Recipes
+from src.crud.notifications import AsyncQuerier as NotificationQuerier
 from src.crud.sharing import AsyncQuerier as Sharing
-from src.crud.sharing import ListPendingRecipeShareRequestsRow
-from src.crud.users import AsyncQuerier as Users
+from src.crud.sharing import ListPendingRecipeShareRequestsRow, ShareRecipesRow
 from src.dependencies import Connection, User
+from src.services.idempotency import Idempotent
 
 sharing = APIRouter(prefix="/sharing")
 
@@ -25,6 +27,83 @@ async def list_pending_recipe_share_requests(
     return [r async for r in requests]
 
 
+SHARE_REQUEST_TTL = timedelta(days=7)
+MAX_BATCH_SHARE_SIZE = 100
+
+
+class ShareRecipesBody(BaseModel):
+    recipe_ids: list[UUID] = Field(min_length=1, max_length=MAX_BATCH_SHARE_SIZE)
+    to_user_ids: list[UUID] = Field(min_length=1, max_length=MAX_BATCH_SHARE_SIZE)
+
+
+class ShareResult(BaseModel):
+    recipe_id: UUID
+    to_user_id: UUID
+    status: Literal[
+        "shared", "already_pending", "recipe_not_found", "recipient_not_found"
+    ]
+    expires_at: datetime | None
+
+
+async def share_recipes_with_users(
+    conn: Connection,
+    sharer_id: UUID,
+    recipe_ids: list[UUID],
+    to_user_ids: list[UUID],
+) -> list[ShareRecipesRow]:
+    sharing = Sharing(conn)
+
+    results = [
+        r
+        async for r in sharing.share_recipes(
+            recipeids=recipe_ids,
+            touserids=to_user_ids,
+            expiresat=datetime.now(UTC) + SHARE_REQUEST_TTL,
+            sharerid=sharer_id,
+        )
+    ]
+
+    shared = [r for r in results if r.status == "shared"]
+    if shared:
+        await NotificationQuerier(conn).enqueue_recipe_share_notifications(
+            recipeids=[r.recipe_id for r in shared],
+            touserids=[r.to_user_id for r in shared],
+            sharerid=sharer_id,
+        )
+        await EventQuerier(conn).notify_recipe_share_requests(
+            recipeids=[r.recipe_id for r in shared],
+            touserids=[r.to_user_id for r in shared],
+            sharerid=sharer_id,
+        )
+
+    return results
+
+
+@sharing.post("/batch")
+async def share_recipes(
+    conn: Connection,
+    user: User,
+    body: ShareRecipesBody,
+    idempotency: Idempotent,
+) -> list[ShareResult]:
+    if replay := await idempotency.replay():
+        return [ShareResult.model_validate(r) for r in replay.response]
+
+    ## every recipe is shared with every recipient, one result per pair; recipes
+    ## the user doesn't own come back as recipe_not_found
+    results = await share_recipes_with_users(
+        conn=conn,
+        sharer_id=user.id,
+        recipe_ids=body.recipe_ids,
+        to_user_ids=body.to_user_ids,
+    )
+
+    shared = [ShareResult.model_validate(r.model_dump()) for r in results]
+    await idempotency.save(shared)
+
+    return shared
+
+
 class ShareRecipeBody(BaseModel):
     recipe_id: UUID
     to_user_id: UUID
@@ -36,33 +115,20 @@ async def share_recipe(
     user: User,
     body: ShareRecipeBody,
 ) -> RecipeShareRequest | None:
-    recipes = Recipes(conn)
-    sharing = Sharing(conn)
-    users = Users(conn)
-
-    recipient = await users.find_user_by_id(userid=body.to_user_id)
-
-    if not recipient:
-        raise HTTPException(status_code=400, detail="recipient or owner not found")
-
-    request = await sharing.get_inbound_share_request(
-        recipeid=body.recipe_id,
-        touserid=body.to_user_id,
+    [result] = await share_recipes_with_users(
+        conn=conn,
+        sharer_id=user.id,
+        recipe_ids=[body.recipe_id],
+        to_user_ids=[body.to_user_id],
     )
 
-    recipe = await recipes.get_recipe(recipeid=body.recipe_id)
+    if result.status == "recipient_not_found":
+        raise HTTPException(status_code=400, detail="recipient or owner not found")
 
-    if not recipe:
+    if result.status == "recipe_not_found":
         raise HTTPException(status_code=404, detail="Recipe not found")
 
-    if not request:
-        request = await sharing.create_recipe_share_request(
-            recipeid=recipe.id,
-            touserid=body.to_user_id,
-            expiresat=datetime.now(UTC) + timedelta(days=7),
-        )
-
-    return request
+    return RecipeShareRequest.model_validate(result.model_dump())
 
 
 @sharing.delete("/{recipe_id}")
@@ -1,16 +1,31 @@
+from typing import Annotated
 from uuid import UUID
 
-from fastapi import APIRouter
+from fastapi import APIRouter, BackgroundTasks, HTTPException, Query
 from pydantic import BaseModel
 
+from src.crud.activity import AsyncQuerier as ActivityQuerier
 from src.crud.models import Friendship
-from src.crud.users import AsyncQuerier
+from src.crud.notifications import AsyncQuerier as NotificationQuerier
+from src.crud.users import AsyncQuerier, SearchUsersTypeaheadParams
 from src.dependencies import Connection
 from src.dependencies import User as UserDependency
+from src.pagination import decode_cursor, encode_cursor
 from src.schemas import User
+from src.services.friends import (
+    FriendSuggestion,
+    invalidate_friend_ids,
+    suggest_friends,
+)
+from src.services.seasonality import SEASONAL_REGIONS
+from src.settings import settings
 
 users = APIRouter(prefix="/users")
 
+TYPEAHEAD_MIN_QUERY_LENGTH = 2
+TYPEAHEAD_MAX_LIMIT = 50
+MAX_FRIEND_SUGGESTIONS = 100
+
 
 @users.get("")
 async def get_user(
@@ -19,6 +34,38 @@ async def get_user(
     return user
 
 
+@users.get("/seasonal-regions")
+async def list_seasonal_regions() -> list[str]:
+    return SEASONAL_REGIONS
+
+
+class SeasonalRegionBody(BaseModel):
+    ## null goes back to the server's default region
+    seasonal_region: str | None
+
+
+@users.put("/seasonal-region")
+async def set_seasonal_region(
+    conn: Connection,
+    user: UserDependency,
+    body: SeasonalRegionBody,
+) -> UserDependency:
+    if (
+        body.seasonal_region is not None
+        and body.seasonal_region not in SEASONAL_REGIONS
+    ):
+        raise HTTPException(status_code=400, detail="Unknown seasonal region")
+
+    updated = await AsyncQuerier(conn).set_seasonal_region(
+        seasonal_region=body.seasonal_region, userid=user.id
+    )
+
+    if not updated:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return updated
+
+
 @users.get("/search")
 async def register(
     conn: Connection,
@@ -36,6 +83,67 @@ async def register(
     return [User(id=user.id, name=user.name) async for user in users]
 
 
+class TypeaheadCursor(BaseModel):
+    distance: float
+    id: UUID
+
+
+class TypeaheadPage(BaseModel):
+    users: list[User]
+    next_cursor: str | None
+
+
+def normalize_typeahead_query(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+
+@users.get("/typeahead")
+async def typeahead(
+    conn: Connection,
+    user: UserDependency,
+    query: Annotated[str, Query(min_length=TYPEAHEAD_MIN_QUERY_LENGTH)],
+    limit: Annotated[int, Query(ge=1, le=TYPEAHEAD_MAX_LIMIT)] = 20,
+    cursor: str | None = None,
+) -> TypeaheadPage:
+    query = normalize_typeahead_query(query)
+
+    if len(query) < TYPEAHEAD_MIN_QUERY_LENGTH:
+        return TypeaheadPage(users=[], next_cursor=None)
+
+    ## distances are >= 0, so -1 sorts before every match on the first page
+    after = (
+        decode_cursor(TypeaheadCursor, cursor)
+        if cursor
+        else TypeaheadCursor(distance=-1, id=UUID(int=0))
+    )
+
+    querier = AsyncQuerier(conn)
+    rows = [
+        row
+        async for row in querier.search_users_typeahead(
+            SearchUsersTypeaheadParams(
+                query=query,
+                userid=user.id,
+                afterdistance=after.distance,
+                afterid=after.id,
+                userlimit=limit + 1,
+            )
+        )
+    ]
+
+    page = rows[:limit]
+    next_cursor = (
+        encode_cursor(TypeaheadCursor(distance=page[-1].distance, id=page[-1].id))
+        if len(rows) > limit
+        else None
+    )
+
+    return TypeaheadPage(
+        users=[User(id=row.id, name=row.name) for row in page],
+        next_cursor=next_cursor,
+    )
+
+
 class FriendRequestBody(BaseModel):
     friend_user_id: UUID
 
@@ -45,27 +153,61 @@ async def send_friend_request(
     conn: Connection,
     user: UserDependency,
     body: FriendRequestBody,
+    background_tasks: BackgroundTasks,
 ) -> Friendship | None:
     querier = AsyncQuerier(conn)
 
-    return await querier.create_friend_request(
+    ## a repeated request returns the existing friendship without failing
+    request = await querier.create_friend_request(
         userid=user.id,
         frienduserid=body.friend_user_id,
     )
 
+    if not request:
+        return None
+
+    if request.created:
+        ## after the commit, so a concurrent read can't cache the old friends
+        background_tasks.add_task(invalidate_friend_ids, user.id, body.friend_user_id)
+        await NotificationQuerier(conn).enqueue_friend_request_notification(
+            userid=user.id, frienduserid=body.friend_user_id
+        )
+
+    return Friendship.model_validate(request.model_dump())
+
 
 @users.post("/friend-request/{request_from_user_id}/accept")
 async def accept_friend_request(
     conn: Connection,
     user: UserDependency,
     request_from_user_id: UUID,
+    background_tasks: BackgroundTasks,
 ) -> Friendship | None:
     querier = AsyncQuerier(conn)
 
-    return await querier.accept_friend_request(
+    friendship = await querier.accept_friend_request(
         userid=user.id, requestfromuserid=request_from_user_id
     )
 
+    if not friendship:
+        return None
+
+    ## accepting again returns the friendship without backfilling twice
+    if friendship.accepted:
+        background_tasks.add_task(invalidate_friend_ids, user.id, request_from_user_id)
+        activity = ActivityQuerier(conn)
+        await activity.backfill_activity_feed(
+            userid=user.id,
+            frienduserid=request_from_user_id,
+            feedcap=settings.activity_feed_cap,
+        )
+        await activity.trim_activity_feeds_for_users(
+            feedcap=settings.activity_feed_cap,
+            feeduserids=[user.id, request_from_user_id],
+        )
+
+    return Friendship.model_validate(friendship.model_dump())
+
 
 @users.get("/friends")
 async def list_friends(
@@ -80,6 +222,15 @@ async def list_friends(
     return [User(id=friend.id, name=friend.name) async for friend in friends]
 
 
+@users.get("/friend-suggestions")
+async def list_friend_suggestions(
+    conn: Connection,
+    user: UserDependency,
+    limit: Annotated[int, Query(ge=1, le=MAX_FRIEND_SUGGESTIONS)] = 20,
+) -> list[FriendSuggestion]:
+    return await suggest_friends(db=AsyncQuerier(conn), user_id=user.id, limit=limit)
+
+
 @users.get("/friend-requests")
 async def list_friend_requests(
     conn: Connection,
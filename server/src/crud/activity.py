@@ -13,14 +13,198 @@ import sqlalchemy.ext.asyncio
 
 from src.crud import models
 
-LIST_RECENT_RECIPE_COOKS = """-- name: list_recent_recipe_cooks \\:many
-WITH recipes_cooked AS (
+BACKFILL_ACTIVITY_FEED = """-- name: backfill_activity_feed \\:exec
+INSERT INTO activity_feed_item (feed_user_id, actor_user_id, recipe_id, cooked_at)
+SELECT pair.feed_user_id, l.user_id, l.recipe_id, l.cooked_at
+FROM (
+    VALUES
+        (:p1\\:\\:UUID, :p2\\:\\:UUID),
+        (:p2\\:\\:UUID, :p1\\:\\:UUID)
+) AS pair (feed_user_id, actor_user_id)
+CROSS JOIN LATERAL (
     SELECT user_id, recipe_id, cooked_at
     FROM recipe_cooking_log
-    WHERE user_id = ANY(:p1\\:\\:UUID[])
+    WHERE user_id = pair.actor_user_id
     ORDER BY cooked_at DESC
     LIMIT :p3\\:\\:INT
-    OFFSET :p2\\:\\:INT
+) l
+ON CONFLICT DO NOTHING
+"""
+
+
+ENSURE_RECIPE_COOKING_LOG_PARTITIONS = """-- name: ensure_recipe_cooking_log_partitions \\:exec
+SELECT ensure_recipe_cooking_log_partitions(:p1\\:\\:DATE, :p2\\:\\:DATE)
+"""
+
+
+LIST_ACTIVITY_FEED = """-- name: list_activity_feed \\:many
+WITH recipes_cooked AS (
+    (
+        SELECT recipe_id, cooked_at
+        FROM activity_feed_item
+        WHERE
+            feed_user_id = :p1\\:\\:UUID
+            AND (cooked_at, recipe_id) < (
+                COALESCE(:p2\\:\\:TIMESTAMPTZ, 'infinity'),
+                COALESCE(:p3\\:\\:UUID, 'ffffffff-ffff-ffff-ffff-ffffffffffff')
+            )
+        ORDER BY cooked_at DESC, recipe_id DESC
+        LIMIT :p4\\:\\:INT + :p5\\:\\:INT
+    )
+    UNION ALL
+    (
+        SELECT recipe_id, cooked_at
+        FROM recipe_cooking_log
+        WHERE
+            :p6\\:\\:BOOLEAN
+            AND user_id = :p1\\:\\:UUID
+            AND (cooked_at, recipe_id) < (
+                COALESCE(:p2\\:\\:TIMESTAMPTZ, 'infinity'),
+                COALESCE(:p3\\:\\:UUID, 'ffffffff-ffff-ffff-ffff-ffffffffffff')
+            )
+        ORDER BY cooked_at DESC, recipe_id DESC
+        LIMIT :p4\\:\\:INT + :p5\\:\\:INT
+    )
+    ORDER BY cooked_at DESC, recipe_id DESC
+    LIMIT :p4\\:\\:INT
+    OFFSET :p5\\:\\:INT
+)
+
+SELECT
+    r.id, r.user_id, r.name, r.author, r.cuisine, r.location, r.time_estimate_minutes, r.notes, r.last_made_at, r.created_at, r.updated_at, r.type, r.meal, r.parent_recipe_id,
+    rc.cooked_at,
+    u.name AS user_name
+FROM recipes_cooked rc
+JOIN recipe r ON r.id = rc.recipe_id
+JOIN "user" u ON (u.id = r.user_id)
+ORDER BY rc.cooked_at DESC, rc.recipe_id DESC
+"""
+
+
+class ListActivityFeedParams(pydantic.BaseModel):
+    userid: uuid.UUID
+    before_cooked_at: datetime.datetime | None
+    before_recipe_id: uuid.UUID | None
+    recentcookslimit: int
+    recentcooksoffset: int
+    includeown: bool
+
+
+class ListActivityFeedRow(pydantic.BaseModel):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    name: str
+    author: str
+    cuisine: str
+    location: Any
+    time_estimate_minutes: int
+    notes: str | None
+    last_made_at: datetime.datetime | None
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    type: models.RecipeType
+    meal: models.Meal
+    parent_recipe_id: uuid.UUID | None
+    cooked_at: datetime.datetime
+    user_name: str
+
+
+LIST_COOKING_TOTALS = """-- name: list_cooking_totals \\:many
+SELECT
+    u.id AS user_id,
+    u.name AS user_name,
+    COALESCE(total.cook_count, 0)\\:\\:INT AS total_cooks,
+    COALESCE(this_month.cook_count, 0)\\:\\:INT AS cooked_this_month
+FROM "user" u
+LEFT JOIN LATERAL (
+    SELECT SUM(cook_count) AS cook_count
+    FROM recipe_cook_count
+    WHERE user_id = u.id
+) total ON TRUE
+LEFT JOIN LATERAL (
+    SELECT SUM(cook_count) AS cook_count
+    FROM recipe_monthly_cook_count
+    WHERE
+        user_id = u.id
+        AND month = :p1\\:\\:DATE
+) this_month ON TRUE
+WHERE u.id = ANY(:p2\\:\\:UUID[])
+"""
+
+
+class ListCookingTotalsRow(pydantic.BaseModel):
+    user_id: uuid.UUID
+    user_name: str
+    total_cooks: int
+    cooked_this_month: int
+
+
+LIST_CUISINE_COOK_COUNTS = """-- name: list_cuisine_cook_counts \\:many
+SELECT
+    c.user_id,
+    r.cuisine,
+    SUM(c.cook_count)\\:\\:INT AS cook_count
+FROM recipe_cook_count c
+JOIN recipe r ON r.id = c.recipe_id
+WHERE c.user_id = ANY(:p1\\:\\:UUID[])
+GROUP BY c.user_id, r.cuisine
+ORDER BY c.user_id, cook_count DESC, r.cuisine
+"""
+
+
+class ListCuisineCookCountsRow(pydantic.BaseModel):
+    user_id: uuid.UUID
+    cuisine: str
+    cook_count: int
+
+
+LIST_MOST_COOKED_RECIPES = """-- name: list_most_cooked_recipes \\:many
+SELECT
+    cook.user_id,
+    r.id AS recipe_id,
+    r.name AS recipe_name,
+    c.cook_count,
+    c.last_cooked_at
+FROM UNNEST(:p1\\:\\:UUID[]) AS cook(user_id)
+CROSS JOIN LATERAL (
+    SELECT recipe_id, cook_count, last_cooked_at
+    FROM recipe_cook_count
+    WHERE user_id = cook.user_id
+    ORDER BY cook_count DESC, recipe_id
+    LIMIT :p2\\:\\:INT
+) c
+JOIN recipe r ON r.id = c.recipe_id
+ORDER BY cook.user_id, c.cook_count DESC, c.recipe_id
+"""
+
+
+class ListMostCookedRecipesRow(pydantic.BaseModel):
+    user_id: uuid.UUID
+    recipe_id: uuid.UUID
+    recipe_name: str
+    cook_count: int
+    last_cooked_at: datetime.datetime
+
+
+LIST_RECENT_RECIPE_COOKS = """-- name: list_recent_recipe_cooks \\:many
+WITH recipes_cooked AS (
+    SELECT l.recipe_id, l.cooked_at
+    FROM UNNEST(:p1\\:\\:UUID[]) AS cook(user_id)
+    CROSS JOIN LATERAL (
+        SELECT recipe_id, cooked_at
+        FROM recipe_cooking_log
+        WHERE
+            user_id = cook.user_id
+            AND (cooked_at, recipe_id) < (
+                COALESCE(:p2\\:\\:TIMESTAMPTZ, 'infinity'),
+                COALESCE(:p3\\:\\:UUID, 'ffffffff-ffff-ffff-ffff-ffffffffffff')
+            )
+        ORDER BY cooked_at DESC, recipe_id DESC
+        LIMIT :p4\\:\\:INT + :p5\\:\\:INT
+    ) l
+    ORDER BY l.cooked_at DESC, l.recipe_id DESC
+    LIMIT :p4\\:\\:INT
+    OFFSET :p5\\:\\:INT
 )
 
 SELECT
@@ -30,10 +214,18 @@ SELECT
 FROM recipes_cooked rc
 JOIN recipe r ON r.id = rc.recipe_id
 JOIN "user" u ON (u.id = r.user_id)
-ORDER BY rc.cooked_at DESC
+ORDER BY rc.cooked_at DESC, rc.recipe_id DESC
 """
 
 
+class ListRecentRecipeCooksParams(pydantic.BaseModel):
+    userids: list[uuid.UUID]
+    before_cooked_at: datetime.datetime | None
+    before_recipe_id: uuid.UUID | None
+    recentcookslimit: int
+    recentcooksoffset: int
+
+
 class ListRecentRecipeCooksRow(pydantic.BaseModel):
     id: uuid.UUID
     user_id: uuid.UUID
@@ -54,24 +246,98 @@ class ListRecentRecipeCooksRow(pydantic.BaseModel):
 
 
 MARK_RECIPE_COOKED = """-- name: mark_recipe_cooked \\:one
-WITH new_log AS (
+WITH updated AS (
+    UPDATE recipe
+    SET
+        last_made_at = NOW(),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE
+        id = :p1\\:\\:UUID
+        AND user_id = :p2\\:\\:UUID
+    RETURNING id, user_id, name, author, cuisine, location, time_estimate_minutes, notes, last_made_at, created_at, updated_at, type, meal, parent_recipe_id
+), new_log AS (
+    -- every write below reads from the updated recipe, so nothing is logged,
+    -- counted or fanned out for a recipe the user doesn't own
     INSERT INTO recipe_cooking_log (recipe_id, user_id, cooked_at)
-    VALUES (
-        :p1\\:\\:UUID,
-        :p2\\:\\:UUID,
-        NOW()
-    )
+    SELECT id, user_id, last_made_at
+    FROM updated
     RETURNING user_id, recipe_id, cooked_at
+), fanned_out AS (
+    INSERT INTO activity_feed_item (feed_user_id, actor_user_id, recipe_id, cooked_at)
+    SELECT f.friend_user_id, nl.user_id, nl.recipe_id, nl.cooked_at
+    FROM new_log nl
+    JOIN friendship f ON f.user_id = nl.user_id
+    WHERE f.status = 'accepted'
+), counted AS (
+    INSERT INTO recipe_cook_count (user_id, recipe_id, cook_count, last_cooked_at)
+    SELECT user_id, recipe_id, 1, cooked_at
+    FROM new_log
+    ON CONFLICT (user_id, recipe_id) DO UPDATE
+    SET
+        cook_count = recipe_cook_count.cook_count + EXCLUDED.cook_count,
+        last_cooked_at = GREATEST(recipe_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)
+), counted_monthly AS (
+    INSERT INTO recipe_monthly_cook_count (user_id, recipe_id, month, cook_count, last_cooked_at)
+    SELECT user_id, recipe_id, date_trunc('month', cooked_at AT TIME ZONE 'UTC')\\:\\:DATE, 1, cooked_at
+    FROM new_log
+    ON CONFLICT (user_id, recipe_id, month) DO UPDATE
+    SET
+        cook_count = recipe_monthly_cook_count.cook_count + EXCLUDED.cook_count,
+        last_cooked_at = GREATEST(recipe_monthly_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)
 )
 
-UPDATE recipe
-SET
-    last_made_at = (SELECT cooked_at FROM new_log),
-    updated_at = CURRENT_TIMESTAMP
+SELECT id, user_id, name, author, cuisine, location, time_estimate_minutes, notes, last_made_at, created_at, updated_at, type, meal, parent_recipe_id
+FROM updated
+"""
+
+
+ROLLUP_RECIPE_COOKING_LOG = """-- name: rollup_recipe_cooking_log \\:exec
+SELECT rollup_recipe_cooking_log(:p1\\:\\:DATE)
+"""
+
+
+TRIM_ACTIVITY_FEEDS = """-- name: trim_activity_feeds \\:exec
+DELETE FROM activity_feed_item a
+USING (
+    SELECT
+        f.friend_user_id AS feed_user_id,
+        (
+            SELECT cooked_at
+            FROM activity_feed_item
+            WHERE feed_user_id = f.friend_user_id
+            ORDER BY cooked_at DESC
+            OFFSET :p1\\:\\:INT
+            LIMIT 1
+        ) AS cutoff
+    FROM friendship f
+    WHERE
+        f.user_id = :p2\\:\\:UUID
+        AND f.status = 'accepted'
+) feeds
 WHERE
-    id = :p1\\:\\:UUID
-    AND user_id = :p2\\:\\:UUID
-RETURNING id, user_id, name, author, cuisine, location, time_estimate_minutes, notes, last_made_at, created_at, updated_at, type, meal, parent_recipe_id
+    a.feed_user_id = feeds.feed_user_id
+    AND a.cooked_at <= feeds.cutoff
+"""
+
+
+TRIM_ACTIVITY_FEEDS_FOR_USERS = """-- name: trim_activity_feeds_for_users \\:exec
+DELETE FROM activity_feed_item a
+USING (
+    SELECT
+        feed.user_id AS feed_user_id,
+        (
+            SELECT cooked_at
+            FROM activity_feed_item
+            WHERE feed_user_id = feed.user_id
+            ORDER BY cooked_at DESC
+            OFFSET :p1\\:\\:INT
+            LIMIT 1
+        ) AS cutoff
+    FROM UNNEST(:p2\\:\\:UUID[]) AS feed(user_id)
+) feeds
+WHERE
+    a.feed_user_id = feeds.feed_user_id
+    AND a.cooked_at <= feeds.cutoff
 """
 
 
@@ -79,12 +345,111 @@ class AsyncQuerier:
     def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
         self._conn = conn
 
+    async def backfill_activity_feed(
+        self, *, userid: uuid.UUID, frienduserid: uuid.UUID, feedcap: int
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(BACKFILL_ACTIVITY_FEED),
+            {"p1": userid, "p2": frienduserid, "p3": feedcap},
+        )
+
+    async def ensure_recipe_cooking_log_partitions(
+        self, *, frommonth: datetime.date, tomonth: datetime.date
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(ENSURE_RECIPE_COOKING_LOG_PARTITIONS),
+            {"p1": frommonth, "p2": tomonth},
+        )
+
+    async def list_activity_feed(
+        self, arg: ListActivityFeedParams
+    ) -> AsyncIterator[ListActivityFeedRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_ACTIVITY_FEED),
+            {
+                "p1": arg.userid,
+                "p2": arg.before_cooked_at,
+                "p3": arg.before_recipe_id,
+                "p4": arg.recentcookslimit,
+                "p5": arg.recentcooksoffset,
+                "p6": arg.includeown,
+            },
+        )
+        async for row in result:
+            yield ListActivityFeedRow(
+                id=row[0],
+                user_id=row[1],
+                name=row[2],
+                author=row[3],
+                cuisine=row[4],
+                location=row[5],
+                time_estimate_minutes=row[6],
+                notes=row[7],
+                last_made_at=row[8],
+                created_at=row[9],
+                updated_at=row[10],
+                type=row[11],
+                meal=row[12],
+                parent_recipe_id=row[13],
+                cooked_at=row[14],
+                user_name=row[15],
+            )
+
+    async def list_cooking_totals(
+        self, *, month: datetime.date, userids: list[uuid.UUID]
+    ) -> AsyncIterator[ListCookingTotalsRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_COOKING_TOTALS), {"p1": month, "p2": userids}
+        )
+        async for row in result:
+            yield ListCookingTotalsRow(
+                user_id=row[0],
+                user_name=row[1],
+                total_cooks=row[2],
+                cooked_this_month=row[3],
+            )
+
+    async def list_cuisine_cook_counts(
+        self, *, userids: list[uuid.UUID]
+    ) -> AsyncIterator[ListCuisineCookCountsRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_CUISINE_COOK_COUNTS), {"p1": userids}
+        )
+        async for row in result:
+            yield ListCuisineCookCountsRow(
+                user_id=row[0],
+                cuisine=row[1],
+                cook_count=row[2],
+            )
+
+    async def list_most_cooked_recipes(
+        self, *, userids: list[uuid.UUID], recipelimit: int
+    ) -> AsyncIterator[ListMostCookedRecipesRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_MOST_COOKED_RECIPES),
+            {"p1": userids, "p2": recipelimit},
+        )
+        async for row in result:
+            yield ListMostCookedRecipesRow(
+                user_id=row[0],
+                recipe_id=row[1],
+                recipe_name=row[2],
+                cook_count=row[3],
+                last_cooked_at=row[4],
+            )
+
     async def list_recent_recipe_cooks(
-        self, *, userids: list[uuid.UUID], recentcooksoffset: int, recentcookslimit: int
+        self, arg: ListRecentRecipeCooksParams
     ) -> AsyncIterator[ListRecentRecipeCooksRow]:
         result = await self._conn.stream(
             sqlalchemy.text(LIST_RECENT_RECIPE_COOKS),
-            {"p1": userids, "p2": recentcooksoffset, "p3": recentcookslimit},
+            {
+                "p1": arg.userids,
+                "p2": arg.before_cooked_at,
+                "p3": arg.before_recipe_id,
+                "p4": arg.recentcookslimit,
+                "p5": arg.recentcooksoffset,
+            },
         )
         async for row in result:
             yield ListRecentRecipeCooksRow(
@@ -132,3 +497,24 @@ class AsyncQuerier:
             meal=row[12],
             parent_recipe_id=row[13],
         )
+
+    async def rollup_recipe_cooking_log(self, *, beforemonth: datetime.date) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(ROLLUP_RECIPE_COOKING_LOG), {"p1": beforemonth}
+        )
+
+    async def trim_activity_feeds(
+        self, *, feedcap: int, actoruserid: uuid.UUID
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(TRIM_ACTIVITY_FEEDS),
+            {"p1": feedcap, "p2": actoruserid},
+        )
+
+    async def trim_activity_feeds_for_users(
+        self, *, feedcap: int, feeduserids: list[uuid.UUID]
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(TRIM_ACTIVITY_FEEDS_FOR_USERS),
+            {"p1": feedcap, "p2": feeduserids},
+        )
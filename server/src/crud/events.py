@@ -0,0 +1,74 @@
+# Code generated by sqlc. DO NOT EDIT.
+# versions:
+#   sqlc v1.28.0
+# source: events.sql
+import uuid
+
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+
+NOTIFY_FRIEND_COOKED = """-- name: notify_friend_cooked \\:exec
+SELECT pg_notify(
+    'recipebox_events',
+    json_build_object(
+        'type', 'activity',
+        'user_id', f.friend_user_id,
+        'data', json_build_object(
+            'recipe_id', r.id,
+            'recipe_name', r.name,
+            'user_id', cook.id,
+            'user_name', cook.name,
+            'cooked_at', r.last_made_at
+        )
+    )\\:\\:TEXT
+)
+FROM recipe r
+JOIN "user" cook ON cook.id = r.user_id
+JOIN friendship f ON f.user_id = cook.id AND f.status = 'accepted'
+WHERE
+    r.id = :p1\\:\\:UUID
+    AND r.user_id = :p2\\:\\:UUID
+"""
+
+
+NOTIFY_RECIPE_SHARE_REQUESTS = """-- name: notify_recipe_share_requests \\:exec
+SELECT pg_notify(
+    'recipebox_events',
+    json_build_object(
+        'type', 'share_request',
+        'user_id', s.to_user_id,
+        'data', json_build_object(
+            'id', r.id,
+            'recipe_name', r.name,
+            'from_user_name', u.name
+        )
+    )\\:\\:TEXT
+)
+FROM UNNEST(:p1\\:\\:UUID[], :p2\\:\\:UUID[]) AS s(recipe_id, to_user_id)
+JOIN recipe r ON r.id = s.recipe_id
+JOIN "user" u ON u.id = :p3\\:\\:UUID
+"""
+
+
+class AsyncQuerier:
+    def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
+        self._conn = conn
+
+    async def notify_friend_cooked(
+        self, *, recipeid: uuid.UUID, userid: uuid.UUID
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(NOTIFY_FRIEND_COOKED), {"p1": recipeid, "p2": userid}
+        )
+
+    async def notify_recipe_share_requests(
+        self,
+        *,
+        recipeids: list[uuid.UUID],
+        touserids: list[uuid.UUID],
+        sharerid: uuid.UUID,
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(NOTIFY_RECIPE_SHARE_REQUESTS),
+            {"p1": recipeids, "p2": touserids, "p3": sharerid},
+        )
@@ -0,0 +1,100 @@
+# Code generated by sqlc. DO NOT EDIT.
+# versions:
+#   sqlc v1.28.0
+# source: idempotency.sql
+import uuid
+from typing import Any
+
+import pydantic
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+
+CLAIM_IDEMPOTENCY_KEY = """-- name: claim_idempotency_key \\:one
+WITH claimed AS (
+    INSERT INTO idempotency_key (user_id, key, request_path, request_body_hash)
+    VALUES (:p1\\:\\:UUID, :p2\\:\\:TEXT, :p3\\:\\:TEXT, :p4\\:\\:TEXT)
+    ON CONFLICT (user_id, key) DO NOTHING
+    RETURNING user_id, key, request_path, response, created_at, request_body_hash
+)
+
+-- no row means the key was claimed by a request that hasn't finished yet
+SELECT TRUE AS claimed, request_path, request_body_hash, response
+FROM claimed
+UNION ALL
+SELECT FALSE AS claimed, request_path, request_body_hash, response
+FROM idempotency_key
+WHERE user_id = :p1\\:\\:UUID
+  AND key = :p2\\:\\:TEXT
+"""
+
+
+class ClaimIdempotencyKeyRow(pydantic.BaseModel):
+    claimed: bool
+    request_path: str
+    request_body_hash: str | None
+    response: Any | None
+
+
+DELETE_EXPIRED_IDEMPOTENCY_KEYS = """-- name: delete_expired_idempotency_keys \\:execrows
+WITH expired AS (
+    SELECT user_id, key
+    FROM idempotency_key
+    WHERE created_at < NOW() - make_interval(secs => :p1\\:\\:FLOAT)
+    ORDER BY created_at
+    LIMIT :p2\\:\\:INT
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM idempotency_key ik
+USING expired e
+WHERE
+    ik.user_id = e.user_id
+    AND ik.key = e.key
+"""
+
+
+SET_IDEMPOTENCY_KEY_RESPONSE = """-- name: set_idempotency_key_response \\:exec
+UPDATE idempotency_key
+SET response = :p1\\:\\:JSONB
+WHERE user_id = :p2\\:\\:UUID
+  AND key = :p3\\:\\:TEXT
+"""
+
+
+class AsyncQuerier:
+    def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
+        self._conn = conn
+
+    async def claim_idempotency_key(
+        self, *, userid: uuid.UUID, key: str, requestpath: str, requestbodyhash: str
+    ) -> ClaimIdempotencyKeyRow | None:
+        row = (
+            await self._conn.execute(
+                sqlalchemy.text(CLAIM_IDEMPOTENCY_KEY),
+                {"p1": userid, "p2": key, "p3": requestpath, "p4": requestbodyhash},
+            )
+        ).first()
+        if row is None:
+            return None
+        return ClaimIdempotencyKeyRow(
+            claimed=row[0],
+            request_path=row[1],
+            request_body_hash=row[2],
+            response=row[3],
+        )
+
+    async def delete_expired_idempotency_keys(
+        self, *, ttlseconds: float, batchsize: int
+    ) -> int:
+        result = await self._conn.execute(
+            sqlalchemy.text(DELETE_EXPIRED_IDEMPOTENCY_KEYS),
+            {"p1": ttlseconds, "p2": batchsize},
+        )
+        return result.rowcount
+
+    async def set_idempotency_key_response(
+        self, *, response: Any, userid: uuid.UUID, key: str
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(SET_IDEMPOTENCY_KEY_RESPONSE),
+            {"p1": response, "p2": userid, "p3": key},
+        )
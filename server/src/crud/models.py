@@ -30,6 +30,12 @@ class Meal(str, enum.Enum):
     OTHER = "other"
 
 
+class NotificationStatus(str, enum.Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
 class PushPermissionStatus(str, enum.Enum):
     NONE = "none"
     ACCEPTED = "accepted"
@@ -52,6 +58,19 @@ class UserPrivacyPreference(str, enum.Enum):
     PRIVATE = "private"
 
 
+class ActivityFeedItem(pydantic.BaseModel):
+    feed_user_id: uuid.UUID
+    actor_user_id: uuid.UUID
+    recipe_id: uuid.UUID
+    cooked_at: datetime.datetime
+
+
+class CanonicalIngredient(pydantic.BaseModel):
+    id: int
+    name: str
+    created_at: datetime.datetime
+
+
 class Friendship(pydantic.BaseModel):
     user_id: uuid.UUID
     friend_user_id: uuid.UUID
@@ -60,6 +79,32 @@ class Friendship(pydantic.BaseModel):
     updated_at: datetime.datetime
 
 
+class IdempotencyKey(pydantic.BaseModel):
+    user_id: uuid.UUID
+    key: str
+    request_path: str
+    response: Any | None
+    created_at: datetime.datetime
+    request_body_hash: str | None
+
+
+class NotificationOutbox(pydantic.BaseModel):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    title: str
+    body: str
+    data: Any
+    status: NotificationStatus
+    attempts: int
+    next_attempt_at: datetime.datetime
+    expo_push_token: str | None
+    ticket_id: str | None
+    last_error: str | None
+    sent_at: datetime.datetime | None
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+
+
 class Recipe(pydantic.BaseModel):
     id: uuid.UUID
     user_id: uuid.UUID
@@ -77,6 +122,13 @@ class Recipe(pydantic.BaseModel):
     parent_recipe_id: uuid.UUID | None
 
 
+class RecipeCookCount(pydantic.BaseModel):
+    user_id: uuid.UUID
+    recipe_id: uuid.UUID
+    cook_count: int
+    last_cooked_at: datetime.datetime
+
+
 class RecipeCookingLog(pydantic.BaseModel):
     user_id: uuid.UUID
     recipe_id: uuid.UUID
@@ -97,6 +149,8 @@ class RecipeIngredient(pydantic.BaseModel):
     units: str
     created_at: datetime.datetime
     updated_at: datetime.datetime
+    canonical_ingredient_id: int | None
+    canonicalized_at: datetime.datetime | None
 
 
 class RecipeInstruction(pydantic.BaseModel):
@@ -108,6 +162,31 @@ class RecipeInstruction(pydantic.BaseModel):
     updated_at: datetime.datetime
 
 
+class RecipeMonthlyCookCount(pydantic.BaseModel):
+    user_id: uuid.UUID
+    recipe_id: uuid.UUID
+    month: datetime.date
+    cook_count: int
+    last_cooked_at: datetime.datetime
+
+
+class RecipeSeasonality(pydantic.BaseModel):
+    recipe_id: uuid.UUID
+    region: str
+    peak_months: int
+
+
+class RecipeSearchDocument(pydantic.BaseModel):
+    recipe_id: uuid.UUID
+    name: str
+    author: str
+    cuisine: str
+    notes: str
+    tags: str
+    ingredients: str
+    dietary_restrictions: str
+
+
 class RecipeShareRequest(pydantic.BaseModel):
     to_user_id: uuid.UUID
     recipe_id: uuid.UUID
@@ -134,6 +213,7 @@ class User(pydantic.BaseModel):
     privacy_preference: UserPrivacyPreference
     expo_push_token: str | None
     push_permission: PushPermissionStatus
+    seasonal_region: str | None
 
 
 class UserPassword(pydantic.BaseModel):
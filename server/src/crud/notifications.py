@@ -0,0 +1,262 @@
+# Code generated by sqlc. DO NOT EDIT.
+# versions:
+#   sqlc v1.28.0
+# source: notifications.sql
+import uuid
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pydantic
+import sqlalchemy
+import sqlalchemy.ext.asyncio
+
+CLAIM_DUE_NOTIFICATIONS = """-- name: claim_due_notifications \\:many
+WITH due AS (
+    SELECT id
+    FROM notification_outbox
+    WHERE
+        status = 'pending'
+        AND next_attempt_at <= NOW()
+    ORDER BY next_attempt_at
+    LIMIT :p1\\:\\:INT
+    FOR UPDATE SKIP LOCKED
+)
+UPDATE notification_outbox n
+SET
+    -- claimed rows are pushed back by an exponential backoff up front, so a
+    -- notification whose delivery is never recorded is retried later
+    attempts = n.attempts + 1,
+    next_attempt_at = NOW() + make_interval(secs => :p2\\:\\:FLOAT * 2 ^ n.attempts),
+    expo_push_token = u.expo_push_token,
+    updated_at = NOW()
+FROM due d, "user" u
+WHERE
+    n.id = d.id
+    AND u.id = n.user_id
+RETURNING n.id, n.expo_push_token, n.title, n.body, n.data, n.attempts
+"""
+
+
+class ClaimDueNotificationsRow(pydantic.BaseModel):
+    id: uuid.UUID
+    expo_push_token: str | None
+    title: str
+    body: str
+    data: Any
+    attempts: int
+
+
+CLEAR_EXPO_PUSH_TOKENS = """-- name: clear_expo_push_tokens \\:exec
+UPDATE "user"
+SET
+    expo_push_token = NULL,
+    -- reset along with the token, per check_push_token_set_if_permission_accepted
+    push_permission = 'none',
+    updated_at = NOW()
+WHERE expo_push_token = ANY(:p1\\:\\:TEXT[])
+"""
+
+DELETE_NOTIFICATIONS = """-- name: delete_notifications \\:exec
+DELETE FROM notification_outbox
+WHERE id = ANY(:p1\\:\\:UUID[])
+"""
+
+DELETE_STALE_NOTIFICATIONS = """-- name: delete_stale_notifications \\:execrows
+WITH stale AS (
+    SELECT id
+    FROM notification_outbox
+    WHERE
+        -- Expo keeps receipts for a day, so a sent row whose receipt never
+        -- showed up is dropped after that; failed rows are kept for a week
+        (status = 'sent' AND sent_at < NOW() - INTERVAL '1 day')
+        OR (status = 'failed' AND updated_at < NOW() - INTERVAL '7 days')
+    LIMIT :p1\\:\\:INT
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM notification_outbox n
+USING stale s
+WHERE n.id = s.id
+"""
+
+ENQUEUE_FRIEND_COOKED_NOTIFICATIONS = """-- name: enqueue_friend_cooked_notifications \\:exec
+INSERT INTO notification_outbox (user_id, title, body, data)
+SELECT
+    recipient.id,
+    cook.name || ' cooked something',
+    cook.name || ' made ' || r.name,
+    jsonb_build_object('type', 'friend_cooked', 'recipe_id', r.id, 'from_user_id', cook.id)
+FROM recipe r
+JOIN "user" cook ON cook.id = r.user_id
+JOIN friendship f ON f.user_id = cook.id AND f.status = 'accepted'
+JOIN "user" recipient ON recipient.id = f.friend_user_id
+WHERE
+    r.id = :p1\\:\\:UUID
+    AND r.user_id = :p2\\:\\:UUID
+    AND recipient.push_permission = 'accepted'
+"""
+
+ENQUEUE_FRIEND_REQUEST_NOTIFICATION = """-- name: enqueue_friend_request_notification \\:exec
+INSERT INTO notification_outbox (user_id, title, body, data)
+SELECT
+    recipient.id,
+    'New friend request',
+    sender.name || ' sent you a friend request',
+    jsonb_build_object('type', 'friend_request', 'from_user_id', sender.id)
+FROM "user" recipient
+JOIN "user" sender ON sender.id = :p1\\:\\:UUID
+WHERE
+    recipient.id = :p2\\:\\:UUID
+    AND recipient.push_permission = 'accepted'
+"""
+
+ENQUEUE_RECIPE_SHARE_NOTIFICATIONS = """-- name: enqueue_recipe_share_notifications \\:exec
+INSERT INTO notification_outbox (user_id, title, body, data)
+SELECT
+    recipient.id,
+    'New recipe shared with you',
+    sender.name || ' shared ' || r.name || ' with you',
+    jsonb_build_object('type', 'recipe_share', 'recipe_id', r.id, 'from_user_id', sender.id)
+FROM UNNEST(:p1\\:\\:UUID[], :p2\\:\\:UUID[]) AS s(recipe_id, to_user_id)
+JOIN recipe r ON r.id = s.recipe_id
+JOIN "user" sender ON sender.id = :p3\\:\\:UUID
+JOIN "user" recipient ON recipient.id = s.to_user_id
+WHERE recipient.push_permission = 'accepted'
+"""
+
+LIST_SENT_NOTIFICATIONS = """-- name: list_sent_notifications \\:many
+SELECT
+    id,
+    ticket_id,
+    expo_push_token
+FROM notification_outbox
+WHERE
+    status = 'sent'
+    AND sent_at <= NOW() - make_interval(secs => :p1\\:\\:FLOAT)
+ORDER BY sent_at
+LIMIT :p2\\:\\:INT
+"""
+
+
+class ListSentNotificationsRow(pydantic.BaseModel):
+    id: uuid.UUID
+    ticket_id: str | None
+    expo_push_token: str | None
+
+
+MARK_NOTIFICATIONS_SENT = """-- name: mark_notifications_sent \\:exec
+UPDATE notification_outbox n
+SET
+    status = 'sent',
+    ticket_id = t.ticket_id,
+    last_error = NULL,
+    sent_at = NOW(),
+    updated_at = NOW()
+FROM UNNEST(:p1\\:\\:UUID[], :p2\\:\\:TEXT[]) AS t(id, ticket_id)
+WHERE n.id = t.id
+"""
+
+RECORD_NOTIFICATION_ERRORS = """-- name: record_notification_errors \\:exec
+UPDATE notification_outbox n
+SET
+    -- rows that aren't failed stay as they are, to be retried or have their
+    -- receipt checked again
+    status = CASE WHEN e.failed THEN 'failed' ELSE n.status END,
+    last_error = e.error,
+    updated_at = NOW()
+FROM UNNEST(:p1\\:\\:UUID[], :p2\\:\\:TEXT[], :p3\\:\\:BOOLEAN[]) AS e(id, error, failed)
+WHERE n.id = e.id
+"""
+
+
+class AsyncQuerier:
+    def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
+        self._conn = conn
+
+    async def claim_due_notifications(
+        self, *, batchsize: int, backoffseconds: float
+    ) -> AsyncIterator[ClaimDueNotificationsRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(CLAIM_DUE_NOTIFICATIONS),
+            {"p1": batchsize, "p2": backoffseconds},
+        )
+        async for row in result:
+            yield ClaimDueNotificationsRow(
+                id=row[0],
+                expo_push_token=row[1],
+                title=row[2],
+                body=row[3],
+                data=row[4],
+                attempts=row[5],
+            )
+
+    async def clear_expo_push_tokens(self, *, tokens: list[str]) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(CLEAR_EXPO_PUSH_TOKENS), {"p1": tokens}
+        )
+
+    async def delete_notifications(self, *, ids: list[uuid.UUID]) -> None:
+        await self._conn.execute(sqlalchemy.text(DELETE_NOTIFICATIONS), {"p1": ids})
+
+    async def delete_stale_notifications(self, *, batchsize: int) -> int:
+        result = await self._conn.execute(
+            sqlalchemy.text(DELETE_STALE_NOTIFICATIONS), {"p1": batchsize}
+        )
+        return result.rowcount
+
+    async def enqueue_friend_cooked_notifications(
+        self, *, recipeid: uuid.UUID, userid: uuid.UUID
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(ENQUEUE_FRIEND_COOKED_NOTIFICATIONS),
+            {"p1": recipeid, "p2": userid},
+        )
+
+    async def enqueue_friend_request_notification(
+        self, *, userid: uuid.UUID, frienduserid: uuid.UUID
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(ENQUEUE_FRIEND_REQUEST_NOTIFICATION),
+            {"p1": userid, "p2": frienduserid},
+        )
+
+    async def enqueue_recipe_share_notifications(
+        self,
+        *,
+        recipeids: list[uuid.UUID],
+        touserids: list[uuid.UUID],
+        sharerid: uuid.UUID,
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(ENQUEUE_RECIPE_SHARE_NOTIFICATIONS),
+            {"p1": recipeids, "p2": touserids, "p3": sharerid},
+        )
+
+    async def list_sent_notifications(
+        self, *, receiptdelayseconds: float, batchsize: int
+    ) -> AsyncIterator[ListSentNotificationsRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_SENT_NOTIFICATIONS),
+            {"p1": receiptdelayseconds, "p2": batchsize},
+        )
+        async for row in result:
+            yield ListSentNotificationsRow(
+                id=row[0],
+                ticket_id=row[1],
+                expo_push_token=row[2],
+            )
+
+    async def mark_notifications_sent(
+        self, *, ids: list[uuid.UUID], ticketids: list[str]
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(MARK_NOTIFICATIONS_SENT),
+            {"p1": ids, "p2": ticketids},
+        )
+
+    async def record_notification_errors(
+        self, *, ids: list[uuid.UUID], errors: list[str], failed: list[bool]
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(RECORD_NOTIFICATION_ERRORS),
+            {"p1": ids, "p2": errors, "p3": failed},
+        )
@@ -2,6 +2,7 @@
 # versions:
 #   sqlc v1.28.0
 # source: recipes.sql
+import datetime
 import uuid
 from collections.abc import AsyncIterator
 from typing import Any
@@ -12,6 +13,94 @@ import sqlalchemy.ext.asyncio
 
 from src.crud import models
 
+CLONE_RECIPE = """-- name: clone_recipe \\:one
+WITH cloned AS (
+    INSERT INTO recipe (
+        user_id,
+        name,
+        author,
+        cuisine,
+        location,
+        time_estimate_minutes,
+        type,
+        meal,
+        parent_recipe_id
+    )
+    SELECT
+        :p1\\:\\:UUID,
+        name,
+        author,
+        cuisine,
+        location,
+        time_estimate_minutes,
+        type,
+        meal,
+        id
+    FROM recipe
+    WHERE id = :p2\\:\\:UUID
+    RETURNING id, user_id, name, author, cuisine, location, time_estimate_minutes, notes, last_made_at, created_at, updated_at, type, meal, parent_recipe_id
+), cloned_ingredients AS (
+    INSERT INTO recipe_ingredient (recipe_id, name, quantity, units, canonical_ingredient_id)
+    SELECT c.id, i.name, i.quantity, i.units, i.canonical_ingredient_id
+    FROM cloned c
+    JOIN recipe_ingredient i ON i.recipe_id = c.parent_recipe_id
+), cloned_instructions AS (
+    INSERT INTO recipe_instruction (recipe_id, step_number, content)
+    SELECT c.id, i.step_number, i.content
+    FROM cloned c
+    JOIN recipe_instruction i ON i.recipe_id = c.parent_recipe_id
+), cloned_tags AS (
+    INSERT INTO recipe_tag (recipe_id, tag)
+    SELECT c.id, t.tag
+    FROM cloned c
+    JOIN recipe_tag t ON t.recipe_id = c.parent_recipe_id
+), cloned_dietary_restrictions_met AS (
+    INSERT INTO recipe_dietary_restriction_met (recipe_id, dietary_restriction)
+    SELECT c.id, d.dietary_restriction
+    FROM cloned c
+    JOIN recipe_dietary_restriction_met d ON d.recipe_id = c.parent_recipe_id
+), cloned_search_document AS (
+    -- copies don't carry over the source's notes
+    INSERT INTO recipe_search_document (
+        recipe_id,
+        name,
+        author,
+        cuisine,
+        notes,
+        tags,
+        ingredients,
+        dietary_restrictions
+    )
+    SELECT c.id, d.name, d.author, d.cuisine, '', d.tags, d.ingredients, d.dietary_restrictions
+    FROM cloned c
+    JOIN recipe_search_document d ON d.recipe_id = c.parent_recipe_id
+), cloned_seasonality AS (
+    INSERT INTO recipe_seasonality (recipe_id, region, peak_months)
+    SELECT c.id, s.region, s.peak_months
+    FROM cloned c
+    JOIN recipe_seasonality s ON s.recipe_id = c.parent_recipe_id
+), accepted_share_request AS (
+    DELETE FROM recipe_share_request rsr
+    USING cloned c
+    WHERE
+        rsr.recipe_id = c.parent_recipe_id
+        AND rsr.to_user_id = c.user_id
+)
+SELECT id, user_id, name, author, cuisine, location, time_estimate_minutes, notes, last_made_at, created_at, updated_at, type, meal, parent_recipe_id
+FROM cloned
+"""
+
+
+CREATE_CANONICAL_INGREDIENTS = """-- name: create_canonical_ingredients \\:exec
+INSERT INTO canonical_ingredient (name)
+SELECT DISTINCT name
+FROM UNNEST(:p1\\:\\:TEXT[]) AS name
+WHERE name <> ''
+ORDER BY name
+ON CONFLICT (name) DO NOTHING
+"""
+
+
 CREATE_RECIPE = """-- name: create_recipe \\:one
 INSERT INTO recipe (
     user_id,
@@ -54,6 +143,70 @@ class CreateRecipeParams(pydantic.BaseModel):
     parent_recipe_id: uuid.UUID | None
 
 
+CREATE_RECIPE_COOKING_LOGS = """-- name: create_recipe_cooking_logs \\:exec
+WITH logs AS (
+    SELECT
+        UNNEST(:p1\\:\\:UUID[]) AS recipe_id,
+        UNNEST(:p2\\:\\:TIMESTAMPTZ[]) AS cooked_at
+), inserted AS (
+    INSERT INTO recipe_cooking_log (user_id, recipe_id, cooked_at)
+    SELECT
+        :p3\\:\\:UUID,
+        recipe_id,
+        cooked_at
+    FROM logs
+    ON CONFLICT DO NOTHING
+    RETURNING user_id, recipe_id, cooked_at
+), fanned_out AS (
+    INSERT INTO activity_feed_item (feed_user_id, actor_user_id, recipe_id, cooked_at)
+    SELECT f.friend_user_id, recent.user_id, recent.recipe_id, recent.cooked_at
+    FROM (
+        SELECT user_id, recipe_id, cooked_at
+        FROM inserted
+        ORDER BY cooked_at DESC
+        LIMIT :p4\\:\\:INT
+    ) recent
+    JOIN friendship f ON f.user_id = recent.user_id
+    WHERE f.status = 'accepted'
+    ON CONFLICT DO NOTHING
+), counted AS (
+    INSERT INTO recipe_cook_count (user_id, recipe_id, cook_count, last_cooked_at)
+    SELECT user_id, recipe_id, COUNT(*), MAX(cooked_at)
+    FROM inserted
+    GROUP BY user_id, recipe_id
+    ON CONFLICT (user_id, recipe_id) DO UPDATE
+    SET
+        cook_count = recipe_cook_count.cook_count + EXCLUDED.cook_count,
+        last_cooked_at = GREATEST(recipe_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)
+), counted_monthly AS (
+    INSERT INTO recipe_monthly_cook_count (user_id, recipe_id, month, cook_count, last_cooked_at)
+    SELECT
+        user_id,
+        recipe_id,
+        date_trunc('month', cooked_at AT TIME ZONE 'UTC')\\:\\:DATE,
+        COUNT(*),
+        MAX(cooked_at)
+    FROM inserted
+    GROUP BY 1, 2, 3
+    ON CONFLICT (user_id, recipe_id, month) DO UPDATE
+    SET
+        cook_count = recipe_monthly_cook_count.cook_count + EXCLUDED.cook_count,
+        last_cooked_at = GREATEST(recipe_monthly_cook_count.last_cooked_at, EXCLUDED.last_cooked_at)
+)
+
+UPDATE recipe r
+SET last_made_at = latest.cooked_at
+FROM (
+    SELECT recipe_id, MAX(cooked_at) AS cooked_at
+    FROM inserted
+    GROUP BY recipe_id
+) latest
+WHERE
+    r.id = latest.recipe_id
+    AND r.user_id = :p3\\:\\:UUID
+"""
+
+
 CREATE_RECIPE_DIETARY_RESTRICTIONS_MET = """-- name: create_recipe_dietary_restrictions_met \\:many
 WITH restrictions AS (
     SELECT UNNEST(:p2\\:\\:dietary_restriction[]) AS dietary_restriction
@@ -69,26 +222,84 @@ RETURNING id, recipe_id, dietary_restriction
 """
 
 
+CREATE_RECIPE_DIETARY_RESTRICTIONS_MET_FOR_RECIPES = """-- name: create_recipe_dietary_restrictions_met_for_recipes \\:exec
+WITH restrictions AS (
+    SELECT
+        UNNEST(:p1\\:\\:UUID[]) AS recipe_id,
+        UNNEST(:p2\\:\\:dietary_restriction[]) AS dietary_restriction
+)
+
+INSERT INTO recipe_dietary_restriction_met (recipe_id, dietary_restriction)
+SELECT
+    recipe_id,
+    dietary_restriction
+FROM restrictions
+ON CONFLICT DO NOTHING
+"""
+
+
 CREATE_RECIPE_INGREDIENTS = """-- name: create_recipe_ingredients \\:many
 WITH ingredients AS (
     SELECT
         UNNEST(:p2\\:\\:TEXT[]) AS name,
         UNNEST(:p3\\:\\:FLOAT8[]) AS quantity,
-        UNNEST(:p4\\:\\:TEXT[]) AS units
+        UNNEST(:p4\\:\\:TEXT[]) AS units,
+        UNNEST(:p5\\:\\:TEXT[]) AS canonical_name
 )
 
-INSERT INTO recipe_ingredient (recipe_id, name, quantity, units)
+INSERT INTO recipe_ingredient (recipe_id, name, quantity, units, canonical_ingredient_id)
 SELECT
     :p1\\:\\:UUID,
-    name,
-    quantity,
-    units
-FROM ingredients
+    i.name,
+    i.quantity,
+    i.units,
+    c.id
+FROM ingredients i
+LEFT JOIN canonical_ingredient c ON c.name = i.canonical_name
+ON CONFLICT DO NOTHING
+RETURNING id, recipe_id, name, quantity, units, created_at, updated_at, canonical_ingredient_id, canonicalized_at
+"""
+
+
+class CreateRecipeIngredientsParams(pydantic.BaseModel):
+    recipeid: uuid.UUID
+    names: list[str]
+    quantities: list[float]
+    units: list[str]
+    canonicalnames: list[str]
+
+
+CREATE_RECIPE_INGREDIENTS_FOR_RECIPES = """-- name: create_recipe_ingredients_for_recipes \\:exec
+WITH ingredients AS (
+    SELECT
+        UNNEST(:p1\\:\\:UUID[]) AS recipe_id,
+        UNNEST(:p2\\:\\:TEXT[]) AS name,
+        UNNEST(:p3\\:\\:FLOAT8[]) AS quantity,
+        UNNEST(:p4\\:\\:TEXT[]) AS units,
+        UNNEST(:p5\\:\\:TEXT[]) AS canonical_name
+)
+
+INSERT INTO recipe_ingredient (recipe_id, name, quantity, units, canonical_ingredient_id)
+SELECT
+    i.recipe_id,
+    i.name,
+    i.quantity,
+    i.units,
+    c.id
+FROM ingredients i
+LEFT JOIN canonical_ingredient c ON c.name = i.canonical_name
 ON CONFLICT DO NOTHING
-RETURNING id, recipe_id, name, quantity, units, created_at, updated_at
 """
 
 
+class CreateRecipeIngredientsForRecipesParams(pydantic.BaseModel):
+    recipeids: list[uuid.UUID]
+    names: list[str]
+    quantities: list[float]
+    units: list[str]
+    canonicalnames: list[str]
+
+
 CREATE_RECIPE_INSTRUCTIONS = """-- name: create_recipe_instructions \\:many
 WITH instructions AS (
     SELECT
@@ -107,6 +318,24 @@ RETURNING id, recipe_id, step_number, content, created_at, updated_at
 """
 
 
+CREATE_RECIPE_INSTRUCTIONS_FOR_RECIPES = """-- name: create_recipe_instructions_for_recipes \\:exec
+WITH instructions AS (
+    SELECT
+        UNNEST(:p1\\:\\:UUID[]) AS recipe_id,
+        UNNEST(:p2\\:\\:INT[]) AS step_number,
+        UNNEST(:p3\\:\\:TEXT[]) AS content
+)
+
+INSERT INTO recipe_instruction (recipe_id, step_number, content)
+SELECT
+    recipe_id,
+    step_number,
+    content
+FROM instructions
+ON CONFLICT DO NOTHING
+"""
+
+
 CREATE_RECIPE_TAGS = """-- name: create_recipe_tags \\:many
 WITH tags AS (
     SELECT UNNEST(:p2\\:\\:TEXT[]) AS tag
@@ -122,7 +351,84 @@ RETURNING id, recipe_id, tag
 """
 
 
-DELETE_RECIPE = """-- name: delete_recipe \\:exec
+CREATE_RECIPE_TAGS_FOR_RECIPES = """-- name: create_recipe_tags_for_recipes \\:exec
+WITH tags AS (
+    SELECT
+        UNNEST(:p1\\:\\:UUID[]) AS recipe_id,
+        UNNEST(:p2\\:\\:TEXT[]) AS tag
+)
+
+INSERT INTO recipe_tag (recipe_id, tag)
+SELECT
+    recipe_id,
+    tag
+FROM tags
+ON CONFLICT DO NOTHING
+"""
+
+
+CREATE_RECIPES = """-- name: create_recipes \\:many
+WITH new_recipes AS (
+    SELECT
+        UNNEST(:p1\\:\\:UUID[]) AS id,
+        UNNEST(:p2\\:\\:TEXT[]) AS name,
+        UNNEST(:p3\\:\\:TEXT[]) AS author,
+        UNNEST(:p4\\:\\:TEXT[]) AS cuisine,
+        UNNEST(:p5\\:\\:JSONB[]) AS location,
+        UNNEST(:p6\\:\\:INTEGER[]) AS time_estimate_minutes,
+        UNNEST(:p7\\:\\:TEXT[]) AS notes,
+        UNNEST(:p8\\:\\:recipe_type[]) AS type,
+        UNNEST(:p9\\:\\:meal[]) AS meal,
+        UNNEST(:p10\\:\\:UUID[]) AS parent_recipe_id
+)
+
+INSERT INTO recipe (
+    id,
+    user_id,
+    name,
+    author,
+    cuisine,
+    location,
+    time_estimate_minutes,
+    notes,
+    type,
+    meal,
+    parent_recipe_id
+)
+SELECT
+    nr.id,
+    :p11\\:\\:UUID,
+    nr.name,
+    nr.author,
+    nr.cuisine,
+    nr.location,
+    nr.time_estimate_minutes,
+    NULLIF(nr.notes, ''),
+    nr.type,
+    nr.meal,
+    -- only keep links to parents that still exist on this server
+    parent.id
+FROM new_recipes nr
+LEFT JOIN recipe parent ON parent.id = nr.parent_recipe_id
+RETURNING id, user_id, name, author, cuisine, location, time_estimate_minutes, notes, last_made_at, created_at, updated_at, type, meal, parent_recipe_id
+"""
+
+
+class CreateRecipesParams(pydantic.BaseModel):
+    ids: list[uuid.UUID]
+    names: list[str]
+    authors: list[str]
+    cuisines: list[str]
+    locations: list[Any]
+    timeestimateminutes: list[int]
+    notes: list[str]
+    types: list[models.RecipeType]
+    meals: list[models.Meal]
+    parentrecipeids: list[uuid.UUID]
+    userid: uuid.UUID
+
+
+DELETE_RECIPE = """-- name: delete_recipe \\:one
 DELETE FROM recipe
 WHERE id = :p1\\:\\:UUID
 RETURNING id, user_id, name, author, cuisine, location, time_estimate_minutes, notes, last_made_at, created_at, updated_at, type, meal, parent_recipe_id
@@ -162,6 +468,76 @@ WHERE
 """
 
 
+LIST_PANTRY_MATCHES = """-- name: list_pantry_matches \\:many
+WITH matched_ingredient AS (
+    SELECT
+        i.id,
+        i.recipe_id
+    FROM canonical_ingredient c
+    JOIN recipe_ingredient i ON i.canonical_ingredient_id = c.id
+    JOIN recipe r ON r.id = i.recipe_id
+    WHERE
+        c.name = ANY(:p1\\:\\:TEXT[])
+        AND r.user_id = ANY(:p2\\:\\:UUID[])
+), coverage AS (
+    SELECT
+        i.recipe_id,
+        COUNT(mi.id) AS matched_ingredient_count,
+        COUNT(*) AS ingredient_count,
+        COALESCE(
+            ARRAY_AGG(i.name ORDER BY i.name) FILTER (WHERE mi.id IS NULL),
+            '{}'
+        )\\:\\:TEXT[] AS missing_ingredients
+    FROM recipe_ingredient i
+    LEFT JOIN matched_ingredient mi ON mi.id = i.id
+    WHERE i.recipe_id IN (SELECT recipe_id FROM matched_ingredient)
+    GROUP BY i.recipe_id
+)
+SELECT
+    r.id, r.user_id, r.name, r.author, r.cuisine, r.location, r.time_estimate_minutes, r.notes, r.last_made_at, r.created_at, r.updated_at, r.type, r.meal, r.parent_recipe_id,
+    c.matched_ingredient_count,
+    c.ingredient_count,
+    c.missing_ingredients
+FROM coverage c
+JOIN recipe r ON r.id = c.recipe_id
+ORDER BY
+    c.matched_ingredient_count\\:\\:FLOAT / c.ingredient_count DESC,
+    c.matched_ingredient_count DESC,
+    r.id
+LIMIT :p3\\:\\:INT
+"""
+
+
+class ListPantryMatchesRow(pydantic.BaseModel):
+    id: uuid.UUID
+    user_id: uuid.UUID
+    name: str
+    author: str
+    cuisine: str
+    location: Any
+    time_estimate_minutes: int
+    notes: str | None
+    last_made_at: datetime.datetime | None
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    type: models.RecipeType
+    meal: models.Meal
+    parent_recipe_id: uuid.UUID | None
+    matched_ingredient_count: int
+    ingredient_count: int
+    missing_ingredients: list[str]
+
+
+LIST_RECIPE_COOKING_LOG = """-- name: list_recipe_cooking_log \\:many
+SELECT user_id, recipe_id, cooked_at
+FROM recipe_cooking_log
+WHERE
+    user_id = :p1\\:\\:UUID
+    AND recipe_id = ANY(:p2\\:\\:UUID[])
+ORDER BY cooked_at
+"""
+
+
 LIST_RECIPE_DIETARY_RESTRICTIONS_MET = """-- name: list_recipe_dietary_restrictions_met \\:many
 SELECT id, recipe_id, dietary_restriction
 FROM recipe_dietary_restriction_met
@@ -169,24 +545,30 @@ WHERE recipe_id = ANY(:p1\\:\\:UUID[])
 """
 
 
-LIST_RECIPE_FILTER_OPTIONS = """-- name: list_recipe_filter_options \\:one
+LIST_RECIPE_FACET_COUNTS = """-- name: list_recipe_facet_counts \\:many
 SELECT
-    ARRAY_AGG(DISTINCT meal)\\:\\:meal[] AS meals,
-    ARRAY_AGG(DISTINCT type)\\:\\:recipe_type[] AS types,
-    ARRAY_AGG(DISTINCT cuisine)\\:\\:TEXT[] AS cuisines
+    CASE
+        WHEN GROUPING(meal) = 0 THEN 'meal'
+        WHEN GROUPING(type) = 0 THEN 'type'
+        ELSE 'cuisine'
+    END\\:\\:TEXT AS facet,
+    COALESCE(meal\\:\\:TEXT, type\\:\\:TEXT, cuisine)\\:\\:TEXT AS value,
+    COUNT(*)\\:\\:INT AS recipe_count
 FROM recipe
 WHERE user_id = :p1\\:\\:UUID
+GROUP BY GROUPING SETS ((meal), (type), (cuisine))
+ORDER BY facet, recipe_count DESC, value
 """
 
 
-class ListRecipeFilterOptionsRow(pydantic.BaseModel):
-    meals: list[models.Meal]
-    types: list[models.RecipeType]
-    cuisines: list[str]
+class ListRecipeFacetCountsRow(pydantic.BaseModel):
+    facet: str
+    value: str
+    recipe_count: int
 
 
 LIST_RECIPE_INGREDIENTS = """-- name: list_recipe_ingredients \\:many
-SELECT id, recipe_id, name, quantity, units, created_at, updated_at
+SELECT id, recipe_id, name, quantity, units, created_at, updated_at, canonical_ingredient_id, canonicalized_at
 FROM recipe_ingredient
 WHERE recipe_id = ANY(:p1\\:\\:UUID[])
 """
@@ -200,6 +582,103 @@ ORDER BY step_number ASC
 """
 
 
+LIST_RECIPE_SEARCH_FACET_COUNTS = """-- name: list_recipe_search_facet_counts \\:many
+WITH matching AS (
+    SELECT r.id, r.cuisine, r.meal, r.type
+    FROM recipe r
+    WHERE
+        (
+            (
+                :p1\\:\\:BOOLEAN = FALSE
+                AND r.parent_recipe_id IS NULL
+                AND r.user_id != :p2\\:\\:UUID
+            )
+            OR (
+                :p1\\:\\:BOOLEAN
+                AND r.user_id = :p2\\:\\:UUID
+            )
+        )
+        AND (
+            :p3\\:\\:TEXT IS NULL
+            OR r.id IN (
+                SELECT recipe_id
+                FROM recipe_search_document
+                WHERE
+                    :p3\\:\\:TEXT IS NOT NULL
+                    AND recipe_id @@@ paradedb.parse(:p3\\:\\:TEXT, lenient => true)
+            )
+        )
+        AND (:p4\\:\\:TEXT IS NULL OR LOWER(r.cuisine) = LOWER(:p4\\:\\:TEXT))
+        AND (:p5\\:\\:meal IS NULL OR r.meal = :p5\\:\\:meal)
+        AND (:p6\\:\\:recipe_type IS NULL OR r.type = :p6\\:\\:recipe_type)
+        AND (
+            :p7\\:\\:TEXT IS NULL
+            OR EXISTS (
+                SELECT 1
+                FROM recipe_tag t
+                WHERE
+                    t.recipe_id = r.id
+                    AND t.tag = :p7\\:\\:TEXT
+            )
+        )
+        AND (
+            :p8\\:\\:dietary_restriction IS NULL
+            OR EXISTS (
+                SELECT 1
+                FROM recipe_dietary_restriction_met d
+                WHERE
+                    d.recipe_id = r.id
+                    AND d.dietary_restriction = :p8\\:\\:dietary_restriction
+            )
+        )
+)
+
+-- the total number of matching recipes, for paging
+SELECT 'total'\\:\\:TEXT AS facet, ''\\:\\:TEXT AS value, COUNT(*)\\:\\:INT AS recipe_count
+FROM matching
+UNION ALL
+SELECT 'cuisine', cuisine\\:\\:TEXT, COUNT(*)\\:\\:INT
+FROM matching
+GROUP BY cuisine
+UNION ALL
+SELECT 'meal', meal\\:\\:TEXT, COUNT(*)\\:\\:INT
+FROM matching
+GROUP BY meal
+UNION ALL
+SELECT 'type', type\\:\\:TEXT, COUNT(*)\\:\\:INT
+FROM matching
+GROUP BY type
+UNION ALL
+SELECT 'tag', t.tag, COUNT(*)\\:\\:INT
+FROM matching m
+JOIN recipe_tag t ON t.recipe_id = m.id
+GROUP BY t.tag
+UNION ALL
+SELECT 'dietary_restriction', d.dietary_restriction\\:\\:TEXT, COUNT(*)\\:\\:INT
+FROM matching m
+JOIN recipe_dietary_restriction_met d ON d.recipe_id = m.id
+GROUP BY d.dietary_restriction
+ORDER BY facet, recipe_count DESC, value
+"""
+
+
+class ListRecipeSearchFacetCountsParams(pydantic.BaseModel):
+    onlyuser: bool
+    userid: uuid.UUID
+    search: str | None
+    cuisine: str | None
+    meal: models.Meal | None
+    type: models.RecipeType | None
+    tag: str | None
+    dietary_restriction: models.DietaryRestriction | None
+
+
+class ListRecipeSearchFacetCountsRow(pydantic.BaseModel):
+    facet: str
+    value: str
+    recipe_count: int
+
+
 LIST_RECIPE_TAGS = """-- name: list_recipe_tags \\:many
 SELECT id, recipe_id, tag
 FROM recipe_tag
@@ -208,21 +687,22 @@ WHERE recipe_id = ANY(:p1\\:\\:UUID[])
 
 
 LIST_RECIPES = """-- name: list_recipes \\:many
-WITH ingredient_seasonality_score AS (
+WITH search_score AS (
     SELECT
-        i.recipe_id,
-        SUM(paradedb.score(i.id)) AS total_ingredient_score
-    FROM recipe_ingredient i
-    JOIN recipe r ON r.id = i.recipe_id
+        recipe_id,
+        paradedb.score(recipe_id) AS score
+    FROM recipe_search_document
     WHERE
-        i.id @@@ paradedb.parse(:p7\\:\\:TEXT, lenient => true)
-        AND r.user_id = :p2\\:\\:UUID
-    GROUP BY i.recipe_id
+        :p3\\:\\:TEXT IS NOT NULL
+        AND recipe_id @@@ paradedb.parse(:p3\\:\\:TEXT, lenient => true)
 )
 SELECT r.id, r.user_id, r.name, r.author, r.cuisine, r.location, r.time_estimate_minutes, r.notes, r.last_made_at, r.created_at, r.updated_at, r.type, r.meal, r.parent_recipe_id
 FROM recipe r
 JOIN "user" u ON u.id = r.user_id
-LEFT JOIN ingredient_seasonality_score iss ON r.id = iss.recipe_id
+LEFT JOIN recipe_seasonality rs
+    ON r.id = rs.recipe_id
+    AND rs.region = :p7\\:\\:TEXT
+LEFT JOIN search_score ss ON r.id = ss.recipe_id
 WHERE
     (
         (
@@ -238,14 +718,32 @@ WHERE
             AND r.user_id = :p2\\:\\:UUID
         )
     )
-    AND (
-        :p3\\:\\:TEXT IS NULL
-        OR r.id @@@ paradedb.parse(:p3\\:\\:TEXT, lenient => true)
-    )
+    AND (:p3\\:\\:TEXT IS NULL OR ss.recipe_id IS NOT NULL)
     AND (:p4\\:\\:TEXT IS NULL OR LOWER(r.cuisine) = LOWER(:p4\\:\\:TEXT))
     AND (:p5\\:\\:meal IS NULL OR r.meal = :p5\\:\\:meal)
     AND (:p6\\:\\:recipe_type IS NULL OR r.type = :p6\\:\\:recipe_type)
+    AND (
+        :p8\\:\\:TEXT IS NULL
+        OR EXISTS (
+            SELECT 1
+            FROM recipe_tag t
+            WHERE
+                t.recipe_id = r.id
+                AND t.tag = :p8\\:\\:TEXT
+        )
+    )
+    AND (
+        :p9\\:\\:dietary_restriction IS NULL
+        OR EXISTS (
+            SELECT 1
+            FROM recipe_dietary_restriction_met d
+            WHERE
+                d.recipe_id = r.id
+                AND d.dietary_restriction = :p9\\:\\:dietary_restriction
+        )
+    )
 ORDER BY
+    ss.score DESC NULLS LAST,
     CASE WHEN :p1\\:\\:BOOLEAN THEN
         CASE
             -- don't surface long recipes on weekdays
@@ -257,10 +755,16 @@ ORDER BY
             WHEN r.last_made_at IS NULL THEN 1.0
             ELSE GREATEST(1.0, LEAST(3.0, (NOW()\\:\\:DATE - r.last_made_at\\:\\:DATE) / 30.0))
         END *
-        COALESCE(iss.total_ingredient_score + 1.0, 1.0)
+        -- favor recipes with an ingredient in season this month
+        CASE
+            WHEN rs.peak_months & (1 << (EXTRACT(MONTH FROM NOW())\\:\\:INT - 1)) <> 0 THEN 2.0
+            ELSE 1.0
+        END
     ELSE NULL END DESC NULLS LAST,
     r.updated_at DESC,
     r.id
+LIMIT :p10\\:\\:INT
+OFFSET :p11\\:\\:INT
 """
 
 
@@ -271,7 +775,138 @@ class ListRecipesParams(pydantic.BaseModel):
     cuisine: str | None
     meal: models.Meal | None
     type: models.RecipeType | None
-    seasonalingredients: str
+    seasonalregion: str
+    tag: str | None
+    dietary_restriction: models.DietaryRestriction | None
+    recipe_limit: int | None
+    recipeoffset: int
+
+
+LIST_RECIPES_BY_USER = """-- name: list_recipes_by_user \\:many
+SELECT id, user_id, name, author, cuisine, location, time_estimate_minutes, notes, last_made_at, created_at, updated_at, type, meal, parent_recipe_id
+FROM recipe
+WHERE user_id = :p1\\:\\:UUID
+ORDER BY created_at, id
+"""
+
+
+LIST_RECIPES_MISSING_SEASONALITY = """-- name: list_recipes_missing_seasonality \\:many
+SELECT
+    r.id,
+    COALESCE(
+        ARRAY_AGG(i.name) FILTER (WHERE i.name IS NOT NULL),
+        '{}'
+    )\\:\\:TEXT[] AS ingredient_names
+FROM recipe r
+LEFT JOIN recipe_ingredient i ON i.recipe_id = r.id
+WHERE
+    r.id > :p1\\:\\:UUID
+    -- recipes missing a row for any of the regions
+    AND (
+        SELECT COUNT(*)
+        FROM recipe_seasonality rs
+        WHERE
+            rs.recipe_id = r.id
+            AND rs.region = ANY(:p2\\:\\:TEXT[])
+    ) < CARDINALITY(:p2\\:\\:TEXT[])
+GROUP BY r.id
+ORDER BY r.id
+LIMIT :p3\\:\\:INT
+"""
+
+
+class ListRecipesMissingSeasonalityRow(pydantic.BaseModel):
+    id: uuid.UUID
+    ingredient_names: list[str]
+
+
+LIST_UNCANONICALIZED_RECIPE_INGREDIENTS = """-- name: list_uncanonicalized_recipe_ingredients \\:many
+SELECT
+    id,
+    name
+FROM recipe_ingredient
+WHERE
+    canonical_ingredient_id IS NULL
+    AND canonicalized_at IS NULL
+    AND id > :p1\\:\\:UUID
+ORDER BY id
+LIMIT :p2\\:\\:INT
+"""
+
+
+class ListUncanonicalizedRecipeIngredientsRow(pydantic.BaseModel):
+    id: uuid.UUID
+    name: str
+
+
+REFRESH_RECIPE_SEARCH_DOCUMENTS = """-- name: refresh_recipe_search_documents \\:exec
+INSERT INTO recipe_search_document (
+    recipe_id,
+    name,
+    author,
+    cuisine,
+    notes,
+    tags,
+    ingredients,
+    dietary_restrictions
+)
+SELECT
+    r.id,
+    r.name,
+    r.author,
+    r.cuisine,
+    COALESCE(r.notes, ''),
+    COALESCE(tags.text, ''),
+    COALESCE(ingredients.text, ''),
+    COALESCE(dietary_restrictions.text, '')
+FROM recipe r
+LEFT JOIN LATERAL (
+    SELECT STRING_AGG(t.tag, ' ') AS text
+    FROM recipe_tag t
+    WHERE t.recipe_id = r.id
+) tags ON TRUE
+LEFT JOIN LATERAL (
+    SELECT STRING_AGG(i.name, ' ') AS text
+    FROM recipe_ingredient i
+    WHERE i.recipe_id = r.id
+) ingredients ON TRUE
+LEFT JOIN LATERAL (
+    SELECT STRING_AGG(REPLACE(d.dietary_restriction\\:\\:TEXT, '_', ' '), ' ') AS text
+    FROM recipe_dietary_restriction_met d
+    WHERE d.recipe_id = r.id
+) dietary_restrictions ON TRUE
+WHERE r.id = ANY(:p1\\:\\:UUID[])
+ON CONFLICT (recipe_id) DO UPDATE
+SET
+    name = EXCLUDED.name,
+    author = EXCLUDED.author,
+    cuisine = EXCLUDED.cuisine,
+    notes = EXCLUDED.notes,
+    tags = EXCLUDED.tags,
+    ingredients = EXCLUDED.ingredients,
+    dietary_restrictions = EXCLUDED.dietary_restrictions
+"""
+
+
+SET_RECIPE_INGREDIENT_CANONICAL_INGREDIENTS = """-- name: set_recipe_ingredient_canonical_ingredients \\:exec
+WITH canonicalized AS (
+    SELECT
+        UNNEST(:p1\\:\\:UUID[]) AS id,
+        UNNEST(:p2\\:\\:TEXT[]) AS canonical_name
+)
+
+-- rows without a canonical ingredient are still marked, so they aren't
+-- checked again
+UPDATE recipe_ingredient i
+SET
+    canonical_ingredient_id = c.id,
+    canonicalized_at = NOW()
+FROM canonicalized ci
+LEFT JOIN canonical_ingredient c ON c.name = ci.canonical_name
+WHERE
+    i.id = ci.id
+    AND i.canonical_ingredient_id IS NULL
+"""
 
 
 UPDATE_RECIPE = """-- name: update_recipe \\:one
@@ -303,10 +938,53 @@ class UpdateRecipeParams(pydantic.BaseModel):
     recipeid: uuid.UUID
 
 
+UPSERT_RECIPE_SEASONALITY = """-- name: upsert_recipe_seasonality \\:exec
+INSERT INTO recipe_seasonality (recipe_id, region, peak_months)
+SELECT
+    UNNEST(:p1\\:\\:UUID[]),
+    UNNEST(:p2\\:\\:TEXT[]),
+    UNNEST(:p3\\:\\:INT[])
+ON CONFLICT (recipe_id, region) DO UPDATE
+SET peak_months = EXCLUDED.peak_months
+"""
+
+
 class AsyncQuerier:
     def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
         self._conn = conn
 
+    async def clone_recipe(
+        self, *, userid: uuid.UUID, recipeid: uuid.UUID
+    ) -> models.Recipe | None:
+        row = (
+            await self._conn.execute(
+                sqlalchemy.text(CLONE_RECIPE), {"p1": userid, "p2": recipeid}
+            )
+        ).first()
+        if row is None:
+            return None
+        return models.Recipe(
+            id=row[0],
+            user_id=row[1],
+            name=row[2],
+            author=row[3],
+            cuisine=row[4],
+            location=row[5],
+            time_estimate_minutes=row[6],
+            notes=row[7],
+            last_made_at=row[8],
+            created_at=row[9],
+            updated_at=row[10],
+            type=row[11],
+            meal=row[12],
+            parent_recipe_id=row[13],
+        )
+
+    async def create_canonical_ingredients(self, *, names: list[str]) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(CREATE_CANONICAL_INGREDIENTS), {"p1": names}
+        )
+
     async def create_recipe(self, arg: CreateRecipeParams) -> models.Recipe | None:
         row = (
             await self._conn.execute(
@@ -344,6 +1022,19 @@ class AsyncQuerier:
             parent_recipe_id=row[13],
         )
 
+    async def create_recipe_cooking_logs(
+        self,
+        *,
+        recipeids: list[uuid.UUID],
+        cookedats: list[datetime.datetime],
+        userid: uuid.UUID,
+        feedcap: int,
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(CREATE_RECIPE_COOKING_LOGS),
+            {"p1": recipeids, "p2": cookedats, "p3": userid, "p4": feedcap},
+        )
+
     async def create_recipe_dietary_restrictions_met(
         self,
         *,
@@ -361,21 +1052,28 @@ class AsyncQuerier:
                 dietary_restriction=row[2],
             )
 
-    async def create_recipe_ingredients(
+    async def create_recipe_dietary_restrictions_met_for_recipes(
         self,
         *,
-        recipeid: uuid.UUID,
-        names: list[str],
-        quantities: list[float],
-        units: list[str],
+        recipeids: list[uuid.UUID],
+        dietaryrestrictionsmets: list[models.DietaryRestriction],
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(CREATE_RECIPE_DIETARY_RESTRICTIONS_MET_FOR_RECIPES),
+            {"p1": recipeids, "p2": dietaryrestrictionsmets},
+        )
+
+    async def create_recipe_ingredients(
+        self, arg: CreateRecipeIngredientsParams
     ) -> AsyncIterator[models.RecipeIngredient]:
         result = await self._conn.stream(
             sqlalchemy.text(CREATE_RECIPE_INGREDIENTS),
             {
-                "p1": recipeid,
-                "p2": names,
-                "p3": quantities,
-                "p4": units,
+                "p1": arg.recipeid,
+                "p2": arg.names,
+                "p3": arg.quantities,
+                "p4": arg.units,
+                "p5": arg.canonicalnames,
             },
         )
         async for row in result:
@@ -387,8 +1085,24 @@ class AsyncQuerier:
                 units=row[4],
                 created_at=row[5],
                 updated_at=row[6],
+                canonical_ingredient_id=row[7],
+                canonicalized_at=row[8],
             )
 
+    async def create_recipe_ingredients_for_recipes(
+        self, arg: CreateRecipeIngredientsForRecipesParams
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(CREATE_RECIPE_INGREDIENTS_FOR_RECIPES),
+            {
+                "p1": arg.recipeids,
+                "p2": arg.names,
+                "p3": arg.quantities,
+                "p4": arg.units,
+                "p5": arg.canonicalnames,
+            },
+        )
+
     async def create_recipe_instructions(
         self, *, recipeid: uuid.UUID, stepnumbers: list[int], contents: list[str]
     ) -> AsyncIterator[models.RecipeInstruction]:
@@ -406,6 +1120,18 @@ class AsyncQuerier:
                 updated_at=row[5],
             )
 
+    async def create_recipe_instructions_for_recipes(
+        self,
+        *,
+        recipeids: list[uuid.UUID],
+        stepnumbers: list[int],
+        contents: list[str],
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(CREATE_RECIPE_INSTRUCTIONS_FOR_RECIPES),
+            {"p1": recipeids, "p2": stepnumbers, "p3": contents},
+        )
+
     async def create_recipe_tags(
         self, *, recipeid: uuid.UUID, tags: list[str]
     ) -> AsyncIterator[models.RecipeTag]:
@@ -419,8 +1145,73 @@ class AsyncQuerier:
                 tag=row[2],
             )
 
-    async def delete_recipe(self, *, recipeid: uuid.UUID) -> None:
-        await self._conn.execute(sqlalchemy.text(DELETE_RECIPE), {"p1": recipeid})
+    async def create_recipe_tags_for_recipes(
+        self, *, recipeids: list[uuid.UUID], tags: list[str]
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(CREATE_RECIPE_TAGS_FOR_RECIPES),
+            {"p1": recipeids, "p2": tags},
+        )
+
+    async def create_recipes(
+        self, arg: CreateRecipesParams
+    ) -> AsyncIterator[models.Recipe]:
+        result = await self._conn.stream(
+            sqlalchemy.text(CREATE_RECIPES),
+            {
+                "p1": arg.ids,
+                "p2": arg.names,
+                "p3": arg.authors,
+                "p4": arg.cuisines,
+                "p5": arg.locations,
+                "p6": arg.timeestimateminutes,
+                "p7": arg.notes,
+                "p8": arg.types,
+                "p9": arg.meals,
+                "p10": arg.parentrecipeids,
+                "p11": arg.userid,
+            },
+        )
+        async for row in result:
+            yield models.Recipe(
+                id=row[0],
+                user_id=row[1],
+                name=row[2],
+                author=row[3],
+                cuisine=row[4],
+                location=row[5],
+                time_estimate_minutes=row[6],
+                notes=row[7],
+                last_made_at=row[8],
+                created_at=row[9],
+                updated_at=row[10],
+                type=row[11],
+                meal=row[12],
+                parent_recipe_id=row[13],
+            )
+
+    async def delete_recipe(self, *, recipeid: uuid.UUID) -> models.Recipe | None:
+        row = (
+            await self._conn.execute(sqlalchemy.text(DELETE_RECIPE), {"p1": recipeid})
+        ).first()
+        if row is None:
+            return None
+        return models.Recipe(
+            id=row[0],
+            user_id=row[1],
+            name=row[2],
+            author=row[3],
+            cuisine=row[4],
+            location=row[5],
+            time_estimate_minutes=row[6],
+            notes=row[7],
+            last_made_at=row[8],
+            created_at=row[9],
+            updated_at=row[10],
+            type=row[11],
+            meal=row[12],
+            parent_recipe_id=row[13],
+        )
 
     async def delete_recipe_dietary_restrictions_met_by_recipe_id(
         self, *, recipeid: uuid.UUID
@@ -472,6 +1263,48 @@ class AsyncQuerier:
             parent_recipe_id=row[13],
         )
 
+    async def list_pantry_matches(
+        self, *, canonicalnames: list[str], userids: list[uuid.UUID], recipelimit: int
+    ) -> AsyncIterator[ListPantryMatchesRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_PANTRY_MATCHES),
+            {"p1": canonicalnames, "p2": userids, "p3": recipelimit},
+        )
+        async for row in result:
+            yield ListPantryMatchesRow(
+                id=row[0],
+                user_id=row[1],
+                name=row[2],
+                author=row[3],
+                cuisine=row[4],
+                location=row[5],
+                time_estimate_minutes=row[6],
+                notes=row[7],
+                last_made_at=row[8],
+                created_at=row[9],
+                updated_at=row[10],
+                type=row[11],
+                meal=row[12],
+                parent_recipe_id=row[13],
+                matched_ingredient_count=row[14],
+                ingredient_count=row[15],
+                missing_ingredients=row[16],
+            )
+
+    async def list_recipe_cooking_log(
+        self, *, userid: uuid.UUID, recipeids: list[uuid.UUID]
+    ) -> AsyncIterator[models.RecipeCookingLog]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_RECIPE_COOKING_LOG),
+            {"p1": userid, "p2": recipeids},
+        )
+        async for row in result:
+            yield models.RecipeCookingLog(
+                user_id=row[0],
+                recipe_id=row[1],
+                cooked_at=row[2],
+            )
+
     async def list_recipe_dietary_restrictions_met(
         self, *, recipeids: list[uuid.UUID]
     ) -> AsyncIterator[models.RecipeDietaryRestrictionMet]:
@@ -485,21 +1318,18 @@ class AsyncQuerier:
                 dietary_restriction=row[2],
             )
 
-    async def list_recipe_filter_options(
+    async def list_recipe_facet_counts(
         self, *, userid: uuid.UUID
-    ) -> ListRecipeFilterOptionsRow | None:
-        row = (
-            await self._conn.execute(
-                sqlalchemy.text(LIST_RECIPE_FILTER_OPTIONS), {"p1": userid}
-            )
-        ).first()
-        if row is None:
-            return None
-        return ListRecipeFilterOptionsRow(
-            meals=row[0],
-            types=row[1],
-            cuisines=row[2],
+    ) -> AsyncIterator[ListRecipeFacetCountsRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_RECIPE_FACET_COUNTS), {"p1": userid}
         )
+        async for row in result:
+            yield ListRecipeFacetCountsRow(
+                facet=row[0],
+                value=row[1],
+                recipe_count=row[2],
+            )
 
     async def list_recipe_ingredients(
         self, *, recipeids: list[uuid.UUID]
@@ -516,6 +1346,8 @@ class AsyncQuerier:
                 units=row[4],
                 created_at=row[5],
                 updated_at=row[6],
+                canonical_ingredient_id=row[7],
+                canonicalized_at=row[8],
             )
 
     async def list_recipe_instructions(
@@ -534,6 +1366,29 @@ class AsyncQuerier:
                 updated_at=row[5],
             )
 
+    async def list_recipe_search_facet_counts(
+        self, arg: ListRecipeSearchFacetCountsParams
+    ) -> AsyncIterator[ListRecipeSearchFacetCountsRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_RECIPE_SEARCH_FACET_COUNTS),
+            {
+                "p1": arg.onlyuser,
+                "p2": arg.userid,
+                "p3": arg.search,
+                "p4": arg.cuisine,
+                "p5": arg.meal,
+                "p6": arg.type,
+                "p7": arg.tag,
+                "p8": arg.dietary_restriction,
+            },
+        )
+        async for row in result:
+            yield ListRecipeSearchFacetCountsRow(
+                facet=row[0],
+                value=row[1],
+                recipe_count=row[2],
+            )
+
     async def list_recipe_tags(
         self, *, recipeids: list[uuid.UUID]
     ) -> AsyncIterator[models.RecipeTag]:
@@ -559,7 +1414,11 @@ class AsyncQuerier:
                 "p4": arg.cuisine,
                 "p5": arg.meal,
                 "p6": arg.type,
-                "p7": arg.seasonalingredients,
+                "p7": arg.seasonalregion,
+                "p8": arg.tag,
+                "p9": arg.dietary_restriction,
+                "p10": arg.recipe_limit,
+                "p11": arg.recipeoffset,
             },
         )
         async for row in result:
@@ -580,6 +1439,71 @@ class AsyncQuerier:
                 parent_recipe_id=row[13],
             )
 
+    async def list_recipes_by_user(
+        self, *, userid: uuid.UUID
+    ) -> AsyncIterator[models.Recipe]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_RECIPES_BY_USER), {"p1": userid}
+        )
+        async for row in result:
+            yield models.Recipe(
+                id=row[0],
+                user_id=row[1],
+                name=row[2],
+                author=row[3],
+                cuisine=row[4],
+                location=row[5],
+                time_estimate_minutes=row[6],
+                notes=row[7],
+                last_made_at=row[8],
+                created_at=row[9],
+                updated_at=row[10],
+                type=row[11],
+                meal=row[12],
+                parent_recipe_id=row[13],
+            )
+
+    async def list_recipes_missing_seasonality(
+        self, *, afterid: uuid.UUID, regions: list[str], batchsize: int
+    ) -> AsyncIterator[ListRecipesMissingSeasonalityRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_RECIPES_MISSING_SEASONALITY),
+            {"p1": afterid, "p2": regions, "p3": batchsize},
+        )
+        async for row in result:
+            yield ListRecipesMissingSeasonalityRow(
+                id=row[0],
+                ingredient_names=row[1],
+            )
+
+    async def list_uncanonicalized_recipe_ingredients(
+        self, *, afterid: uuid.UUID, batchsize: int
+    ) -> AsyncIterator[ListUncanonicalizedRecipeIngredientsRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_UNCANONICALIZED_RECIPE_INGREDIENTS),
+            {"p1": afterid, "p2": batchsize},
+        )
+        async for row in result:
+            yield ListUncanonicalizedRecipeIngredientsRow(
+                id=row[0],
+                name=row[1],
+            )
+
+    async def refresh_recipe_search_documents(
+        self, *, recipeids: list[uuid.UUID]
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(REFRESH_RECIPE_SEARCH_DOCUMENTS), {"p1": recipeids}
+        )
+
+    async def set_recipe_ingredient_canonical_ingredients(
+        self, *, ids: list[uuid.UUID], canonicalnames: list[str]
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(SET_RECIPE_INGREDIENT_CANONICAL_INGREDIENTS),
+            {"p1": ids, "p2": canonicalnames},
+        )
+
     async def update_recipe(self, arg: UpdateRecipeParams) -> models.Recipe | None:
         row = (
             await self._conn.execute(
@@ -615,3 +1539,15 @@ class AsyncQuerier:
             meal=row[12],
             parent_recipe_id=row[13],
         )
+
+    async def upsert_recipe_seasonality(
+        self,
+        *,
+        recipeids: list[uuid.UUID],
+        regions: list[str],
+        peakmonths: list[int],
+    ) -> None:
+        await self._conn.execute(
+            sqlalchemy.text(UPSERT_RECIPE_SEASONALITY),
+            {"p1": recipeids, "p2": regions, "p3": peakmonths},
+        )
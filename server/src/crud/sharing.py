@@ -27,6 +27,25 @@ RETURNING to_user_id, recipe_id, created_at, expires_at
 """
 
 
+DELETE_EXPIRED_RECIPE_SHARE_REQUESTS = """-- name: delete_expired_recipe_share_requests \\:execrows
+WITH expired AS (
+    SELECT
+        recipe_id,
+        to_user_id
+    FROM recipe_share_request
+    WHERE expires_at <= NOW()
+    ORDER BY expires_at
+    LIMIT :p1\\:\\:INT
+    FOR UPDATE SKIP LOCKED
+)
+DELETE FROM recipe_share_request rsr
+USING expired e
+WHERE
+    rsr.recipe_id = e.recipe_id
+    AND rsr.to_user_id = e.to_user_id
+"""
+
+
 DELETE_SHARING_REQUEST = """-- name: delete_sharing_request \\:one
 DELETE FROM recipe_share_request
 WHERE
@@ -66,6 +85,68 @@ class ListPendingRecipeShareRequestsRow(pydantic.BaseModel):
     from_user_name: str
 
 
+SHARE_RECIPES = """-- name: share_recipes \\:many
+WITH pairs AS (
+    SELECT DISTINCT
+        r.recipe_id,
+        u.to_user_id
+    FROM UNNEST(:p1\\:\\:UUID[]) AS r(recipe_id)
+    CROSS JOIN UNNEST(:p2\\:\\:UUID[]) AS u(to_user_id)
+), shared AS (
+    INSERT INTO recipe_share_request (recipe_id, to_user_id, expires_at)
+    SELECT
+        p.recipe_id,
+        p.to_user_id,
+        :p3\\:\\:TIMESTAMPTZ
+    FROM pairs p
+    -- only the sharer's own recipes can be shared
+    JOIN recipe r
+        ON r.id = p.recipe_id
+        AND r.user_id = :p4\\:\\:UUID
+    JOIN "user" u ON u.id = p.to_user_id
+    ORDER BY p.recipe_id, p.to_user_id
+    -- a pending request is left alone, an expired one is renewed
+    ON CONFLICT (recipe_id, to_user_id) DO UPDATE
+    SET
+        created_at = NOW(),
+        expires_at = EXCLUDED.expires_at
+    WHERE recipe_share_request.expires_at <= NOW()
+    RETURNING to_user_id, recipe_id, created_at, expires_at
+)
+SELECT
+    p.recipe_id,
+    p.to_user_id,
+    CASE
+        WHEN u.id IS NULL THEN 'recipient_not_found'
+        WHEN r.id IS NULL THEN 'recipe_not_found'
+        WHEN s.recipe_id IS NOT NULL THEN 'shared'
+        ELSE 'already_pending'
+    END\\:\\:TEXT AS status,
+    COALESCE(s.created_at, existing.created_at) AS created_at,
+    COALESCE(s.expires_at, existing.expires_at) AS expires_at
+FROM pairs p
+LEFT JOIN recipe r
+    ON r.id = p.recipe_id
+    AND r.user_id = :p4\\:\\:UUID
+LEFT JOIN "user" u ON u.id = p.to_user_id
+LEFT JOIN shared s
+    ON s.recipe_id = p.recipe_id
+    AND s.to_user_id = p.to_user_id
+LEFT JOIN recipe_share_request existing
+    ON existing.recipe_id = r.id
+    AND existing.to_user_id = p.to_user_id
+ORDER BY p.recipe_id, p.to_user_id
+"""
+
+
+class ShareRecipesRow(pydantic.BaseModel):
+    recipe_id: uuid.UUID
+    to_user_id: uuid.UUID
+    status: str
+    created_at: datetime.datetime | None
+    expires_at: datetime.datetime | None
+
+
 class AsyncQuerier:
     def __init__(self, conn: sqlalchemy.ext.asyncio.AsyncConnection):
         self._conn = conn
@@ -88,6 +169,12 @@ class AsyncQuerier:
             expires_at=row[3],
         )
 
+    async def delete_expired_recipe_share_requests(self, *, batchsize: int) -> int:
+        result = await self._conn.execute(
+            sqlalchemy.text(DELETE_EXPIRED_RECIPE_SHARE_REQUESTS), {"p1": batchsize}
+        )
+        return result.rowcount
+
     async def delete_sharing_request(
         self, *, recipeid: uuid.UUID, touserid: uuid.UUID
     ) -> models.RecipeShareRequest | None:
@@ -136,3 +223,24 @@ class AsyncQuerier:
                 recipe_name=row[1],
                 from_user_name=row[2],
             )
+
+    async def share_recipes(
+        self,
+        *,
+        recipeids: list[uuid.UUID],
+        touserids: list[uuid.UUID],
+        expiresat: datetime.datetime,
+        sharerid: uuid.UUID,
+    ) -> AsyncIterator[ShareRecipesRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(SHARE_RECIPES),
+            {"p1": recipeids, "p2": touserids, "p3": expiresat, "p4": sharerid},
+        )
+        async for row in result:
+            yield ShareRecipesRow(
+                recipe_id=row[0],
+                to_user_id=row[1],
+                status=row[2],
+                created_at=row[3],
+                expires_at=row[4],
+            )
@@ -21,21 +21,44 @@ WITH updated AS (
     AND friend_user_id = :p2\\:\\:UUID
     AND status = 'pending'
     RETURNING user_id, friend_user_id, status, created_at, updated_at
+), inserted AS (
+    INSERT INTO friendship (
+        user_id,
+        friend_user_id,
+        status
+    )
+    SELECT friend_user_id, user_id, 'accepted'
+    FROM updated
+    -- a pending request the other way is accepted along with this one
+    ON CONFLICT (user_id, friend_user_id) DO UPDATE
+    SET status = 'accepted',
+        updated_at = NOW()
+    RETURNING user_id, friend_user_id, status, created_at, updated_at
 )
 
-INSERT INTO friendship (
-    user_id,
-    friend_user_id,
-    status
-)
-SELECT friend_user_id, user_id, 'accepted'
-FROM updated
-RETURNING user_id, friend_user_id, status, created_at, updated_at
+-- accepting again returns the friendship that's already there
+SELECT user_id, friend_user_id, status, created_at, updated_at, TRUE AS accepted
+FROM inserted
+UNION ALL
+SELECT user_id, friend_user_id, status, created_at, updated_at, FALSE AS accepted
+FROM friendship
+WHERE user_id = :p2\\:\\:UUID
+  AND friend_user_id = :p1\\:\\:UUID
+  AND status = 'accepted'
 """
 
 
+class AcceptFriendRequestRow(pydantic.BaseModel):
+    user_id: uuid.UUID
+    friend_user_id: uuid.UUID
+    status: models.FriendshipStatus
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    accepted: bool
+
+
 AUTHENTICATE_USER = """-- name: authenticate_user \\:one
-SELECT u.id, u.email, u.name, u.created_at, u.updated_at, u.privacy_preference, u.expo_push_token, u.push_permission
+SELECT u.id, u.email, u.name, u.created_at, u.updated_at, u.privacy_preference, u.expo_push_token, u.push_permission, u.seasonal_region
 FROM "user" u
 JOIN user_password up ON u.id = up.user_id
 WHERE
@@ -45,20 +68,41 @@ WHERE
 
 
 CREATE_FRIEND_REQUEST = """-- name: create_friend_request \\:one
-INSERT INTO friendship (
-    user_id,
-    friend_user_id,
-    status
-)
-VALUES (
-    :p1\\:\\:UUID,
-    :p2\\:\\:UUID,
-    'pending'
+WITH requested AS (
+    INSERT INTO friendship (
+        user_id,
+        friend_user_id,
+        status
+    )
+    VALUES (
+        :p1\\:\\:UUID,
+        :p2\\:\\:UUID,
+        'pending'
+    )
+    ON CONFLICT (user_id, friend_user_id) DO NOTHING
+    RETURNING user_id, friend_user_id, status, created_at, updated_at
 )
-RETURNING user_id, friend_user_id, status, created_at, updated_at
+
+-- a repeated request returns the friendship that's already there
+SELECT user_id, friend_user_id, status, created_at, updated_at, TRUE AS created
+FROM requested
+UNION ALL
+SELECT user_id, friend_user_id, status, created_at, updated_at, FALSE AS created
+FROM friendship
+WHERE user_id = :p1\\:\\:UUID
+  AND friend_user_id = :p2\\:\\:UUID
 """
 
 
+class CreateFriendRequestRow(pydantic.BaseModel):
+    user_id: uuid.UUID
+    friend_user_id: uuid.UUID
+    status: models.FriendshipStatus
+    created_at: datetime.datetime
+    updated_at: datetime.datetime
+    created: bool
+
+
 CREATE_USER = """-- name: create_user \\:one
 INSERT INTO "user" (
     email,
@@ -70,7 +114,7 @@ VALUES (
     :p2\\:\\:TEXT,
     :p3\\:\\:user_privacy_preference
 )
-RETURNING id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission
+RETURNING id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission, seasonal_region
 """
 
 
@@ -87,14 +131,27 @@ VALUES (
 
 
 FIND_USER_BY_ID = """-- name: find_user_by_id \\:one
-SELECT id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission
+SELECT id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission, seasonal_region
 FROM "user"
 WHERE id = :p1
 """
 
 
+LIST_FRIEND_IDS_FOR_USERS = """-- name: list_friend_ids_for_users \\:many
+SELECT user_id, friend_user_id
+FROM friendship
+WHERE user_id = ANY(:p1\\:\\:UUID[])
+  AND status = 'accepted'
+"""
+
+
+class ListFriendIdsForUsersRow(pydantic.BaseModel):
+    user_id: uuid.UUID
+    friend_user_id: uuid.UUID
+
+
 LIST_FRIEND_REQUESTS = """-- name: list_friend_requests \\:many
-SELECT u.id, u.email, u.name, u.created_at, u.updated_at, u.privacy_preference, u.expo_push_token, u.push_permission
+SELECT u.id, u.email, u.name, u.created_at, u.updated_at, u.privacy_preference, u.expo_push_token, u.push_permission, u.seasonal_region
 FROM "user" u
 JOIN friendship f ON u.id = f.user_id
 WHERE f.friend_user_id = :p1\\:\\:UUID
@@ -104,7 +161,7 @@ ORDER BY f.created_at DESC
 
 
 LIST_FRIENDS = """-- name: list_friends \\:many
-SELECT u.id, u.email, u.name, u.created_at, u.updated_at, u.privacy_preference, u.expo_push_token, u.push_permission
+SELECT u.id, u.email, u.name, u.created_at, u.updated_at, u.privacy_preference, u.expo_push_token, u.push_permission, u.seasonal_region
 FROM "user" u
 JOIN friendship f ON u.id = f.friend_user_id
 WHERE f.user_id = :p1\\:\\:UUID
@@ -112,9 +169,30 @@ WHERE f.user_id = :p1\\:\\:UUID
 """
 
 
+LIST_FRIENDSHIPS_FOR_USER = """-- name: list_friendships_for_user \\:many
+SELECT user_id, friend_user_id, status, created_at, updated_at
+FROM friendship
+WHERE user_id = :p1\\:\\:UUID
+  OR friend_user_id = :p1\\:\\:UUID
+"""
+
+
+LIST_PUBLIC_USERS_BY_IDS = """-- name: list_public_users_by_ids \\:many
+SELECT id, name
+FROM "user"
+WHERE id = ANY(:p1\\:\\:UUID[])
+  AND privacy_preference = 'public'
+"""
+
+
+class ListPublicUsersByIdsRow(pydantic.BaseModel):
+    id: uuid.UUID
+    name: str
+
+
 SEARCH_USERS = """-- name: search_users \\:many
 SELECT
-    id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission,
+    id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission, seasonal_region,
     similarity(name || ' ' || email, :p1\\:\\:TEXT) as relevance_score
 FROM "user"
 WHERE
@@ -136,9 +214,43 @@ class SearchUsersRow(pydantic.BaseModel):
     privacy_preference: models.UserPrivacyPreference
     expo_push_token: str | None
     push_permission: models.PushPermissionStatus
+    seasonal_region: str | None
     relevance_score: float
 
 
+SEARCH_USERS_TYPEAHEAD = """-- name: search_users_typeahead \\:many
+SELECT
+    id,
+    name,
+    (:p1\\:\\:TEXT <<-> (name || ' ' || email))\\:\\:REAL AS distance
+FROM "user"
+WHERE
+    :p1\\:\\:TEXT <% (name || ' ' || email)
+    AND privacy_preference = 'public'
+    AND id != :p2\\:\\:UUID
+    AND (
+        (:p1\\:\\:TEXT <<-> (name || ' ' || email))\\:\\:REAL,
+        id
+    ) > (:p3\\:\\:REAL, :p4\\:\\:UUID)
+ORDER BY :p1\\:\\:TEXT <<-> (name || ' ' || email), id
+LIMIT :p5\\:\\:INT
+"""
+
+
+class SearchUsersTypeaheadParams(pydantic.BaseModel):
+    query: str
+    userid: uuid.UUID
+    afterdistance: float
+    afterid: uuid.UUID
+    userlimit: int
+
+
+class SearchUsersTypeaheadRow(pydantic.BaseModel):
+    id: uuid.UUID
+    name: str
+    distance: float
+
+
 SET_EXPO_PUSH_TOKEN = """-- name: set_expo_push_token \\:one
 UPDATE "user"
 SET
@@ -146,7 +258,17 @@ SET
     push_permission = :p2\\:\\:push_permission_status,
     updated_at = NOW()
 WHERE id = :p3\\:\\:UUID
-RETURNING id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission
+RETURNING id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission, seasonal_region
+"""
+
+
+SET_SEASONAL_REGION = """-- name: set_seasonal_region \\:one
+UPDATE "user"
+SET
+    seasonal_region = :p1\\:\\:TEXT,
+    updated_at = NOW()
+WHERE id = :p2\\:\\:UUID
+RETURNING id, email, name, created_at, updated_at, privacy_preference, expo_push_token, push_permission, seasonal_region
 """
 
 
@@ -156,7 +278,7 @@ class AsyncQuerier:
 
     async def accept_friend_request(
         self, *, requestfromuserid: uuid.UUID, userid: uuid.UUID
-    ) -> models.Friendship | None:
+    ) -> AcceptFriendRequestRow | None:
         row = (
             await self._conn.execute(
                 sqlalchemy.text(ACCEPT_FRIEND_REQUEST),
@@ -165,12 +287,13 @@ class AsyncQuerier:
         ).first()
         if row is None:
             return None
-        return models.Friendship(
+        return AcceptFriendRequestRow(
             user_id=row[0],
             friend_user_id=row[1],
             status=row[2],
             created_at=row[3],
             updated_at=row[4],
+            accepted=row[5],
         )
 
     async def authenticate_user(
@@ -193,11 +316,12 @@ class AsyncQuerier:
             privacy_preference=row[5],
             expo_push_token=row[6],
             push_permission=row[7],
+            seasonal_region=row[8],
         )
 
     async def create_friend_request(
         self, *, userid: uuid.UUID, frienduserid: uuid.UUID
-    ) -> models.Friendship | None:
+    ) -> CreateFriendRequestRow | None:
         row = (
             await self._conn.execute(
                 sqlalchemy.text(CREATE_FRIEND_REQUEST),
@@ -206,12 +330,13 @@ class AsyncQuerier:
         ).first()
         if row is None:
             return None
-        return models.Friendship(
+        return CreateFriendRequestRow(
             user_id=row[0],
             friend_user_id=row[1],
             status=row[2],
             created_at=row[3],
             updated_at=row[4],
+            created=row[5],
         )
 
     async def create_user(
@@ -234,6 +359,7 @@ class AsyncQuerier:
             privacy_preference=row[5],
             expo_push_token=row[6],
             push_permission=row[7],
+            seasonal_region=row[8],
         )
 
     async def create_user_password(
@@ -258,8 +384,21 @@ class AsyncQuerier:
             privacy_preference=row[5],
             expo_push_token=row[6],
             push_permission=row[7],
+            seasonal_region=row[8],
         )
 
+    async def list_friend_ids_for_users(
+        self, *, userids: list[uuid.UUID]
+    ) -> AsyncIterator[ListFriendIdsForUsersRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_FRIEND_IDS_FOR_USERS), {"p1": userids}
+        )
+        async for row in result:
+            yield ListFriendIdsForUsersRow(
+                user_id=row[0],
+                friend_user_id=row[1],
+            )
+
     async def list_friend_requests(
         self, *, userid: uuid.UUID
     ) -> AsyncIterator[models.User]:
@@ -276,6 +415,7 @@ class AsyncQuerier:
                 privacy_preference=row[5],
                 expo_push_token=row[6],
                 push_permission=row[7],
+                seasonal_region=row[8],
             )
 
     async def list_friends(self, *, userid: uuid.UUID) -> AsyncIterator[models.User]:
@@ -290,6 +430,34 @@ class AsyncQuerier:
                 privacy_preference=row[5],
                 expo_push_token=row[6],
                 push_permission=row[7],
+                seasonal_region=row[8],
+            )
+
+    async def list_friendships_for_user(
+        self, *, userid: uuid.UUID
+    ) -> AsyncIterator[models.Friendship]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_FRIENDSHIPS_FOR_USER), {"p1": userid}
+        )
+        async for row in result:
+            yield models.Friendship(
+                user_id=row[0],
+                friend_user_id=row[1],
+                status=row[2],
+                created_at=row[3],
+                updated_at=row[4],
+            )
+
+    async def list_public_users_by_ids(
+        self, *, userids: list[uuid.UUID]
+    ) -> AsyncIterator[ListPublicUsersByIdsRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(LIST_PUBLIC_USERS_BY_IDS), {"p1": userids}
+        )
+        async for row in result:
+            yield ListPublicUsersByIdsRow(
+                id=row[0],
+                name=row[1],
             )
 
     async def search_users(
@@ -314,7 +482,28 @@ class AsyncQuerier:
                 privacy_preference=row[5],
                 expo_push_token=row[6],
                 push_permission=row[7],
-                relevance_score=row[8],
+                seasonal_region=row[8],
+                relevance_score=row[9],
+            )
+
+    async def search_users_typeahead(
+        self, arg: SearchUsersTypeaheadParams
+    ) -> AsyncIterator[SearchUsersTypeaheadRow]:
+        result = await self._conn.stream(
+            sqlalchemy.text(SEARCH_USERS_TYPEAHEAD),
+            {
+                "p1": arg.query,
+                "p2": arg.userid,
+                "p3": arg.afterdistance,
+                "p4": arg.afterid,
+                "p5": arg.userlimit,
+            },
+        )
+        async for row in result:
+            yield SearchUsersTypeaheadRow(
+                id=row[0],
+                name=row[1],
+                distance=row[2],
             )
 
     async def set_expo_push_token(
@@ -341,4 +530,28 @@ class AsyncQuerier:
             privacy_preference=row[5],
             expo_push_token=row[6],
             push_permission=row[7],
+            seasonal_region=row[8],
+        )
+
+    async def set_seasonal_region(
+        self, *, seasonal_region: str | None, userid: uuid.UUID
+    ) -> models.User | None:
+        row = (
+            await self._conn.execute(
+                sqlalchemy.text(SET_SEASONAL_REGION),
+                {"p1": seasonal_region, "p2": userid},
+            )
+        ).first()
+        if row is None:
+            return None
+        return models.User(
+            id=row[0],
+            email=row[1],
+            name=row[2],
+            created_at=row[3],
+            updated_at=row[4],
+            privacy_preference=row[5],
+            expo_push_token=row[6],
+            push_permission=row[7],
+            seasonal_region=row[8],
         )
@@ -46,7 +46,7 @@ async def get_db() -> AsyncGenerator[AsyncConnection]:
         try:
             yield conn
         except Exception as e:
-            logger.exception("internal server error")
+            ## expected errors are raised as-is, without logging a full trace
             if isinstance(e, HTTPException):
                 raise e
 
@@ -55,11 +55,13 @@ async def get_db() -> AsyncGenerator[AsyncConnection]:
                 and e.orig
                 and isinstance(e.orig.__cause__, UniqueViolationError)
             ):
+                logger.info("duplicate write: %s", e.orig.__cause__)
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="duplicate",
                 ) from e
 
+            logger.exception("internal server error")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             ) from e
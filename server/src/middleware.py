@@ -0,0 +1,50 @@
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"uploads must be at most {max_bytes // (1024 * 1024)}MB",
+    )
+
+
+class UploadSizeLimitMiddleware:
+    ## multipart uploads are spooled to disk in full before the endpoint runs,
+    ## so their size is checked here, as the body is received
+    def __init__(self, app: ASGIApp, max_bytes: int, paths: set[str]) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.paths = paths
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > self.max_bytes:
+            error = _too_large(self.max_bytes)
+            response = JSONResponse(
+                {"detail": error.detail}, status_code=error.status_code
+            )
+            await response(scope, receive, send)
+            return
+
+        ## chunked bodies have no length up front, so they're counted instead
+        received = 0
+
+        async def receive_limited() -> Message:
+            nonlocal received
+
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    raise _too_large(self.max_bytes)
+
+            return message
+
+        await self.app(scope, receive_limited, send)
@@ -0,0 +1,20 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+
+C = TypeVar("C", bound=BaseModel)
+
+
+def encode_cursor(cursor: BaseModel) -> str:
+    return urlsafe_b64encode(cursor.model_dump_json().encode()).decode()
+
+
+def decode_cursor(model: type[C], cursor: str) -> C:
+    try:
+        return model.model_validate_json(urlsafe_b64decode(cursor))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="invalid cursor"
+        ) from e
@@ -2,15 +2,24 @@ import base64
 import io
 import json
 import re
+import time
+from collections.abc import AsyncGenerator
+from typing import Any
 
 import anthropic
 from aiohttp import ClientSession
 from bs4 import BeautifulSoup
 from markitdown import MarkItDown
+from pydantic import BaseModel, ValidationError
+from pydantic_core import from_json
 
-from src.schemas import BaseRecipeCreate
+from src.logger import get_logger
+from src.schemas import BaseRecipeCreate, RecipeIngredient
+from src.services.images import PreparedImage
 from src.settings import settings
 
+logger = get_logger(__name__)
+
 client = anthropic.AsyncAnthropic(api_key=settings.anthropic_api_key.get_secret_value())
 
 SYSTEM_PROMPT = f"""
@@ -37,6 +46,11 @@ You must return the result as a JSON object matching the BaseRecipeCreate schema
 Return ONLY the JSON object, no markdown fences or other text.
 """
 
+## the system prompt is the same on every call, so it's cached across them
+SYSTEM_PROMPT_BLOCKS: list[anthropic.types.TextBlockParam] = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}}
+]
+
 
 async def _parse_response(text: str) -> BaseRecipeCreate | None:
     cleaned = text.strip()
@@ -53,12 +67,47 @@ async def _parse_response(text: str) -> BaseRecipeCreate | None:
     return await agent_result_to_maybe_recipe(result)
 
 
+def _json_ld_recipe(data: Any) -> dict[str, Any] | None:
+    if isinstance(data, list):
+        for item in data:
+            if recipe := _json_ld_recipe(item):
+                return recipe
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    types = data.get("@type")
+    if types == "Recipe" or (isinstance(types, list) and "Recipe" in types):
+        return data
+
+    return _json_ld_recipe(data.get("@graph"))
+
+
+def _find_json_ld_recipe(soup: BeautifulSoup) -> dict[str, Any] | None:
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            data = json.loads(script.get_text())
+        except json.JSONDecodeError:
+            continue
+
+        if recipe := _json_ld_recipe(data):
+            return recipe
+
+    return None
+
+
 async def extract_recipe_markdown_from_url(url: str) -> str:
     async with ClientSession() as session, session.get(url) as response:
         html = await response.text()
 
     soup = BeautifulSoup(html, "html.parser")
 
+    ## most recipe sites publish the recipe as schema.org JSON-LD, which is far
+    ## smaller and cleaner than the page itself
+    if recipe := _find_json_ld_recipe(soup):
+        return json.dumps(recipe, indent=2)
+
     for tag in soup(
         [
             "script",
@@ -111,33 +160,159 @@ async def agent_result_to_maybe_recipe(
     return result
 
 
-async def markdown_to_recipe(markdown: str) -> BaseRecipeCreate | None:
-    binary_io = io.BytesIO(markdown.encode("utf-8"))
+class PartialRecipe(BaseModel):
+    name: str | None = None
+    ingredients: list[RecipeIngredient] = []
 
-    md = MarkItDown()
-    content = md.convert_stream(binary_io).markdown
 
-    prompt = f"Extract the recipe from the following webpage content:\n\n{content}"
+class ExtractionRetry(BaseModel):
+    ## the partials sent so far came from output that didn't validate, and the
+    ## next ones start over from `model`
+    model: str
+
+
+RecipeExtractionUpdate = PartialRecipe | ExtractionRetry | BaseRecipeCreate
+
+
+RecipePrompt = (
+    str | list[anthropic.types.ImageBlockParam | anthropic.types.TextBlockParam]
+)
+
+
+def _parse_partial_recipe(text: str) -> PartialRecipe | None:
+    cleaned = re.sub(r"^```(?:json)?\s*", "", text.lstrip())
+
+    ## incomplete trailing strings are left out, so a name is only ever seen
+    ## once it's been fully generated
+    try:
+        data = from_json(cleaned, allow_partial=True)
+    except ValueError:
+        return None
+
+    if not isinstance(data, dict):
+        return None
+
+    name = data.get("name")
+    ingredients = data.get("ingredients")
+    if not isinstance(ingredients, list):
+        ingredients = []
+
+    ## the last ingredient may still be being written until a later field starts
+    if "instructions" not in data:
+        ingredients = ingredients[:-1]
+
+    partial = PartialRecipe(name=name if isinstance(name, str) else None)
+    for ingredient in ingredients:
+        try:
+            partial.ingredients.append(RecipeIngredient.model_validate(ingredient))
+        except ValidationError:
+            break
+
+    return partial
 
-    response = await client.messages.create(
-        model="claude-sonnet-4-5",
-        max_tokens=4096,
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": prompt}],
+
+def _extraction_models(prompt: RecipePrompt) -> list[str]:
+    if (
+        isinstance(prompt, str)
+        and len(prompt) <= settings.recipe_extraction_fast_max_chars
+    ):
+        return [settings.recipe_extraction_fast_model, settings.recipe_extraction_model]
+
+    return [settings.recipe_extraction_model]
+
+
+def _log_extraction(model: str, usage: anthropic.types.Usage, started: float) -> None:
+    logger.info(
+        "recipe extraction with %s took %.0fms: %d input tokens (%d cached, %d written to cache), %d output tokens",
+        model,
+        (time.perf_counter() - started) * 1000,
+        usage.input_tokens,
+        usage.cache_read_input_tokens or 0,
+        usage.cache_creation_input_tokens or 0,
+        usage.output_tokens,
     )
 
-    text = response.content[0].text  # type: ignore[union-attr]
-    return await _parse_response(text)
+
+async def stream_recipe_extraction(
+    prompt: RecipePrompt,
+) -> AsyncGenerator[RecipeExtractionUpdate]:
+    ## yields the recipe as it's generated, then the full recipe if the output
+    ## turns out to be one. generation is cancelled as soon as it clearly isn't
+    models = _extraction_models(prompt)
+
+    for attempt, model in enumerate(models, start=1):
+        text = ""
+        last = PartialRecipe()
+        not_a_recipe = False
+        started = time.perf_counter()
+
+        async with client.messages.stream(
+            model=model,
+            max_tokens=settings.recipe_extraction_max_tokens,
+            system=SYSTEM_PROMPT_BLOCKS,
+            messages=[{"role": "user", "content": prompt}],
+        ) as stream:
+            async for delta in stream.text_stream:
+                text += delta
+
+                partial = _parse_partial_recipe(text)
+                if partial is None or partial == last:
+                    continue
+
+                if partial.name is not None and "unknown" in partial.name.lower():
+                    not_a_recipe = True
+                    break
+
+                last = partial
+                yield partial
+
+            _log_extraction(model, stream.current_message_snapshot.usage, started)
+
+        if not_a_recipe:
+            return
+
+        if recipe := await _parse_response(text):
+            yield recipe
+            return
+
+        if attempt < len(models):
+            logger.info(
+                "recipe extraction with %s didn't validate, retrying with %s",
+                model,
+                models[attempt],
+            )
+
+            if last != PartialRecipe():
+                yield ExtractionRetry(model=models[attempt])
 
 
-async def image_to_recipe(images: list[bytes]) -> BaseRecipeCreate | None:
+async def _extract_recipe(prompt: RecipePrompt) -> BaseRecipeCreate | None:
+    recipe = None
+
+    async for update in stream_recipe_extraction(prompt):
+        if isinstance(update, BaseRecipeCreate):
+            recipe = update
+
+    return recipe
+
+
+def markdown_recipe_prompt(markdown: str) -> RecipePrompt:
+    binary_io = io.BytesIO(markdown.encode("utf-8"))
+
+    md = MarkItDown()
+    content = md.convert_stream(binary_io).markdown
+
+    return f"Extract the recipe from the following webpage content:\n\n{content}"
+
+
+def image_recipe_prompt(images: list[PreparedImage]) -> RecipePrompt:
     content: list[anthropic.types.ImageBlockParam | anthropic.types.TextBlockParam] = [
         {
             "type": "image",
             "source": {
                 "type": "base64",
-                "media_type": "image/jpeg",
-                "data": base64.b64encode(image).decode("utf-8"),
+                "media_type": image.media_type,
+                "data": base64.b64encode(image.data).decode("utf-8"),
             },
         }
         for image in images
@@ -146,12 +321,12 @@ async def image_to_recipe(images: list[bytes]) -> BaseRecipeCreate | None:
         {"type": "text", "text": "Extract the recipe from the following image."}
     )
 
-    response = await client.messages.create(
-        model="claude-sonnet-4-5",
-        max_tokens=4096,
-        system=SYSTEM_PROMPT,
-        messages=[{"role": "user", "content": content}],
-    )
+    return content
+
+
+async def markdown_to_recipe(markdown: str) -> BaseRecipeCreate | None:
+    return await _extract_recipe(markdown_recipe_prompt(markdown))
+
 
-    text = response.content[0].text  # type: ignore[union-attr]
-    return await _parse_response(text)
+async def image_to_recipe(images: list[PreparedImage]) -> BaseRecipeCreate | None:
+    return await _extract_recipe(image_recipe_prompt(images))
@@ -0,0 +1,14 @@
+from typing import TypeVar
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+T = TypeVar("T")
+
+
+class PydanticJSONResponse(Response):
+    media_type = "application/json"
+
+
+def to_json_response(adapter: TypeAdapter[T], content: T) -> PydanticJSONResponse:
+    return PydanticJSONResponse(content=adapter.dump_json(content))
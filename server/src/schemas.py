@@ -130,21 +130,31 @@ class Recipe(RecipeCreate):
         instructions: list[models.RecipeInstruction],
         tags: list[str],
     ) -> "Recipe":
-        return cls(
-            id=recipe.id,
-            name=recipe.name,
-            author=recipe.author,
-            cuisine=recipe.cuisine,
-            location=RecipeLocation.model_validate(recipe.location),
-            time_estimate_minutes=recipe.time_estimate_minutes,
-            notes=recipe.notes,
-            tags=tags,
-            dietary_restrictions_met=dietary_restrictions_met,
-            ingredients=[RecipeIngredient.from_db(i) for i in ingredients],
-            instructions=[RecipeInstruction.from_db(i) for i in instructions],
-            last_made_at=recipe.last_made_at,
-            type=recipe.type,
-            meal=recipe.meal,
-            user_id=recipe.user_id,
-            parent_recipe_id=recipe.parent_recipe_id,
+        ## build the whole tree as plain data and validate it in a single pass,
+        ## which is much cheaper than constructing each nested model separately
+        return cls.model_validate(
+            {
+                "id": recipe.id,
+                "name": recipe.name,
+                "author": recipe.author,
+                "cuisine": recipe.cuisine,
+                "location": recipe.location,
+                "time_estimate_minutes": recipe.time_estimate_minutes,
+                "notes": recipe.notes,
+                "tags": tags,
+                "dietary_restrictions_met": dietary_restrictions_met,
+                "ingredients": [
+                    {"name": i.name, "quantity": i.quantity, "units": i.units}
+                    for i in ingredients
+                ],
+                "instructions": [
+                    {"step_number": i.step_number, "content": i.content}
+                    for i in instructions
+                ],
+                "last_made_at": recipe.last_made_at,
+                "type": recipe.type,
+                "meal": recipe.meal,
+                "user_id": recipe.user_id,
+                "parent_recipe_id": recipe.parent_recipe_id,
+            }
         )
@@ -0,0 +1,262 @@
+import gzip
+import zlib
+from collections import defaultdict
+from collections.abc import AsyncGenerator
+from datetime import UTC, datetime
+from itertools import islice
+from typing import IO, Literal
+from uuid import UUID, uuid4
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ValidationError, field_validator
+from starlette.concurrency import run_in_threadpool
+
+from src.crud.activity import AsyncQuerier as ActivityQuerier
+from src.crud.recipes import (
+    AsyncQuerier,
+    CreateRecipeIngredientsForRecipesParams,
+    CreateRecipesParams,
+)
+from src.dependencies import create_db_connection
+from src.logger import get_logger
+from src.schemas import Recipe, RecipeCreate
+from src.services.ingredients import canonicalize_ingredient_names
+from src.services.maintenance import add_months, ensure_cooking_log_partitions
+from src.services.recipe import (
+    invalidate_recipe_filter_options,
+    populate_recipe_data_in_chunks,
+)
+from src.services.seasonality import update_recipe_seasonality
+from src.settings import settings
+
+logger = get_logger(__name__)
+
+ARCHIVE_CHUNK_SIZE = 100
+NO_PARENT_RECIPE_ID = UUID(int=0)
+
+
+class RecipeArchiveHeader(BaseModel):
+    format: Literal["recipebox"]
+    version: Literal[1]
+    exported_at: datetime
+
+
+class ArchivedRecipe(RecipeCreate):
+    id: UUID
+    cooked_at: list[datetime]
+
+
+class ImportedRecipe(ArchivedRecipe):
+    ## only checked on import, since each cook month gets a partition; export
+    ## writes out whatever is already stored
+    @field_validator("cooked_at")
+    @classmethod
+    def cooked_at_within_partition_range(
+        cls, cooked_at: list[datetime]
+    ) -> list[datetime]:
+        earliest = settings.cooking_log_earliest_month
+        latest = add_months(
+            datetime.now(UTC).date(), settings.cooking_log_partition_months_ahead
+        )
+
+        for c in cooked_at:
+            if not earliest <= c.astimezone(UTC).date() < latest:
+                raise ValueError(
+                    f"cooked_at {c.isoformat()} is outside {earliest} to {latest}"
+                )
+
+        return cooked_at
+
+
+def _to_archived_recipe(recipe: Recipe, cooked_at: list[datetime]) -> ArchivedRecipe:
+    return ArchivedRecipe.model_validate(
+        {**recipe.model_dump(), "cooked_at": cooked_at},
+    )
+
+
+async def export_recipe_archive(user_id: UUID) -> AsyncGenerator[bytes]:
+    ## gzip-framed deflate stream, written incrementally as each chunk of
+    ## recipes is hydrated
+    compressor = zlib.compressobj(wbits=31)
+
+    header = RecipeArchiveHeader(
+        format="recipebox", version=1, exported_at=datetime.now(UTC)
+    )
+    yield compressor.compress(header.model_dump_json().encode() + b"\n")
+
+    async with create_db_connection() as conn, conn.begin():
+        db = AsyncQuerier(conn)
+
+        async for chunk in populate_recipe_data_in_chunks(
+            db=db,
+            recipes=db.list_recipes_by_user(userid=user_id),
+            chunk_size=ARCHIVE_CHUNK_SIZE,
+        ):
+            recipe_id_to_cooked_at = defaultdict[UUID, list[datetime]](list)
+            async for log in db.list_recipe_cooking_log(
+                userid=user_id, recipeids=[recipe.id for recipe in chunk]
+            ):
+                recipe_id_to_cooked_at[log.recipe_id].append(log.cooked_at)
+
+            archived = [
+                _to_archived_recipe(recipe, recipe_id_to_cooked_at[recipe.id])
+                for recipe in chunk
+            ]
+            lines = b"".join(a.model_dump_json().encode() + b"\n" for a in archived)
+
+            if compressed := compressor.compress(lines):
+                yield compressed
+
+    yield compressor.flush()
+
+
+def _read_lines(archive: gzip.GzipFile, n: int) -> list[bytes]:
+    return list(islice(archive, n))
+
+
+def _invalid_archive(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+async def _import_recipes(user_id: UUID, recipes: list[ImportedRecipe]) -> None:
+    ids = [uuid4() for _ in recipes]
+
+    cooked_at = [c.astimezone(UTC).date() for r in recipes for c in r.cooked_at]
+    if cooked_at:
+        await ensure_cooking_log_partitions(
+            from_month=min(cooked_at), to_month=max(cooked_at)
+        )
+
+    ## each chunk commits on its own so a large import never holds one
+    ## long-running transaction
+    async with create_db_connection() as conn, conn.begin():
+        db = AsyncQuerier(conn)
+
+        [
+            _
+            async for _ in db.create_recipes(
+                CreateRecipesParams(
+                    ids=ids,
+                    names=[r.name for r in recipes],
+                    authors=[r.author for r in recipes],
+                    cuisines=[r.cuisine for r in recipes],
+                    locations=[r.location.model_dump_json() for r in recipes],
+                    timeestimateminutes=[r.time_estimate_minutes for r in recipes],
+                    notes=[r.notes or "" for r in recipes],
+                    types=[r.type for r in recipes],
+                    meals=[r.meal for r in recipes],
+                    parentrecipeids=[
+                        r.parent_recipe_id or NO_PARENT_RECIPE_ID for r in recipes
+                    ],
+                    userid=user_id,
+                )
+            )
+        ]
+
+        ingredients = [
+            (recipe_id, i)
+            for recipe_id, r in zip(ids, recipes, strict=True)
+            for i in r.ingredients
+        ]
+        canonical_names = await canonicalize_ingredient_names(
+            db=db, names=[i.name for _, i in ingredients]
+        )
+        await db.create_recipe_ingredients_for_recipes(
+            CreateRecipeIngredientsForRecipesParams(
+                recipeids=[recipe_id for recipe_id, _ in ingredients],
+                names=[i.name for _, i in ingredients],
+                quantities=[i.quantity for _, i in ingredients],
+                units=[i.units or "" for _, i in ingredients],
+                canonicalnames=canonical_names,
+            )
+        )
+
+        recipe_id_to_canonical_names: dict[UUID, list[str]] = {
+            recipe_id: [] for recipe_id in ids
+        }
+        for (recipe_id, _), name in zip(ingredients, canonical_names, strict=True):
+            recipe_id_to_canonical_names[recipe_id].append(name)
+        await update_recipe_seasonality(
+            db=db, recipe_id_to_canonical_names=recipe_id_to_canonical_names
+        )
+
+        instructions = [
+            (recipe_id, i)
+            for recipe_id, r in zip(ids, recipes, strict=True)
+            for i in r.instructions
+        ]
+        await db.create_recipe_instructions_for_recipes(
+            recipeids=[recipe_id for recipe_id, _ in instructions],
+            stepnumbers=[i.step_number for _, i in instructions],
+            contents=[i.content for _, i in instructions],
+        )
+
+        tags = [
+            (recipe_id, t)
+            for recipe_id, r in zip(ids, recipes, strict=True)
+            for t in r.tags
+        ]
+        await db.create_recipe_tags_for_recipes(
+            recipeids=[recipe_id for recipe_id, _ in tags],
+            tags=[t for _, t in tags],
+        )
+
+        dietary_restrictions_met = [
+            (recipe_id, d)
+            for recipe_id, r in zip(ids, recipes, strict=True)
+            for d in r.dietary_restrictions_met
+        ]
+        await db.create_recipe_dietary_restrictions_met_for_recipes(
+            recipeids=[recipe_id for recipe_id, _ in dietary_restrictions_met],
+            dietaryrestrictionsmets=[d for _, d in dietary_restrictions_met],
+        )
+
+        cooks = [
+            (recipe_id, c)
+            for recipe_id, r in zip(ids, recipes, strict=True)
+            for c in r.cooked_at
+        ]
+        await db.create_recipe_cooking_logs(
+            recipeids=[recipe_id for recipe_id, _ in cooks],
+            cookedats=[c for _, c in cooks],
+            userid=user_id,
+            feedcap=settings.activity_feed_cap,
+        )
+        await db.refresh_recipe_search_documents(recipeids=ids)
+        await ActivityQuerier(conn).trim_activity_feeds(
+            feedcap=settings.activity_feed_cap, actoruserid=user_id
+        )
+
+    invalidate_recipe_filter_options(user_id)
+
+
+async def import_recipe_archive(user_id: UUID, file: IO[bytes]) -> int:
+    imported = 0
+
+    with gzip.GzipFile(fileobj=file, mode="rb") as archive:
+        try:
+            header = await run_in_threadpool(_read_lines, archive, 1)
+            if not header:
+                raise _invalid_archive("archive is empty")
+
+            RecipeArchiveHeader.model_validate_json(header[0])
+
+            while lines := await run_in_threadpool(
+                _read_lines, archive, ARCHIVE_CHUNK_SIZE
+            ):
+                ## blank lines fail validation like any other malformed line
+                recipes = [ImportedRecipe.model_validate_json(line) for line in lines]
+                await _import_recipes(user_id=user_id, recipes=recipes)
+                imported += len(recipes)
+        except (gzip.BadGzipFile, EOFError, zlib.error, ValidationError) as e:
+            logger.warning(
+                "stopped recipe import for %s after %d recipes: %s",
+                user_id,
+                imported,
+                e,
+            )
+            raise _invalid_archive(
+                f"invalid archive, imported {imported} recipes before the error"
+            ) from e
+
+    return imported
@@ -0,0 +1,111 @@
+import asyncio
+import json
+from collections import defaultdict
+from collections.abc import AsyncGenerator
+from typing import Any, Literal
+from uuid import UUID
+
+import asyncpg  # type: ignore[import-untyped]
+from pydantic import BaseModel, ValidationError
+
+from src.logger import get_logger
+from src.settings import settings
+
+logger = get_logger(__name__)
+
+## must match the channel the queries in db/queries/events.sql notify on
+EVENTS_CHANNEL = "recipebox_events"
+EVENT_QUEUE_SIZE = 100
+LISTENER_RECONNECT_SECONDS = 5
+CLIENT_RETRY_MILLISECONDS = 5000
+
+
+class Event(BaseModel):
+    type: Literal["activity", "share_request"]
+    user_id: UUID
+    data: dict[str, Any]
+
+    def to_sse(self) -> bytes:
+        return f"event: {self.type}\ndata: {json.dumps(self.data)}\n\n".encode()
+
+
+## queues of the clients connected to this worker, by user
+subscribers = defaultdict[UUID, set[asyncio.Queue[Event]]](set)
+
+
+def _dispatch(_conn: object, _pid: int, _channel: str, payload: str) -> None:
+    try:
+        event = Event.model_validate_json(payload)
+    except ValidationError:
+        logger.warning("dropping malformed event: %s", payload)
+        return
+
+    for queue in subscribers.get(event.user_id, ()):
+        try:
+            queue.put_nowait(event)
+        except asyncio.QueueFull:
+            logger.warning("dropping %s event for %s", event.type, event.user_id)
+
+
+async def _listen(conn: Any) -> None:
+    closed = asyncio.Event()
+    conn.add_termination_listener(lambda _: closed.set())
+
+    await conn.add_listener(EVENTS_CHANNEL, _dispatch)
+    logger.info("listening for events on %s", EVENTS_CHANNEL)
+
+    while not closed.is_set():
+        try:
+            await asyncio.wait_for(
+                closed.wait(), timeout=settings.events_heartbeat_seconds
+            )
+        except TimeoutError:
+            ## a dropped connection isn't always noticed until it's used
+            await conn.execute("SELECT 1")
+
+    logger.warning("event listener connection closed")
+
+
+async def run_event_listener_forever() -> None:
+    ## one LISTEN connection per worker, outside the pool, fanned out to every
+    ## client connected to this worker
+    dsn = settings.database_url.get_secret_value().split("?")[0]
+
+    while True:
+        conn = None
+
+        try:
+            conn = await asyncpg.connect(dsn)
+            await _listen(conn)
+        except Exception:
+            logger.exception("event listener failed")
+        finally:
+            if conn is not None:
+                await conn.close()
+
+        await asyncio.sleep(LISTENER_RECONNECT_SECONDS)
+
+
+async def subscribe(user_id: UUID) -> AsyncGenerator[bytes]:
+    queue = asyncio.Queue[Event](maxsize=EVENT_QUEUE_SIZE)
+    subscribers[user_id].add(queue)
+
+    try:
+        ## events raised while a client is reconnecting are missed, so clients
+        ## refetch what they show once connected
+        yield f"retry: {CLIENT_RETRY_MILLISECONDS}\n\n".encode()
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=settings.events_heartbeat_seconds
+                )
+            except TimeoutError:
+                yield b": keepalive\n\n"
+                continue
+
+            yield event.to_sse()
+    finally:
+        subscribers[user_id].discard(queue)
+        if not subscribers[user_id]:
+            del subscribers[user_id]
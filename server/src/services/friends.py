@@ -0,0 +1,112 @@
+from collections import Counter
+from uuid import UUID
+
+from pydantic import BaseModel
+
+from src.cache import TTLCache
+from src.crud.users import AsyncQuerier
+from src.settings import settings
+
+## per-process, like the recipe filter options cache: friend requests and
+## accepts invalidate the local entries once they've committed, other workers
+## catch up within a TTL
+friend_ids_cache = TTLCache[UUID, frozenset[UUID]](
+    ttl_seconds=settings.friend_ids_cache_ttl_seconds,
+    max_size=settings.friend_ids_cache_max_size,
+)
+
+
+class FriendSuggestion(BaseModel):
+    id: UUID
+    name: str
+    degree: int
+    mutual_friend_count: int
+
+
+async def get_friend_ids_for_users(
+    db: AsyncQuerier, user_ids: list[UUID]
+) -> dict[UUID, frozenset[UUID]]:
+    friend_ids: dict[UUID, frozenset[UUID]] = {}
+    missing: list[UUID] = []
+
+    for user_id in user_ids:
+        if (cached := friend_ids_cache.get(user_id)) is not None:
+            friend_ids[user_id] = cached
+        else:
+            missing.append(user_id)
+
+    if missing:
+        fetched: dict[UUID, set[UUID]] = {user_id: set() for user_id in missing}
+        async for f in db.list_friend_ids_for_users(userids=missing):
+            fetched[f.user_id].add(f.friend_user_id)
+
+        for user_id, ids in fetched.items():
+            friend_ids[user_id] = frozenset(ids)
+            friend_ids_cache.set(user_id, friend_ids[user_id])
+
+    return friend_ids
+
+
+async def get_friend_ids(db: AsyncQuerier, user_id: UUID) -> frozenset[UUID]:
+    return (await get_friend_ids_for_users(db=db, user_ids=[user_id]))[user_id]
+
+
+def invalidate_friend_ids(*user_ids: UUID) -> None:
+    for user_id in user_ids:
+        friend_ids_cache.invalidate(user_id)
+
+
+async def suggest_friends(
+    db: AsyncQuerier, user_id: UUID, limit: int
+) -> list[FriendSuggestion]:
+    ## users with a friendship row either way (friends, pending requests) are
+    ## never suggested
+    seen = {user_id}
+    async for f in db.list_friendships_for_user(userid=user_id):
+        seen.update((f.user_id, f.friend_user_id))
+
+    ## breadth-first out from the user's friends, ranking each level's new users
+    ## by how many users in the previous level they're friends with (at degree
+    ## 2, their mutual friends). each level only expands its best-connected
+    ## users, so the walk stays bounded however large the graph is. sorted, so
+    ## a user with more friends than that always expands the same ones
+    frontier = sorted(await get_friend_ids(db=db, user_id=user_id))[
+        : settings.friend_suggestion_max_frontier
+    ]
+    ranked: list[tuple[UUID, int, int]] = []
+
+    for degree in range(2, settings.friend_suggestion_max_degree + 1):
+        if not frontier or len(ranked) >= limit:
+            break
+
+        friend_ids = await get_friend_ids_for_users(db=db, user_ids=frontier)
+        counts = Counter(
+            friend_id
+            for ids in friend_ids.values()
+            for friend_id in ids
+            if friend_id not in seen
+        )
+
+        level = counts.most_common(settings.friend_suggestion_max_frontier)
+        ranked.extend((candidate, degree, count) for candidate, count in level)
+        seen.update(counts)
+        frontier = [candidate for candidate, _ in level]
+
+    ## private users can't be found through search, so they aren't suggested
+    names = {
+        u.id: u.name
+        async for u in db.list_public_users_by_ids(
+            userids=[candidate for candidate, _, _ in ranked]
+        )
+    }
+
+    return [
+        FriendSuggestion(
+            id=candidate,
+            name=names[candidate],
+            degree=degree,
+            mutual_friend_count=count,
+        )
+        for candidate, degree, count in ranked
+        if candidate in names
+    ][:limit]
@@ -0,0 +1,104 @@
+import hashlib
+import json
+from typing import Annotated, Any
+from uuid import UUID
+
+from fastapi import Depends, Header, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.crud.idempotency import AsyncQuerier
+from src.dependencies import Connection, User
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+
+class IdempotentReplay(BaseModel):
+    response: Any
+
+
+class Idempotency:
+    def __init__(
+        self,
+        conn: AsyncConnection,
+        user_id: UUID,
+        key: str | None,
+        request: str,
+        body_hash: str,
+    ) -> None:
+        self._db = AsyncQuerier(conn)
+        self.user_id = user_id
+        self.key = key
+        self.request = request
+        self.body_hash = body_hash
+
+    async def replay(self) -> IdempotentReplay | None:
+        ## claims the key for this request, or returns the response saved by
+        ## the request that claimed it first. the claim is part of the request's
+        ## transaction, so a request that fails leaves the key unclaimed
+        if self.key is None:
+            return None
+
+        claim = await self._db.claim_idempotency_key(
+            userid=self.user_id,
+            key=self.key,
+            requestpath=self.request,
+            requestbodyhash=self.body_hash,
+        )
+
+        if claim is None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="a request with this Idempotency-Key is still in progress",
+            )
+
+        if claim.request_path != self.request:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+
+        ## keys claimed before bodies were hashed have no hash to compare
+        if claim.request_body_hash not in (None, self.body_hash):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used with a different body",
+            )
+
+        if claim.claimed:
+            return None
+
+        return IdempotentReplay(response=claim.response)
+
+    async def save(self, response: object) -> None:
+        if self.key is None:
+            return
+
+        await self._db.set_idempotency_key_response(
+            response=json.dumps(jsonable_encoder(response)),
+            userid=self.user_id,
+            key=self.key,
+        )
+
+
+async def get_idempotency(
+    request: Request,
+    conn: Connection,
+    user: User,
+    idempotency_key: Annotated[
+        str | None,
+        Header(alias="Idempotency-Key", max_length=IDEMPOTENCY_KEY_MAX_LENGTH),
+    ] = None,
+) -> Idempotency:
+    return Idempotency(
+        conn=conn,
+        user_id=user.id,
+        key=idempotency_key,
+        request=f"{request.method} {request.url.path}?{request.url.query}",
+        ## starlette caches the body, so the endpoint can still read it
+        body_hash=hashlib.sha256(await request.body()).hexdigest(),
+    )
+
+
+Idempotent = Annotated[Idempotency, Depends(get_idempotency)]
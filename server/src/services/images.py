@@ -0,0 +1,110 @@
+import asyncio
+import io
+from typing import IO, Literal
+
+from fastapi import HTTPException, UploadFile, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+from pillow_heif import register_heif_opener
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from src.settings import settings
+
+register_heif_opener()
+
+ImageMediaType = Literal["image/jpeg", "image/png", "image/gif", "image/webp"]
+
+## formats the model accepts as they are, so small enough images are sent
+## without being re-encoded
+PASSTHROUGH_MEDIA_TYPES: dict[str, ImageMediaType] = {
+    "jpeg": "image/jpeg",
+    "png": "image/png",
+    "gif": "image/gif",
+    "webp": "image/webp",
+}
+
+HEIF_BRANDS = {b"heic", b"heix", b"hevc", b"hevx", b"heim", b"heis", b"mif1", b"msf1"}
+
+
+class PreparedImage(BaseModel):
+    media_type: ImageMediaType
+    data: bytes
+
+
+def detect_image_format(head: bytes) -> str | None:
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    if head[4:8] == b"ftyp" and head[8:12] in HEIF_BRANDS:
+        return "heif"
+
+    return None
+
+
+def _unsupported_image(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail=detail
+    )
+
+
+def _prepare_image(file: IO[bytes]) -> PreparedImage:
+    ## uploads are already spooled to disk past a small size, so they're
+    ## decoded from the file rather than read into memory first
+    size = file.seek(0, io.SEEK_END)
+    if size > settings.recipe_image_max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail="images must be at most "
+            f"{settings.recipe_image_max_bytes // (1024 * 1024)}MB",
+        )
+
+    file.seek(0)
+    image_format = detect_image_format(file.read(16))
+    file.seek(0)
+
+    if image_format is None:
+        raise _unsupported_image("uploads must be JPEG, PNG, GIF, WebP or HEIC images")
+
+    try:
+        with Image.open(file) as image:
+            max_edge = settings.recipe_image_max_edge_pixels
+
+            if (
+                image_format in PASSTHROUGH_MEDIA_TYPES
+                and max(image.size) <= max_edge
+                and size <= settings.recipe_image_passthrough_max_bytes
+            ):
+                file.seek(0)
+                return PreparedImage(
+                    media_type=PASSTHROUGH_MEDIA_TYPES[image_format], data=file.read()
+                )
+
+            ## phone photos are stored sideways with an orientation tag, and
+            ## the model sees nothing past its max resolution anyway
+            prepared = ImageOps.exif_transpose(image)
+            prepared.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            output = io.BytesIO()
+            prepared.convert("RGB").save(
+                output,
+                format="JPEG",
+                quality=settings.recipe_image_jpeg_quality,
+                optimize=True,
+            )
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        raise _unsupported_image("could not read image") from e
+
+    return PreparedImage(media_type="image/jpeg", data=output.getvalue())
+
+
+async def prepare_recipe_images(files: list[UploadFile]) -> list[PreparedImage]:
+    ## decoding and resizing release the GIL, so images are prepared in
+    ## parallel on the threadpool without blocking the event loop
+    return await asyncio.gather(
+        *(run_in_threadpool(_prepare_image, file.file) for file in files)
+    )
@@ -0,0 +1,198 @@
+import re
+from uuid import UUID
+
+from src.crud.recipes import AsyncQuerier
+from src.dependencies import create_db_connection
+from src.logger import get_logger
+from src.settings import settings
+
+logger = get_logger(__name__)
+
+PARENTHETICAL = re.compile(r"\([^)]*\)")
+WORD = re.compile(r"[a-z]+(?:-[a-z]+)*")
+
+PREPARATION_WORDS = {
+    "and",
+    "beaten",
+    "boneless",
+    "canned",
+    "chopped",
+    "coarsely",
+    "cooked",
+    "crushed",
+    "cubed",
+    "cup",
+    "cups",
+    "deveined",
+    "diced",
+    "divided",
+    "drained",
+    "extra",
+    "finely",
+    "fresh",
+    "freshly",
+    "grated",
+    "halved",
+    "large",
+    "lb",
+    "lbs",
+    "mashed",
+    "medium",
+    "melted",
+    "minced",
+    "of",
+    "optional",
+    "ounce",
+    "ounces",
+    "oz",
+    "packed",
+    "peeled",
+    "pinch",
+    "pound",
+    "pounds",
+    "quartered",
+    "rinsed",
+    "ripe",
+    "roughly",
+    "shredded",
+    "skinless",
+    "sliced",
+    "small",
+    "softened",
+    "tablespoon",
+    "tablespoons",
+    "taste",
+    "tbsp",
+    "teaspoon",
+    "teaspoons",
+    "thinly",
+    "to",
+    "toasted",
+    "trimmed",
+    "tsp",
+    "uncooked",
+}
+
+## words naming a part of an ingredient rather than the ingredient itself,
+## dropped from the end of a name ("garlic clove", "basil leaf")
+PART_WORDS = {"clove", "head", "leaf", "sprig", "stalk", "stem"}
+
+IRREGULAR_PLURALS = {"halves": "half", "leaves": "leaf", "loaves": "loaf"}
+
+UNCOUNTABLE_WORDS = {
+    "asparagus",
+    "brussels",
+    "couscous",
+    "grits",
+    "hummus",
+    "molasses",
+    "swiss",
+}
+
+INGREDIENT_SYNONYMS = {
+    "all-purpose flour": "flour",
+    "aubergine": "eggplant",
+    "bay leaf": "bay leaf",
+    "brown onion": "onion",
+    "capsicum": "bell pepper",
+    "coriander leaf": "cilantro",
+    "courgette": "zucchini",
+    "garbanzo bean": "chickpea",
+    "ground cinnamon": "cinnamon",
+    "ground cumin": "cumin",
+    "kosher salt": "salt",
+    "parmesan cheese": "parmesan",
+    "parmigiano reggiano": "parmesan",
+    "salted butter": "butter",
+    "scallion": "green onion",
+    "sea salt": "salt",
+    "spring onion": "green onion",
+    "unsalted butter": "butter",
+    "virgin olive oil": "olive oil",
+    "white onion": "onion",
+    "yellow onion": "onion",
+}
+
+
+def singularize(word: str) -> str:
+    if word in IRREGULAR_PLURALS:
+        return IRREGULAR_PLURALS[word]
+
+    if word in UNCOUNTABLE_WORDS or word.endswith(("ss", "us", "is")):
+        return word
+
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+
+    if word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+
+    if word.endswith("s"):
+        return word[:-1]
+
+    return word
+
+
+def normalize_ingredient_name(name: str) -> str | None:
+    ## "Garlic cloves, minced" -> "garlic", "scallions (sliced)" -> "green onion"
+    name = PARENTHETICAL.sub("", name.lower()).split(",")[0]
+
+    words = [
+        singularize(word)
+        for word in WORD.findall(name)
+        if word not in PREPARATION_WORDS
+    ]
+
+    if (
+        len(words) > 1
+        and words[-1] in PART_WORDS
+        and " ".join(words) not in INGREDIENT_SYNONYMS
+    ):
+        words.pop()
+
+    normalized = " ".join(words)
+
+    return INGREDIENT_SYNONYMS.get(normalized, normalized) or None
+
+
+async def canonicalize_ingredient_names(
+    db: AsyncQuerier, names: list[str]
+) -> list[str]:
+    ## an empty canonical name leaves the ingredient without a canonical id
+    canonical_names = [normalize_ingredient_name(name) or "" for name in names]
+
+    await db.create_canonical_ingredients(names=canonical_names)
+
+    return canonical_names
+
+
+async def backfill_canonical_ingredients() -> int:
+    canonicalized = 0
+    after_id = UUID(int=0)
+
+    while True:
+        async with create_db_connection() as conn, conn.begin():
+            db = AsyncQuerier(conn)
+
+            batch = [
+                i
+                async for i in db.list_uncanonicalized_recipe_ingredients(
+                    afterid=after_id,
+                    batchsize=settings.ingredient_backfill_batch_size,
+                )
+            ]
+
+            if not batch:
+                return canonicalized
+
+            await db.set_recipe_ingredient_canonical_ingredients(
+                ids=[i.id for i in batch],
+                canonicalnames=await canonicalize_ingredient_names(
+                    db=db, names=[i.name for i in batch]
+                ),
+            )
+
+        canonicalized += len(batch)
+        after_id = batch[-1].id
+
+        logger.info("canonicalized %d recipe ingredients", canonicalized)
@@ -0,0 +1,130 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import UTC, date, datetime
+
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.crud.activity import AsyncQuerier as ActivityQuerier
+from src.crud.idempotency import AsyncQuerier as IdempotencyQuerier
+from src.crud.notifications import AsyncQuerier as NotificationQuerier
+from src.crud.sharing import AsyncQuerier as SharingQuerier
+from src.dependencies import create_db_connection
+from src.logger import get_logger
+from src.services.ingredients import backfill_canonical_ingredients
+from src.services.seasonality import backfill_recipe_seasonality
+from src.settings import settings
+
+logger = get_logger(__name__)
+
+
+def add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+async def ensure_cooking_log_partitions(from_month: date, to_month: date) -> None:
+    ## partition DDL locks the parent table, so it always runs in its own short
+    ## transaction rather than inside the caller's
+    async with create_db_connection() as conn, conn.begin():
+        await ActivityQuerier(conn).ensure_recipe_cooking_log_partitions(
+            frommonth=from_month, tomonth=to_month
+        )
+
+
+async def rollup_cooking_log(before_month: date) -> None:
+    async with create_db_connection() as conn, conn.begin():
+        await ActivityQuerier(conn).rollup_recipe_cooking_log(beforemonth=before_month)
+
+
+async def run_cooking_log_maintenance() -> None:
+    today = datetime.now(UTC).date()
+
+    await ensure_cooking_log_partitions(
+        from_month=today,
+        to_month=add_months(today, settings.cooking_log_partition_months_ahead),
+    )
+
+    if settings.cooking_log_retention_months is None:
+        return
+
+    await rollup_cooking_log(
+        before_month=add_months(today, -settings.cooking_log_retention_months)
+    )
+
+
+async def sweep_in_batches(
+    delete_batch: Callable[[AsyncConnection], Awaitable[int]],
+) -> int:
+    swept = 0
+
+    ## small batches, each in its own transaction, skipping rows another
+    ## worker is already deleting
+    while True:
+        async with create_db_connection() as conn, conn.begin():
+            deleted = await delete_batch(conn)
+
+        swept += deleted
+
+        if deleted < settings.expired_row_sweep_batch_size:
+            return swept
+
+
+async def sweep_expired_share_requests() -> int:
+    swept = await sweep_in_batches(
+        lambda conn: SharingQuerier(conn).delete_expired_recipe_share_requests(
+            batchsize=settings.expired_row_sweep_batch_size
+        )
+    )
+
+    if swept:
+        logger.info("swept %d expired share requests", swept)
+
+    return swept
+
+
+async def sweep_stale_notifications() -> int:
+    swept = await sweep_in_batches(
+        lambda conn: NotificationQuerier(conn).delete_stale_notifications(
+            batchsize=settings.expired_row_sweep_batch_size
+        )
+    )
+
+    if swept:
+        logger.info("swept %d stale notifications", swept)
+
+    return swept
+
+
+async def sweep_expired_idempotency_keys() -> int:
+    swept = await sweep_in_batches(
+        lambda conn: IdempotencyQuerier(conn).delete_expired_idempotency_keys(
+            ttlseconds=settings.idempotency_key_ttl_seconds,
+            batchsize=settings.expired_row_sweep_batch_size,
+        )
+    )
+
+    if swept:
+        logger.info("swept %d expired idempotency keys", swept)
+
+    return swept
+
+
+MAINTENANCE_TASKS: list[tuple[str, Callable[[], Awaitable[object]]]] = [
+    ("cooking log maintenance", run_cooking_log_maintenance),
+    ("canonical ingredient backfill", backfill_canonical_ingredients),
+    ("recipe seasonality backfill", backfill_recipe_seasonality),
+    ("expired share request sweep", sweep_expired_share_requests),
+    ("stale notification sweep", sweep_stale_notifications),
+    ("expired idempotency key sweep", sweep_expired_idempotency_keys),
+]
+
+
+async def run_maintenance_forever() -> None:
+    while True:
+        for name, task in MAINTENANCE_TASKS:
+            try:
+                await task()
+            except Exception:
+                logger.exception("%s failed", name)
+
+        await asyncio.sleep(settings.maintenance_interval_seconds)
@@ -0,0 +1,242 @@
+import asyncio
+from typing import Any, Literal
+from uuid import UUID
+
+from aiohttp import ClientError, ClientSession, ClientTimeout
+from pydantic import BaseModel, ValidationError
+
+from src.crud.notifications import AsyncQuerier, ClaimDueNotificationsRow
+from src.dependencies import create_db_connection
+from src.logger import get_logger
+from src.settings import settings
+
+logger = get_logger(__name__)
+
+## limits Expo puts on a single push / receipts request
+EXPO_PUSH_CHUNK_SIZE = 100
+EXPO_RECEIPT_CHUNK_SIZE = 1000
+EXPO_REQUEST_TIMEOUT = ClientTimeout(total=30)
+
+DEVICE_NOT_REGISTERED = "DeviceNotRegistered"
+
+
+class ExpoPushStatus(BaseModel):
+    status: Literal["ok", "error"]
+    id: str | None = None
+    message: str | None = None
+    details: dict[str, Any] | None = None
+
+    @property
+    def error(self) -> str:
+        error = (self.details or {}).get("error")
+        return str(error or self.message or "unknown error")
+
+
+class ExpoPushTickets(BaseModel):
+    data: list[ExpoPushStatus]
+
+
+class ExpoPushReceipts(BaseModel):
+    data: dict[str, ExpoPushStatus]
+
+
+class NotificationErrors(BaseModel):
+    ids: list[UUID] = []
+    errors: list[str] = []
+    failed: list[bool] = []
+    dead_tokens: list[str] = []
+
+    def add(
+        self, notification_id: UUID, error: str, failed: bool, token: str | None
+    ) -> None:
+        self.ids.append(notification_id)
+        self.errors.append(error)
+        self.failed.append(failed)
+
+        ## Expo won't deliver to this token again, so stop sending to it
+        if error == DEVICE_NOT_REGISTERED and token is not None:
+            self.dead_tokens.append(token)
+
+    async def record(self, db: AsyncQuerier) -> None:
+        await db.record_notification_errors(
+            ids=self.ids, errors=self.errors, failed=self.failed
+        )
+
+        if self.dead_tokens:
+            await db.clear_expo_push_tokens(tokens=self.dead_tokens)
+
+
+async def _post_to_expo(session: ClientSession, path: str, payload: object) -> bytes:
+    headers = {"Accept": "application/json"}
+    if settings.expo_access_token is not None:
+        token = settings.expo_access_token.get_secret_value()
+        headers["Authorization"] = f"Bearer {token}"
+
+    async with session.post(
+        f"{settings.expo_push_api_url}{path}",
+        json=payload,
+        headers=headers,
+        raise_for_status=True,
+    ) as response:
+        return await response.read()
+
+
+def _to_expo_message(notification: ClaimDueNotificationsRow) -> dict[str, Any]:
+    return {
+        "to": notification.expo_push_token,
+        "title": notification.title,
+        "body": notification.body,
+        "data": notification.data,
+        "sound": "default",
+    }
+
+
+async def send_due_notifications(session: ClientSession) -> int:
+    ## claiming commits on its own, so no transaction is held open while
+    ## waiting on Expo
+    async with create_db_connection() as conn, conn.begin():
+        claimed = [
+            n
+            async for n in AsyncQuerier(conn).claim_due_notifications(
+                batchsize=settings.notification_batch_size,
+                backoffseconds=settings.notification_retry_backoff_seconds,
+            )
+        ]
+
+    if not claimed:
+        return 0
+
+    sent_ids: list[UUID] = []
+    ticket_ids: list[str] = []
+    errors = NotificationErrors()
+
+    deliverable: list[ClaimDueNotificationsRow] = []
+    for n in claimed:
+        if n.expo_push_token is None:
+            errors.add(n.id, "user has no push token", failed=True, token=None)
+        else:
+            deliverable.append(n)
+
+    for start in range(0, len(deliverable), EXPO_PUSH_CHUNK_SIZE):
+        chunk = deliverable[start : start + EXPO_PUSH_CHUNK_SIZE]
+
+        try:
+            tickets = ExpoPushTickets.model_validate_json(
+                await _post_to_expo(
+                    session, "/send", [_to_expo_message(n) for n in chunk]
+                )
+            )
+        except (ClientError, TimeoutError, ValidationError) as e:
+            logger.warning("failed to send %d notifications: %s", len(chunk), e)
+            for n in chunk:
+                errors.add(
+                    n.id,
+                    str(e),
+                    failed=n.attempts >= settings.notification_max_attempts,
+                    token=n.expo_push_token,
+                )
+            continue
+
+        ## tickets are matched to messages by position, so if the counts differ
+        ## none of them can be trusted. the messages may have gone out, so
+        ## they're retried like any other failed send
+        if len(tickets.data) != len(chunk):
+            logger.warning(
+                "got %d push tickets for %d notifications",
+                len(tickets.data),
+                len(chunk),
+            )
+            for n in chunk:
+                errors.add(
+                    n.id,
+                    "push ticket count mismatch",
+                    failed=n.attempts >= settings.notification_max_attempts,
+                    token=n.expo_push_token,
+                )
+            continue
+
+        for n, ticket in zip(chunk, tickets.data, strict=True):
+            if ticket.status == "ok" and ticket.id is not None:
+                sent_ids.append(n.id)
+                ticket_ids.append(ticket.id)
+            else:
+                errors.add(
+                    n.id,
+                    ticket.error,
+                    failed=ticket.error == DEVICE_NOT_REGISTERED
+                    or n.attempts >= settings.notification_max_attempts,
+                    token=n.expo_push_token,
+                )
+
+    async with create_db_connection() as conn, conn.begin():
+        db = AsyncQuerier(conn)
+
+        await db.mark_notifications_sent(ids=sent_ids, ticketids=ticket_ids)
+        await errors.record(db)
+
+    return len(claimed)
+
+
+async def check_notification_receipts(session: ClientSession) -> int:
+    async with create_db_connection() as conn, conn.begin():
+        sent = [
+            n
+            async for n in AsyncQuerier(conn).list_sent_notifications(
+                receiptdelayseconds=settings.notification_receipt_delay_seconds,
+                batchsize=settings.notification_batch_size,
+            )
+        ]
+
+    delivered_ids: list[UUID] = []
+    errors = NotificationErrors()
+
+    for start in range(0, len(sent), EXPO_RECEIPT_CHUNK_SIZE):
+        chunk = sent[start : start + EXPO_RECEIPT_CHUNK_SIZE]
+
+        try:
+            receipts = ExpoPushReceipts.model_validate_json(
+                await _post_to_expo(
+                    session, "/getReceipts", {"ids": [n.ticket_id for n in chunk]}
+                )
+            )
+        except (ClientError, TimeoutError, ValidationError) as e:
+            logger.warning("failed to fetch %d push receipts: %s", len(chunk), e)
+            continue
+
+        for n in chunk:
+            ## receipts that aren't ready yet are checked again next time
+            receipt = receipts.data.get(n.ticket_id or "")
+            if receipt is None:
+                continue
+
+            if receipt.status == "ok":
+                delivered_ids.append(n.id)
+            else:
+                errors.add(n.id, receipt.error, failed=True, token=n.expo_push_token)
+
+    if not delivered_ids and not errors.ids:
+        return 0
+
+    async with create_db_connection() as conn, conn.begin():
+        db = AsyncQuerier(conn)
+
+        await db.delete_notifications(ids=delivered_ids)
+        await errors.record(db)
+
+    return len(delivered_ids) + len(errors.ids)
+
+
+async def run_notification_worker_forever() -> None:
+    async with ClientSession(timeout=EXPO_REQUEST_TIMEOUT) as session:
+        while True:
+            claimed = 0
+
+            try:
+                claimed = await send_due_notifications(session)
+                await check_notification_receipts(session)
+            except Exception:
+                logger.exception("notification delivery failed")
+
+            ## keep draining without waiting while there's a backlog
+            if claimed < settings.notification_batch_size:
+                await asyncio.sleep(settings.notification_poll_interval_seconds)
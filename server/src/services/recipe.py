@@ -1,20 +1,82 @@
 from collections import defaultdict
+from collections.abc import AsyncGenerator, AsyncIterator
 from typing import overload
 from uuid import UUID
 
 from fastapi import APIRouter, HTTPException, status
-
-from src.crud.models import DietaryRestriction, RecipeIngredient, RecipeInstruction
+from pydantic import BaseModel
+
+from src.cache import TTLCache
+from src.crud.models import (
+    DietaryRestriction,
+    Meal,
+    RecipeIngredient,
+    RecipeInstruction,
+    RecipeType,
+)
 from src.crud.models import Recipe as RecipeModel
-from src.crud.recipes import AsyncQuerier, CreateRecipeParams
+from src.crud.recipes import (
+    AsyncQuerier,
+    CreateRecipeIngredientsParams,
+    CreateRecipeParams,
+)
 from src.dependencies import User
 from src.logger import get_logger
 from src.schemas import BaseRecipeCreate, Recipe, RecipeLocation
+from src.services.ingredients import canonicalize_ingredient_names
+from src.services.seasonality import update_recipe_seasonality
+from src.settings import settings
 
 recipes = APIRouter(prefix="/recipes")
 logger = get_logger(__name__)
 
 
+class RecipeFilterOptions(BaseModel):
+    meals: list[Meal]
+    types: list[RecipeType]
+    cuisines: list[str]
+    meal_counts: dict[Meal, int]
+    type_counts: dict[RecipeType, int]
+    cuisine_counts: dict[str, int]
+
+
+## per-process, so other workers can serve options up to one TTL stale after a
+## write; writes invalidate the local entry immediately
+recipe_filter_options_cache = TTLCache[UUID, RecipeFilterOptions](
+    ttl_seconds=settings.filter_options_cache_ttl_seconds,
+    max_size=settings.filter_options_cache_max_size,
+)
+
+
+async def get_recipe_filter_options(
+    db: AsyncQuerier, user_id: UUID
+) -> RecipeFilterOptions:
+    if cached := recipe_filter_options_cache.get(user_id):
+        return cached
+
+    counts = defaultdict[str, dict[str, int]](dict)
+    async for row in db.list_recipe_facet_counts(userid=user_id):
+        counts[row.facet][row.value] = row.recipe_count
+
+    options = RecipeFilterOptions.model_validate(
+        {
+            "meals": list(counts["meal"]),
+            "types": list(counts["type"]),
+            "cuisines": list(counts["cuisine"]),
+            "meal_counts": counts["meal"],
+            "type_counts": counts["type"],
+            "cuisine_counts": counts["cuisine"],
+        }
+    )
+    recipe_filter_options_cache.set(user_id, options)
+
+    return options
+
+
+def invalidate_recipe_filter_options(user_id: UUID) -> None:
+    recipe_filter_options_cache.invalidate(user_id)
+
+
 @overload
 async def populate_recipe_data(db: AsyncQuerier, recipes: RecipeModel) -> Recipe: ...
 
@@ -72,6 +134,24 @@ async def populate_recipe_data(
     return to_return
 
 
+async def populate_recipe_data_in_chunks(
+    db: AsyncQuerier,
+    recipes: AsyncIterator[RecipeModel],
+    chunk_size: int,
+) -> AsyncGenerator[list[Recipe]]:
+    chunk: list[RecipeModel] = []
+
+    async for recipe in recipes:
+        chunk.append(recipe)
+
+        if len(chunk) >= chunk_size:
+            yield await populate_recipe_data(db=db, recipes=chunk)
+            chunk = []
+
+    if chunk:
+        yield await populate_recipe_data(db=db, recipes=chunk)
+
+
 async def ingest_recipe(
     db: AsyncQuerier,
     user: User,
@@ -100,11 +180,18 @@ async def ingest_recipe(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Could not create recipe"
         )
 
+    canonical_names = await canonicalize_ingredient_names(
+        db=db, names=[i.name for i in params.ingredients]
+    )
+
     ingredients = db.create_recipe_ingredients(
-        recipeid=recipe.id,
-        names=[i.name for i in params.ingredients],
-        quantities=[i.quantity for i in params.ingredients],
-        units=[i.units or "" for i in params.ingredients],
+        CreateRecipeIngredientsParams(
+            recipeid=recipe.id,
+            names=[i.name for i in params.ingredients],
+            quantities=[i.quantity for i in params.ingredients],
+            units=[i.units or "" for i in params.ingredients],
+            canonicalnames=canonical_names,
+        )
     )
 
     dietary_restrictions_met = db.create_recipe_dietary_restrictions_met(
@@ -123,7 +210,7 @@ async def ingest_recipe(
         tags=params.tags,
     )
 
-    return Recipe.from_db(
+    result = Recipe.from_db(
         recipe=recipe,
         ingredients=[i async for i in ingredients],
         dietary_restrictions_met=[
@@ -132,3 +219,10 @@ async def ingest_recipe(
         instructions=[i async for i in instructions],
         tags=[t.tag async for t in tags],
     )
+
+    await db.refresh_recipe_search_documents(recipeids=[recipe.id])
+    await update_recipe_seasonality(
+        db=db, recipe_id_to_canonical_names={recipe.id: canonical_names}
+    )
+
+    return result
@@ -0,0 +1,121 @@
+import json
+from collections import defaultdict
+from functools import cache
+from pathlib import Path
+from uuid import UUID
+
+from src.crud.models import User
+from src.crud.recipes import AsyncQuerier
+from src.dependencies import create_db_connection
+from src.logger import get_logger
+from src.services.ingredients import normalize_ingredient_name
+from src.settings import settings
+
+logger = get_logger(__name__)
+
+SEASONAL_CALENDARS_DIR = Path(__file__).parent.parent / "data" / "seasonal_calendars"
+
+
+## every calendar shipped in the calendars directory, by file name
+SEASONAL_REGIONS = sorted(p.stem for p in SEASONAL_CALENDARS_DIR.glob("*.json"))
+
+
+def month_bit(month: int) -> int:
+    return 1 << (month - 1)
+
+
+@cache
+def load_seasonal_calendar(region: str) -> dict[str, int]:
+    ## calendars map ingredient names to the months they peak in, and are keyed
+    ## here by canonical name with the months packed into a bitmask
+    with (SEASONAL_CALENDARS_DIR / f"{region}.json").open() as f:
+        peak_months: dict[str, list[int]] = json.load(f)
+
+    calendar = defaultdict[str, int](int)
+    for ingredient, months in peak_months.items():
+        if name := normalize_ingredient_name(ingredient):
+            for month in months:
+                calendar[name] |= month_bit(month)
+
+    return dict(calendar)
+
+
+def ingredient_peak_months(calendar: dict[str, int], canonical_name: str) -> int:
+    ## match the longest calendar entry the name ends with, so "cherry tomato"
+    ## picks up "tomato" but "garlic powder" doesn't pick up "garlic"
+    words = canonical_name.split()
+
+    for start in range(len(words)):
+        if (months := calendar.get(" ".join(words[start:]))) is not None:
+            return months
+
+    return 0
+
+
+def recipe_peak_months(region: str, canonical_names: list[str]) -> int:
+    calendar = load_seasonal_calendar(region)
+
+    peak_months = 0
+    for name in canonical_names:
+        peak_months |= ingredient_peak_months(calendar, name)
+
+    return peak_months
+
+
+def user_seasonal_region(user: User) -> str:
+    return user.seasonal_region or settings.seasonal_calendar_region
+
+
+async def update_recipe_seasonality(
+    db: AsyncQuerier, recipe_id_to_canonical_names: dict[UUID, list[str]]
+) -> None:
+    ## one row per recipe per region, so any user's region can rank any recipe
+    rows = [
+        (recipe_id, region, recipe_peak_months(region, names))
+        for recipe_id, names in recipe_id_to_canonical_names.items()
+        for region in SEASONAL_REGIONS
+    ]
+
+    await db.upsert_recipe_seasonality(
+        recipeids=[recipe_id for recipe_id, _, _ in rows],
+        regions=[region for _, region, _ in rows],
+        peakmonths=[peak_months for _, _, peak_months in rows],
+    )
+
+
+async def backfill_recipe_seasonality() -> int:
+    backfilled = 0
+    after_id = UUID(int=0)
+
+    while True:
+        async with create_db_connection() as conn, conn.begin():
+            db = AsyncQuerier(conn)
+
+            batch = [
+                r
+                async for r in db.list_recipes_missing_seasonality(
+                    regions=SEASONAL_REGIONS,
+                    afterid=after_id,
+                    batchsize=settings.seasonality_backfill_batch_size,
+                )
+            ]
+
+            if not batch:
+                return backfilled
+
+            await update_recipe_seasonality(
+                db=db,
+                recipe_id_to_canonical_names={
+                    r.id: [
+                        name
+                        for i in r.ingredient_names
+                        if (name := normalize_ingredient_name(i))
+                    ]
+                    for r in batch
+                },
+            )
+
+        backfilled += len(batch)
+        after_id = batch[-1].id
+
+        logger.info("computed seasonality for %d recipes", backfilled)
@@ -1,3 +1,5 @@
+from datetime import date
+
 from pydantic import SecretStr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -10,9 +12,83 @@ class Settings(BaseSettings):
         "your-anthropic-api-key-change-this-in-production"
     )
 
+    ## text prompts up to this many characters (e.g. a page's JSON-LD) are
+    ## extracted with the fast model first, falling back to the default model
+    ## if its output doesn't validate; images always use the default model
+    recipe_extraction_model: str = "claude-sonnet-4-5"
+    recipe_extraction_fast_model: str = "claude-haiku-4-5"
+    recipe_extraction_fast_max_chars: int = 8000
+    recipe_extraction_max_tokens: int = 4096
+
+    ## cookbook photos are downsized to the largest resolution the model uses
+    ## and re-encoded as JPEG, unless they're already small enough to send as is
+    recipe_image_max_bytes: int = 20 * 1024 * 1024
+    recipe_image_max_edge_pixels: int = 1568
+    recipe_image_passthrough_max_bytes: int = 1024 * 1024
+    recipe_image_jpeg_quality: int = 85
+    ## the whole upload is capped as it's received, before it's spooled to disk
+    recipe_image_upload_max_bytes: int = 60 * 1024 * 1024
+
     jwt_secret_key: SecretStr = SecretStr("your-secret-key-change-this-in-production")
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 60 * 24 * 7 * 52  ## 1 year
 
+    ## serialize recipe responses straight to JSON bytes, skipping FastAPI's
+    ## response model validation and `jsonable_encoder`
+    fast_json_responses: bool = False
+
+    ## max number of friend cooks kept in each user's materialized activity feed
+    activity_feed_cap: int = 500
+
+    ## recipe_cooking_log is partitioned by month; keep this many future months
+    ## created, and optionally drop months older than the retention window
+    ## (their counts are kept in recipe_monthly_cook_count)
+    cooking_log_partition_months_ahead: int = 3
+    cooking_log_retention_months: int | None = None
+    ## imported cook dates before this or past the months kept ahead are
+    ## rejected, since each month in range gets a partition
+    cooking_log_earliest_month: date = date(2000, 1, 1)
+    maintenance_interval_seconds: int = 60 * 60
+    expired_row_sweep_batch_size: int = 1000
+
+    ## responses saved for an Idempotency-Key are replayed to retries for this
+    ## long, then swept by the maintenance job
+    idempotency_key_ttl_seconds: float = 24 * 60 * 60
+
+    ## recipe ingredients written before canonicalization existed are mapped
+    ## to canonical ingredients by the maintenance job, this many at a time
+    ingredient_backfill_batch_size: int = 1000
+
+    ## seasonal ranking uses src/data/seasonal_calendars/<region>.json for
+    ## each user's chosen region, falling back to this one; recipes get their
+    ## peak months computed for a newly added calendar by the maintenance job
+    seasonal_calendar_region: str = "northeast_us"
+    seasonality_backfill_batch_size: int = 500
+
+    ## notifications are queued in notification_outbox and pushed to Expo by a
+    ## background worker; point the API url at a stub server to test delivery
+    expo_push_api_url: str = "https://exp.host/--/api/v2/push"
+    expo_access_token: SecretStr | None = None
+    notification_batch_size: int = 500
+    notification_retry_backoff_seconds: float = 30
+    notification_max_attempts: int = 5
+    notification_receipt_delay_seconds: float = 15 * 60
+    notification_poll_interval_seconds: float = 5
+
+    ## live updates are sent over SSE from a per-worker LISTEN connection; both
+    ## the listener and idle client streams are pinged this often
+    events_heartbeat_seconds: float = 15
+
+    filter_options_cache_ttl_seconds: float = 60
+    filter_options_cache_max_size: int = 10_000
+
+    friend_ids_cache_ttl_seconds: float = 60
+    friend_ids_cache_max_size: int = 10_000
+
+    ## friend suggestions walk at most this far out from the user's friends,
+    ## expanding only the best-connected users at each step
+    friend_suggestion_max_degree: int = 3
+    friend_suggestion_max_frontier: int = 1000
+
 
 settings = Settings()
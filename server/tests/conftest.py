@@ -0,0 +1,77 @@
+import asyncio
+import os
+from collections.abc import Callable, Iterator
+from uuid import UUID, uuid4
+
+import pytest
+import sqlalchemy
+
+## tests marked `db` run against a migrated database (e.g. the
+## compose db after `make migrate`) named by TEST_DATABASE_URL, and are
+## skipped without one
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+else:
+    ## the engine is created on import, but never connects in this case
+    os.environ.setdefault("DATABASE_URL", "postgresql://localhost/recipebox")
+
+from src.crud.models import User, UserPrivacyPreference
+from src.crud.users import AsyncQuerier as UserQuerier
+from src.dependencies import close_db_engine, create_db_connection
+
+
+def pytest_collection_modifyitems(items: list[pytest.Item]) -> None:
+    if TEST_DATABASE_URL:
+        return
+
+    skip = pytest.mark.skip(reason="TEST_DATABASE_URL is not set")
+    for item in items:
+        if item.get_closest_marker("db"):
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="session")
+def runner() -> Iterator[asyncio.Runner]:
+    ## pooled connections belong to the loop that opened them, so database
+    ## tests share one loop for the whole session
+    with asyncio.Runner() as runner:
+        yield runner
+        runner.run(close_db_engine())
+
+
+async def _create_user() -> User:
+    async with create_db_connection() as conn, conn.begin():
+        user = await UserQuerier(conn).create_user(
+            email=f"{uuid4()}@example.com",
+            name="Test User",
+            privacypreference=UserPrivacyPreference.PUBLIC,
+        )
+
+    assert user is not None
+    return user
+
+
+async def _delete_users(user_ids: list[UUID]) -> None:
+    ## everything a user owns cascades from the user row
+    async with create_db_connection() as conn, conn.begin():
+        await conn.execute(
+            sqlalchemy.text('DELETE FROM "user" WHERE id = ANY(:ids)'),
+            {"ids": user_ids},
+        )
+
+
+@pytest.fixture
+def create_user(runner: asyncio.Runner) -> Iterator[Callable[[], User]]:
+    created: list[UUID] = []
+
+    def create() -> User:
+        user = runner.run(_create_user())
+        created.append(user.id)
+        return user
+
+    yield create
+
+    if created:
+        runner.run(_delete_users(created))
@@ -0,0 +1,307 @@
+import asyncio
+import statistics
+import time
+from collections.abc import Callable, Coroutine, Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+from typing import Any
+from uuid import UUID
+
+import pytest
+import sqlalchemy
+
+from src.crud.activity import AsyncQuerier as ActivityQuerier
+from src.crud.activity import ListActivityFeedParams, ListRecentRecipeCooksParams
+from src.dependencies import create_db_connection
+from src.logger import get_logger
+from src.services.maintenance import add_months
+from src.settings import settings
+
+logger = get_logger(__name__)
+
+## a user with hundreds of friends, each with years of cooking history
+FRIEND_COUNT = 300
+RECIPES_PER_USER = 10
+HISTORY_YEARS = 3
+COOKS_PER_RECIPE = 45
+PAGE_SIZE = 20
+DEEP_PAGE = 50
+TIMED_RUNS = 20
+
+SEED_USERS = """
+INSERT INTO "user" (email, name)
+SELECT gen_random_uuid() || '@example.com', 'Benchmark User ' || i
+FROM generate_series(0, :friend_count) i
+RETURNING id
+"""
+
+SEED_FRIENDSHIPS = """
+INSERT INTO friendship (user_id, friend_user_id, status)
+SELECT pair.user_id, pair.friend_user_id, 'accepted'
+FROM UNNEST(CAST(:friend_ids AS UUID[])) AS f(id)
+CROSS JOIN LATERAL (
+    VALUES (CAST(:user_id AS UUID), f.id), (f.id, CAST(:user_id AS UUID))
+) AS pair (user_id, friend_user_id)
+"""
+
+SEED_RECIPES = """
+INSERT INTO recipe (user_id, name, author, cuisine, location, time_estimate_minutes)
+SELECT
+    u.id,
+    'Benchmark Recipe ' || i,
+    'Benchmark Author',
+    'Italian',
+    '{"location": {"location": "made_up"}}',
+    30
+FROM UNNEST(CAST(:user_ids AS UUID[])) AS u(id)
+CROSS JOIN generate_series(1, :recipes_per_user) i
+"""
+
+SEED_COOKS = """
+INSERT INTO recipe_cooking_log (user_id, recipe_id, cooked_at)
+SELECT r.user_id, r.id, NOW() - random() * CAST(:history AS INTERVAL)
+FROM recipe r
+CROSS JOIN generate_series(1, :cooks_per_recipe)
+WHERE r.user_id = ANY(CAST(:user_ids AS UUID[]))
+ON CONFLICT DO NOTHING
+"""
+
+
+@dataclass
+class SocialGraph:
+    user_id: UUID
+    friend_ids: list[UUID]
+    recipe_id: UUID
+
+
+async def _seed_social_graph() -> SocialGraph:
+    today = datetime.now(UTC).date()
+
+    async with create_db_connection() as conn, conn.begin():
+        await ActivityQuerier(conn).ensure_recipe_cooking_log_partitions(
+            frommonth=add_months(today, -12 * HISTORY_YEARS), tomonth=today
+        )
+
+    async with create_db_connection() as conn, conn.begin():
+        user_id, *friend_ids = [
+            row[0]
+            for row in await conn.execute(
+                sqlalchemy.text(SEED_USERS), {"friend_count": FRIEND_COUNT}
+            )
+        ]
+        await conn.execute(
+            sqlalchemy.text(SEED_FRIENDSHIPS),
+            {"user_id": user_id, "friend_ids": friend_ids},
+        )
+        await conn.execute(
+            sqlalchemy.text(SEED_RECIPES),
+            {"user_ids": [user_id, *friend_ids], "recipes_per_user": RECIPES_PER_USER},
+        )
+        await conn.execute(
+            sqlalchemy.text(SEED_COOKS),
+            {
+                "user_ids": [user_id, *friend_ids],
+                "history": timedelta(days=365 * HISTORY_YEARS),
+                "cooks_per_recipe": COOKS_PER_RECIPE,
+            },
+        )
+
+        ## the same backfill and trim accepting each friendship would run
+        activity = ActivityQuerier(conn)
+        for friend_id in friend_ids:
+            await activity.backfill_activity_feed(
+                userid=user_id,
+                frienduserid=friend_id,
+                feedcap=settings.activity_feed_cap,
+            )
+        await activity.trim_activity_feeds_for_users(
+            feedcap=settings.activity_feed_cap, feeduserids=[user_id, *friend_ids]
+        )
+
+        recipe_id = (
+            (
+                await conn.execute(
+                    sqlalchemy.text("SELECT id FROM recipe WHERE user_id = :user_id"),
+                    {"user_id": user_id},
+                )
+            )
+            .scalars()
+            .first()
+        )
+        await conn.execute(
+            sqlalchemy.text("ANALYZE recipe_cooking_log, activity_feed_item")
+        )
+
+    assert recipe_id is not None
+    return SocialGraph(user_id=user_id, friend_ids=friend_ids, recipe_id=recipe_id)
+
+
+async def _delete_social_graph(graph: SocialGraph) -> None:
+    async with create_db_connection() as conn, conn.begin():
+        await conn.execute(
+            sqlalchemy.text('DELETE FROM "user" WHERE id = ANY(:ids)'),
+            {"ids": [graph.user_id, *graph.friend_ids]},
+        )
+
+
+@pytest.fixture(scope="module")
+def graph(runner: asyncio.Runner) -> Iterator[SocialGraph]:
+    graph = runner.run(_seed_social_graph())
+    yield graph
+    runner.run(_delete_social_graph(graph))
+
+
+def median_seconds(
+    runner: asyncio.Runner, run: Callable[[], Coroutine[Any, Any, object]]
+) -> float:
+    timings = []
+    for _ in range(TIMED_RUNS):
+        start = time.perf_counter()
+        runner.run(run())
+        timings.append(time.perf_counter() - start)
+
+    return statistics.median(timings)
+
+
+async def _read_feed(user_id: UUID) -> list[tuple[datetime, UUID]]:
+    async with create_db_connection() as conn:
+        return [
+            (c.cooked_at, c.id)
+            async for c in ActivityQuerier(conn).list_activity_feed(
+                ListActivityFeedParams(
+                    userid=user_id,
+                    before_cooked_at=None,
+                    before_recipe_id=None,
+                    recentcookslimit=PAGE_SIZE,
+                    recentcooksoffset=0,
+                    includeown=False,
+                )
+            )
+        ]
+
+
+async def _read_friends_logs(
+    friend_ids: list[UUID],
+    before: tuple[datetime, UUID] | None = None,
+    offset: int = 0,
+) -> list[tuple[datetime, UUID]]:
+    async with create_db_connection() as conn:
+        return [
+            (c.cooked_at, c.id)
+            async for c in ActivityQuerier(conn).list_recent_recipe_cooks(
+                ListRecentRecipeCooksParams(
+                    userids=friend_ids,
+                    before_cooked_at=before[0] if before else None,
+                    before_recipe_id=before[1] if before else None,
+                    recentcookslimit=PAGE_SIZE,
+                    recentcooksoffset=offset,
+                )
+            )
+        ]
+
+
+@pytest.mark.db
+def test_friend_feed_matches_and_beats_merging_friends_logs(
+    runner: asyncio.Runner, graph: SocialGraph
+) -> None:
+    feed = runner.run(_read_feed(graph.user_id))
+    merged = runner.run(_read_friends_logs(graph.friend_ids))
+
+    feed_seconds = median_seconds(runner, lambda: _read_feed(graph.user_id))
+    merged_seconds = median_seconds(
+        runner, lambda: _read_friends_logs(graph.friend_ids)
+    )
+    logger.info(
+        "first page of %d friends' cooks: feed %.2fms, merged logs %.2fms",
+        FRIEND_COUNT,
+        feed_seconds * 1000,
+        merged_seconds * 1000,
+    )
+
+    assert len(feed) == PAGE_SIZE
+    assert feed == merged
+    assert feed_seconds <= merged_seconds
+
+
+async def _mark_cooked_and_count_fan_out(graph: SocialGraph) -> int:
+    ## rolled back, so every timed run writes to the same feeds
+    async with create_db_connection() as conn:
+        trans = await conn.begin()
+        activity = ActivityQuerier(conn)
+
+        recipe = await activity.mark_recipe_cooked(
+            recipeid=graph.recipe_id, userid=graph.user_id
+        )
+        await activity.trim_activity_feeds(
+            feedcap=settings.activity_feed_cap, actoruserid=graph.user_id
+        )
+
+        assert recipe is not None
+        fanned_out = (
+            await conn.execute(
+                sqlalchemy.text(
+                    "SELECT COUNT(*) FROM activity_feed_item "
+                    "WHERE actor_user_id = :user_id AND cooked_at = :cooked_at"
+                ),
+                {"user_id": graph.user_id, "cooked_at": recipe.last_made_at},
+            )
+        ).scalar_one()
+
+        await trans.rollback()
+
+    return int(fanned_out)
+
+
+@pytest.mark.db
+def test_cooking_fans_out_to_every_friends_feed(
+    runner: asyncio.Runner, graph: SocialGraph
+) -> None:
+    fanned_out = runner.run(_mark_cooked_and_count_fan_out(graph))
+
+    seconds = median_seconds(runner, lambda: _mark_cooked_and_count_fan_out(graph))
+    logger.info(
+        "marking a recipe cooked for %d friends' feeds: %.2fms",
+        FRIEND_COUNT,
+        seconds * 1000,
+    )
+
+    assert fanned_out == FRIEND_COUNT
+    assert seconds < 1
+
+
+@pytest.mark.db
+def test_deep_pages_cost_the_same_as_the_first(
+    runner: asyncio.Runner, graph: SocialGraph
+) -> None:
+    before: tuple[datetime, UUID] | None = None
+    for _ in range(DEEP_PAGE - 1):
+        before = runner.run(_read_friends_logs(graph.friend_ids, before=before))[-1]
+
+    deep_page = runner.run(_read_friends_logs(graph.friend_ids, before=before))
+    deep_offset_page = runner.run(
+        _read_friends_logs(graph.friend_ids, offset=(DEEP_PAGE - 1) * PAGE_SIZE)
+    )
+
+    first_seconds = median_seconds(runner, lambda: _read_friends_logs(graph.friend_ids))
+    deep_seconds = median_seconds(
+        runner, lambda: _read_friends_logs(graph.friend_ids, before=before)
+    )
+    deep_offset_seconds = median_seconds(
+        runner,
+        lambda: _read_friends_logs(
+            graph.friend_ids, offset=(DEEP_PAGE - 1) * PAGE_SIZE
+        ),
+    )
+    logger.info(
+        "%d friends' cooks: page 1 %.2fms, page %d by cursor %.2fms, by offset %.2fms",
+        FRIEND_COUNT,
+        first_seconds * 1000,
+        DEEP_PAGE,
+        deep_seconds * 1000,
+        deep_offset_seconds * 1000,
+    )
+
+    assert len(deep_page) == PAGE_SIZE
+    assert deep_page == deep_offset_page
+    ## within noise of the first page, rather than growing with the page number
+    assert deep_seconds <= 1.5 * first_seconds + 0.002
@@ -0,0 +1,179 @@
+import asyncio
+import gzip
+import io
+from collections.abc import Callable
+from datetime import UTC, date, datetime
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+
+from src.crud.models import DietaryRestriction, Meal, RecipeType, User
+from src.schemas import (
+    MadeUpRecipeLocation,
+    Recipe,
+    RecipeIngredient,
+    RecipeInstruction,
+    RecipeLocation,
+)
+from src.services import archive
+from src.settings import settings
+
+HEADER = archive.RecipeArchiveHeader(
+    format="recipebox", version=1, exported_at=datetime(2026, 1, 1, tzinfo=UTC)
+)
+
+
+def archived_recipe(name: str, cooked_at: list[datetime]) -> archive.ArchivedRecipe:
+    return archive.ArchivedRecipe(
+        id=uuid4(),
+        name=name,
+        author="Test Author",
+        cuisine="Italian",
+        time_estimate_minutes=30,
+        tags=["soup", "weeknight"],
+        dietary_restrictions_met=[DietaryRestriction.VEGETARIAN],
+        ingredients=[
+            RecipeIngredient(name="tomatoes", quantity=4, units=""),
+            RecipeIngredient(name="stock", quantity=2, units="cups"),
+        ],
+        instructions=[
+            RecipeInstruction(step_number=1, content="Simmer."),
+            RecipeInstruction(step_number=2, content="Blend."),
+        ],
+        type=RecipeType.MAIN,
+        meal=Meal.DINNER,
+        location=RecipeLocation(location=MadeUpRecipeLocation(location="made_up")),
+        notes="Better the next day.",
+        parent_recipe_id=None,
+        cooked_at=cooked_at,
+    )
+
+
+def archive_file(lines: list[bytes]) -> io.BytesIO:
+    return io.BytesIO(gzip.compress(b"".join(line + b"\n" for line in lines)))
+
+
+def archive_lines(recipes: list[archive.ArchivedRecipe]) -> list[bytes]:
+    return [HEADER.model_dump_json().encode()] + [
+        r.model_dump_json().encode() for r in recipes
+    ]
+
+
+def import_archive(file: io.BytesIO) -> int:
+    return asyncio.run(archive.import_recipe_archive(uuid4(), file))
+
+
+def test_blank_lines_are_rejected() -> None:
+    lines = archive_lines([archived_recipe("Tomato Soup", [])])
+    lines.insert(1, b"")
+
+    with pytest.raises(HTTPException) as e:
+        import_archive(archive_file(lines))
+
+    assert e.value.status_code == 400
+    assert "imported 0 recipes" in e.value.detail
+
+
+def test_import_rejects_cooks_outside_the_partition_range() -> None:
+    cooked_at = datetime.combine(
+        settings.cooking_log_earliest_month, datetime.min.time(), UTC
+    ).replace(year=settings.cooking_log_earliest_month.year - 1)
+
+    with pytest.raises(HTTPException) as e:
+        import_archive(
+            archive_file(archive_lines([archived_recipe("Tomato Soup", [cooked_at])]))
+        )
+
+    assert e.value.status_code == 400
+
+
+def test_export_accepts_cooks_outside_the_partition_range() -> None:
+    recipe = archived_recipe("Tomato Soup", [])
+    cooked_at = [datetime(1990, 6, 1, tzinfo=UTC)]
+
+    exported = archive._to_archived_recipe(
+        Recipe.model_validate(
+            {**recipe.model_dump(), "last_made_at": cooked_at[0], "user_id": uuid4()}
+        ),
+        cooked_at,
+    )
+
+    assert exported.cooked_at == cooked_at
+
+
+def normalized(recipe: archive.ArchivedRecipe) -> dict[str, Any]:
+    ## imported recipes get new ids, and child rows come back in any order
+    return {
+        **recipe.model_dump(exclude={"id"}),
+        "tags": sorted(recipe.tags),
+        "dietary_restrictions_met": sorted(recipe.dietary_restrictions_met),
+        "ingredients": sorted(i.model_dump_json() for i in recipe.ingredients),
+        "cooked_at": sorted(recipe.cooked_at),
+    }
+
+
+async def _export(user: User) -> bytes:
+    return b"".join([chunk async for chunk in archive.export_recipe_archive(user.id)])
+
+
+def _read_export(
+    runner: asyncio.Runner, user: User
+) -> tuple[archive.RecipeArchiveHeader, dict[str, archive.ArchivedRecipe]]:
+    header, *lines = gzip.decompress(runner.run(_export(user))).splitlines()
+    recipes = [archive.ArchivedRecipe.model_validate_json(line) for line in lines]
+
+    return (
+        archive.RecipeArchiveHeader.model_validate_json(header),
+        {r.name: r for r in recipes},
+    )
+
+
+@pytest.mark.db
+def test_archive_round_trip(
+    runner: asyncio.Runner, create_user: Callable[[], User]
+) -> None:
+    ## more recipes than fit in one chunk, so both directions stream in chunks
+    recipes = [
+        archived_recipe(
+            f"Recipe {i}",
+            [datetime(2025, 1 + i % 12, 1 + i % 28, 18, tzinfo=UTC)] * (i % 3),
+        )
+        for i in range(archive.ARCHIVE_CHUNK_SIZE + 20)
+    ]
+    user = create_user()
+
+    imported = runner.run(
+        archive.import_recipe_archive(user.id, archive_file(archive_lines(recipes)))
+    )
+    header, exported = _read_export(runner, user)
+
+    assert imported == len(recipes)
+    assert header.format == "recipebox"
+    assert exported.keys() == {r.name for r in recipes}
+    for r in recipes:
+        assert normalized(exported[r.name]) == normalized(r)
+
+
+@pytest.mark.db
+def test_export_includes_cooks_before_the_earliest_month(
+    runner: asyncio.Runner,
+    create_user: Callable[[], User],
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    cooked_at = datetime(1995, 3, 1, 18, tzinfo=UTC)
+    user = create_user()
+
+    monkeypatch.setattr(settings, "cooking_log_earliest_month", date(1990, 1, 1))
+    runner.run(
+        archive.import_recipe_archive(
+            user.id,
+            archive_file(archive_lines([archived_recipe("Old Soup", [cooked_at])])),
+        )
+    )
+    monkeypatch.undo()
+
+    _, exported = _read_export(runner, user)
+
+    assert exported["Old Soup"].cooked_at == [cooked_at]
@@ -0,0 +1,263 @@
+import asyncio
+import gzip
+import io
+import random
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from datetime import UTC, date, datetime, timedelta
+from uuid import UUID, uuid4
+
+import pytest
+import sqlalchemy
+
+from src.controllers.activity import (
+    MAX_MOST_COOKED_LIMIT,
+    CookingStats,
+    CuisineCookCount,
+    MostCookedRecipe,
+    get_cooking_stats,
+)
+from src.crud.activity import AsyncQuerier as ActivityQuerier
+from src.crud.models import Meal, RecipeType, User
+from src.crud.users import AsyncQuerier as UserQuerier
+from src.dependencies import create_db_connection
+from src.schemas import MadeUpRecipeLocation, RecipeIngredient, RecipeLocation
+from src.services import archive
+from src.services.friends import invalidate_friend_ids
+
+CUISINES = ["french", "indian", "italian", "mexican"]
+RECIPES_PER_USER = 8
+IMPORTED_COOKS_PER_RECIPE = 6
+MARKED_COOKS_PER_USER = 5
+
+RAW_COOKS = """
+SELECT l.user_id, l.recipe_id, l.cooked_at, r.name, r.cuisine
+FROM recipe_cooking_log l
+JOIN recipe r ON r.id = l.recipe_id
+WHERE l.user_id = ANY(:user_ids)
+"""
+
+MONTHLY_COOK_COUNTS = """
+SELECT user_id, recipe_id, month, cook_count
+FROM recipe_monthly_cook_count
+WHERE user_id = ANY(:user_ids)
+"""
+
+
+def _archive(rng: random.Random) -> io.BytesIO:
+    ## history over the last year, so both the totals and this month's counts
+    ## come from more than one month
+    now = datetime.now(UTC)
+    header = archive.RecipeArchiveHeader(format="recipebox", version=1, exported_at=now)
+    recipes = [
+        archive.ArchivedRecipe(
+            id=uuid4(),
+            name=f"Recipe {i}",
+            author="Test Author",
+            cuisine=rng.choice(CUISINES),
+            time_estimate_minutes=30,
+            tags=[],
+            dietary_restrictions_met=[],
+            ingredients=[RecipeIngredient(name="salt", quantity=1, units="tsp")],
+            instructions=[],
+            type=RecipeType.MAIN,
+            meal=Meal.DINNER,
+            location=RecipeLocation(location=MadeUpRecipeLocation(location="made_up")),
+            notes=None,
+            parent_recipe_id=None,
+            cooked_at=[
+                now - timedelta(seconds=rng.randrange(365 * 24 * 60 * 60))
+                for _ in range(rng.randrange(IMPORTED_COOKS_PER_RECIPE))
+            ],
+        )
+        for i in range(RECIPES_PER_USER)
+    ]
+    lines = [header.model_dump_json()] + [r.model_dump_json() for r in recipes]
+
+    return io.BytesIO(gzip.compress("\n".join(lines).encode() + b"\n"))
+
+
+async def _list_recipe_ids(user_id: UUID) -> list[UUID]:
+    async with create_db_connection() as conn:
+        return list(
+            (
+                await conn.execute(
+                    sqlalchemy.text("SELECT id FROM recipe WHERE user_id = :user_id"),
+                    {"user_id": user_id},
+                )
+            ).scalars()
+        )
+
+
+async def _mark_cooked(user_id: UUID, recipe_id: UUID) -> bool:
+    ## each cook in its own transaction, the same as a request
+    async with create_db_connection() as conn, conn.begin():
+        recipe = await ActivityQuerier(conn).mark_recipe_cooked(
+            recipeid=recipe_id, userid=user_id
+        )
+
+    return recipe is not None
+
+
+async def _befriend(user_id: UUID, friend_user_id: UUID) -> None:
+    async with create_db_connection() as conn, conn.begin():
+        users = UserQuerier(conn)
+        await users.create_friend_request(userid=user_id, frienduserid=friend_user_id)
+        await users.accept_friend_request(
+            requestfromuserid=user_id, userid=friend_user_id
+        )
+
+    invalidate_friend_ids(user_id, friend_user_id)
+
+
+def seed_cooks(runner: asyncio.Runner, user: User, rng: random.Random) -> None:
+    runner.run(archive.import_recipe_archive(user.id, _archive(rng)))
+
+    recipe_ids = runner.run(_list_recipe_ids(user.id))
+    for _ in range(MARKED_COOKS_PER_USER):
+        assert runner.run(_mark_cooked(user.id, rng.choice(recipe_ids)))
+
+
+async def _stats(user: User) -> list[CookingStats]:
+    async with create_db_connection() as conn:
+        return await get_cooking_stats(
+            conn=conn,
+            user=user,
+            who="both",
+            most_cooked_limit=MAX_MOST_COOKED_LIMIT,
+        )
+
+
+async def _raw_cooks(
+    user_ids: list[UUID],
+) -> list[tuple[UUID, UUID, datetime, str, str]]:
+    async with create_db_connection() as conn:
+        return [
+            (r[0], r[1], r[2], r[3], r[4])
+            for r in await conn.execute(
+                sqlalchemy.text(RAW_COOKS), {"user_ids": user_ids}
+            )
+        ]
+
+
+def recount_stats(
+    users: list[User], cooks: list[tuple[UUID, UUID, datetime, str, str]]
+) -> list[CookingStats]:
+    ## the same stats, recomputed from every raw cook
+    this_month = datetime.now(UTC).date().replace(day=1)
+
+    stats = []
+    for user in users:
+        user_cooks = [c for c in cooks if c[0] == user.id]
+        recipe_counts = Counter(recipe_id for _, recipe_id, *_ in user_cooks)
+        last_cooked_at = {
+            recipe_id: max(c[2] for c in user_cooks if c[1] == recipe_id)
+            for recipe_id in recipe_counts
+        }
+        names = {c[1]: c[3] for c in user_cooks}
+        cuisine_counts = Counter(c[4] for c in user_cooks)
+
+        stats.append(
+            CookingStats(
+                user_id=user.id,
+                user_name=user.name,
+                total_cooks=len(user_cooks),
+                cooked_this_month=sum(
+                    1
+                    for c in user_cooks
+                    if c[2].astimezone(UTC).date().replace(day=1) == this_month
+                ),
+                most_cooked=[
+                    MostCookedRecipe(
+                        recipe_id=recipe_id,
+                        name=names[recipe_id],
+                        cook_count=count,
+                        last_cooked_at=last_cooked_at[recipe_id],
+                    )
+                    for recipe_id, count in sorted(
+                        recipe_counts.items(), key=lambda rc: (-rc[1], rc[0])
+                    )
+                ],
+                cuisines=[
+                    CuisineCookCount(cuisine=cuisine, cook_count=count)
+                    for cuisine, count in sorted(
+                        cuisine_counts.items(), key=lambda cc: (-cc[1], cc[0])
+                    )
+                ],
+            )
+        )
+
+    return stats
+
+
+async def _monthly_cook_counts(
+    user_ids: list[UUID],
+) -> dict[tuple[UUID, UUID, date], int]:
+    async with create_db_connection() as conn:
+        return {
+            (r[0], r[1], r[2]): r[3]
+            for r in await conn.execute(
+                sqlalchemy.text(MONTHLY_COOK_COUNTS), {"user_ids": user_ids}
+            )
+        }
+
+
+@pytest.mark.db
+@pytest.mark.parametrize("seed", range(3))
+def test_stats_match_a_recount_of_the_log(
+    runner: asyncio.Runner, create_user: Callable[[], User], seed: int
+) -> None:
+    rng = random.Random(seed)
+    user, friend = create_user(), create_user()
+    runner.run(_befriend(user.id, friend.id))
+
+    seed_cooks(runner, user, rng)
+    seed_cooks(runner, friend, rng)
+
+    stats = runner.run(_stats(user))
+    cooks = runner.run(_raw_cooks([user.id, friend.id]))
+
+    assert stats == recount_stats([user, friend], cooks)
+
+    monthly = defaultdict[tuple[UUID, UUID, date], int](int)
+    for user_id, recipe_id, cooked_at, *_ in cooks:
+        monthly[
+            user_id, recipe_id, cooked_at.astimezone(UTC).date().replace(day=1)
+        ] += 1
+
+    assert runner.run(_monthly_cook_counts([user.id, friend.id])) == monthly
+
+
+async def _count_rows_for_recipe(recipe_id: UUID) -> dict[str, int]:
+    async with create_db_connection() as conn:
+        return {
+            table: (
+                await conn.execute(
+                    sqlalchemy.text(
+                        f"SELECT COUNT(*) FROM {table} WHERE recipe_id = :recipe_id"
+                    ),
+                    {"recipe_id": recipe_id},
+                )
+            ).scalar_one()
+            for table in [
+                "recipe_cooking_log",
+                "recipe_cook_count",
+                "recipe_monthly_cook_count",
+                "activity_feed_item",
+            ]
+        }
+
+
+@pytest.mark.db
+def test_cooking_someone_elses_recipe_writes_nothing(
+    runner: asyncio.Runner, create_user: Callable[[], User]
+) -> None:
+    owner, other = create_user(), create_user()
+    runner.run(_befriend(other.id, owner.id))
+    seed_cooks(runner, owner, random.Random(0))
+
+    recipe_id = runner.run(_list_recipe_ids(owner.id))[0]
+    before = runner.run(_count_rows_for_recipe(recipe_id))
+
+    assert not runner.run(_mark_cooked(other.id, recipe_id))
+    assert runner.run(_count_rows_for_recipe(recipe_id)) == before
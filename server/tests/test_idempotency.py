@@ -0,0 +1,84 @@
+import asyncio
+import hashlib
+from collections.abc import Callable
+from datetime import UTC, datetime
+from uuid import uuid4
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from src.crud.models import PushPermissionStatus, User, UserPrivacyPreference
+from src.dependencies import authenticate, create_db_connection, get_db
+from src.services.idempotency import Idempotency, Idempotent
+
+REQUEST = "POST /sharing/batch?"
+NOW = datetime(2026, 1, 1, tzinfo=UTC)
+
+
+class Body(BaseModel):
+    name: str
+
+
+def test_the_fingerprint_hashes_the_body() -> None:
+    app = FastAPI()
+
+    @app.post("/things")
+    async def create_thing(body: Body, idempotency: Idempotent) -> str:
+        return idempotency.body_hash
+
+    app.dependency_overrides[get_db] = lambda: None
+    app.dependency_overrides[authenticate] = lambda: User(
+        id=uuid4(),
+        email="test@example.com",
+        name="Test User",
+        created_at=NOW,
+        updated_at=NOW,
+        privacy_preference=UserPrivacyPreference.PUBLIC,
+        expo_push_token=None,
+        push_permission=PushPermissionStatus.NONE,
+        seasonal_region=None,
+    )
+
+    client = TestClient(app)
+    first = client.post("/things", content=b'{"name": "soup"}')
+    second = client.post("/things", content=b'{"name": "stew"}')
+
+    assert first.json() == hashlib.sha256(b'{"name": "soup"}').hexdigest()
+    assert second.json() != first.json()
+
+
+async def _claim(user: User, key: str, body: bytes) -> object:
+    async with create_db_connection() as conn, conn.begin():
+        idempotency = Idempotency(
+            conn=conn,
+            user_id=user.id,
+            key=key,
+            request=REQUEST,
+            body_hash=hashlib.sha256(body).hexdigest(),
+        )
+
+        if replay := await idempotency.replay():
+            return replay.response
+
+        await idempotency.save({"body": body.decode()})
+        return None
+
+
+@pytest.mark.db
+def test_a_reused_key_needs_the_same_body(
+    runner: asyncio.Runner, create_user: Callable[[], User]
+) -> None:
+    user = create_user()
+    key = str(uuid4())
+
+    assert runner.run(_claim(user, key, b'{"name": "soup"}')) is None
+    assert runner.run(_claim(user, key, b'{"name": "soup"}')) == {
+        "body": '{"name": "soup"}'
+    }
+
+    with pytest.raises(HTTPException) as e:
+        runner.run(_claim(user, key, b'{"name": "stew"}'))
+
+    assert e.value.status_code == 422
@@ -0,0 +1,71 @@
+from collections.abc import Iterator
+
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+
+from src.middleware import UploadSizeLimitMiddleware
+
+MAX_BYTES = 1024 * 1024
+
+
+def upload_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(
+        UploadSizeLimitMiddleware, max_bytes=MAX_BYTES, paths={"/upload"}
+    )
+
+    @app.post("/upload")
+    async def upload(files: list[UploadFile]) -> int:
+        return sum(f.size or 0 for f in files)
+
+    @app.post("/other")
+    async def other(files: list[UploadFile]) -> int:
+        return len(files)
+
+    return TestClient(app)
+
+
+def test_uploads_under_the_limit_are_accepted() -> None:
+    response = upload_client().post(
+        "/upload", files=[("files", ("a.jpg", b"x" * 1000, "image/jpeg"))]
+    )
+
+    assert response.status_code == 200
+    assert response.json() == 1000
+
+
+def test_uploads_over_the_limit_are_rejected_by_length() -> None:
+    response = upload_client().post(
+        "/upload", files=[("files", ("a.jpg", b"x" * (MAX_BYTES + 1), "image/jpeg"))]
+    )
+
+    assert response.status_code == 413
+
+
+def test_chunked_uploads_are_cut_off_once_over_the_limit() -> None:
+    def chunks() -> Iterator[bytes]:
+        ## a multipart body with no Content-Length
+        yield (
+            b"--boundary\r\n"
+            b'Content-Disposition: form-data; name="files"; filename="a.jpg"\r\n'
+            b"Content-Type: image/jpeg\r\n\r\n"
+        )
+        for _ in range(4 * MAX_BYTES // 65536):
+            yield b"x" * 65536
+        yield b"\r\n--boundary--\r\n"
+
+    response = upload_client().post(
+        "/upload",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=boundary"},
+    )
+
+    assert response.status_code == 413
+
+
+def test_other_paths_are_not_limited() -> None:
+    response = upload_client().post(
+        "/other", files=[("files", ("a.jpg", b"x" * (MAX_BYTES + 1), "image/jpeg"))]
+    )
+
+    assert response.status_code == 200
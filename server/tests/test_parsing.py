@@ -0,0 +1,273 @@
+import asyncio
+import logging
+import random
+from collections.abc import AsyncIterator
+from typing import Any
+
+import anthropic
+import httpx
+import pytest
+
+from src import parsing
+from src.crud.models import Meal, RecipeType
+from src.schemas import BaseRecipeCreate, RecipeIngredient, RecipeInstruction
+from src.settings import settings
+
+RECIPE = BaseRecipeCreate(
+    name="Tomato Soup",
+    author="",
+    cuisine="Italian",
+    time_estimate_minutes=30,
+    tags=["soup"],
+    dietary_restrictions_met=[],
+    ingredients=[
+        RecipeIngredient(name="tomatoes", quantity=4, units=""),
+        RecipeIngredient(name="stock", quantity=2, units="cups"),
+    ],
+    instructions=[RecipeInstruction(step_number=1, content="Simmer.")],
+    type=RecipeType.MAIN,
+    meal=Meal.DINNER,
+)
+
+NOT_A_RECIPE = RECIPE.model_copy(update={"name": "Unknown"})
+
+
+class StubModel:
+    ## a model that streams `output` in small chunks, `latency` seconds apart,
+    ## and fails the request outright `failure_rate` of the time
+    def __init__(
+        self, output: str, latency: float = 0.001, failure_rate: float = 0.0
+    ) -> None:
+        self.output = output
+        self.latency = latency
+        self.failure_rate = failure_rate
+
+
+class StubStream:
+    def __init__(self, model: StubModel, fail: bool) -> None:
+        self.model = model
+        self.fail = fail
+        self.sent = 0
+        self.text_stream = self._text_stream()
+
+    async def __aenter__(self) -> "StubStream":
+        if self.fail:
+            request: Any = httpx.Request(
+                "POST", "https://api.anthropic.com/v1/messages"
+            )
+            raise anthropic.APIConnectionError(request=request)
+        return self
+
+    async def __aexit__(self, *_: object) -> None:
+        return None
+
+    async def _text_stream(self) -> AsyncIterator[str]:
+        for start in range(0, len(self.model.output), 8):
+            await asyncio.sleep(self.model.latency)
+            self.sent = start + 8
+            yield self.model.output[start : start + 8]
+
+    @property
+    def current_message_snapshot(self) -> anthropic.types.Message:
+        return anthropic.types.Message(
+            id="msg_stub",
+            type="message",
+            role="assistant",
+            model="stub",
+            content=[],
+            stop_reason=None,
+            stop_sequence=None,
+            usage=anthropic.types.Usage(
+                input_tokens=1000,
+                output_tokens=self.sent // 4,
+                cache_read_input_tokens=900,
+                cache_creation_input_tokens=0,
+            ),
+        )
+
+
+class StubClient:
+    def __init__(self, models: dict[str, StubModel], seed: int = 0) -> None:
+        self.models = models
+        self.random = random.Random(seed)
+        self.calls: list[dict[str, Any]] = []
+
+    def stream(self, **kwargs: Any) -> StubStream:
+        self.calls.append(kwargs)
+        model = self.models[kwargs["model"]]
+        return StubStream(model, fail=self.random.random() < model.failure_rate)
+
+    @property
+    def called_models(self) -> list[str]:
+        return [call["model"] for call in self.calls]
+
+
+def stub_client(
+    monkeypatch: pytest.MonkeyPatch, fast: StubModel, default: StubModel
+) -> StubClient:
+    client = StubClient(
+        {
+            settings.recipe_extraction_fast_model: fast,
+            settings.recipe_extraction_model: default,
+        }
+    )
+    monkeypatch.setattr(parsing.client.messages, "stream", client.stream)
+    return client
+
+
+def extract(prompt: parsing.RecipePrompt) -> list[Any]:
+    async def collect() -> list[Any]:
+        return [u async for u in parsing.stream_recipe_extraction(prompt)]
+
+    return asyncio.run(collect())
+
+
+def test_short_text_uses_the_fast_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = stub_client(
+        monkeypatch,
+        fast=StubModel(RECIPE.model_dump_json()),
+        default=StubModel(RECIPE.model_dump_json()),
+    )
+
+    updates = extract("Extract the recipe: tomato soup")
+
+    assert client.called_models == [settings.recipe_extraction_fast_model]
+    assert updates[-1] == RECIPE
+    assert all(isinstance(u, parsing.PartialRecipe) for u in updates[:-1])
+    assert client.calls[0]["system"][0]["cache_control"] == {"type": "ephemeral"}
+
+
+def test_long_text_uses_the_default_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = stub_client(
+        monkeypatch,
+        fast=StubModel(RECIPE.model_dump_json()),
+        default=StubModel(RECIPE.model_dump_json()),
+    )
+
+    updates = extract("x" * (settings.recipe_extraction_fast_max_chars + 1))
+
+    assert client.called_models == [settings.recipe_extraction_model]
+    assert updates[-1] == RECIPE
+
+
+def test_invalid_output_escalates_to_the_default_model(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = stub_client(
+        monkeypatch,
+        fast=StubModel(RECIPE.model_dump_json()[:-40]),
+        default=StubModel(RECIPE.model_dump_json(), latency=0.005),
+    )
+
+    updates = extract("Extract the recipe: tomato soup")
+
+    assert client.called_models == [
+        settings.recipe_extraction_fast_model,
+        settings.recipe_extraction_model,
+    ]
+    assert updates[-1] == RECIPE
+
+    ## the fast model's partials are followed by a reset, then the default
+    ## model's partials start over
+    retries = [
+        i for i, u in enumerate(updates) if isinstance(u, parsing.ExtractionRetry)
+    ]
+    assert retries and len(retries) == 1
+    assert updates[retries[0]] == parsing.ExtractionRetry(
+        model=settings.recipe_extraction_model
+    )
+    assert all(isinstance(u, parsing.PartialRecipe) for u in updates[: retries[0]])
+    assert retries[0] > 0
+
+
+def test_unknown_recipe_is_not_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = stub_client(
+        monkeypatch,
+        fast=StubModel(NOT_A_RECIPE.model_dump_json()),
+        default=StubModel(RECIPE.model_dump_json()),
+    )
+
+    updates = extract("Extract the recipe: the weather today")
+
+    assert client.called_models == [settings.recipe_extraction_fast_model]
+    assert updates == []
+
+
+def test_unknown_recipe_cancels_generation(monkeypatch: pytest.MonkeyPatch) -> None:
+    stream = StubStream(StubModel(NOT_A_RECIPE.model_dump_json()), fail=False)
+    monkeypatch.setattr(parsing.client.messages, "stream", lambda **_: stream)
+
+    extract("Extract the recipe: the weather today")
+
+    assert stream.sent < len(NOT_A_RECIPE.model_dump_json())
+
+
+def test_images_use_the_default_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = stub_client(
+        monkeypatch,
+        fast=StubModel(RECIPE.model_dump_json()),
+        default=StubModel(RECIPE.model_dump_json()),
+    )
+
+    prompt: parsing.RecipePrompt = [
+        {"type": "text", "text": "Extract the recipe from the following image."}
+    ]
+    updates = extract(prompt)
+
+    assert client.called_models == [settings.recipe_extraction_model]
+    assert updates[-1] == RECIPE
+
+
+def test_api_failures_are_raised(monkeypatch: pytest.MonkeyPatch) -> None:
+    stub_client(
+        monkeypatch,
+        fast=StubModel(RECIPE.model_dump_json(), failure_rate=1.0),
+        default=StubModel(RECIPE.model_dump_json()),
+    )
+
+    with pytest.raises(anthropic.APIConnectionError):
+        extract("Extract the recipe: tomato soup")
+
+
+def test_extraction_under_intermittent_failures(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    client = stub_client(
+        monkeypatch,
+        fast=StubModel(RECIPE.model_dump_json(), failure_rate=0.3),
+        default=StubModel(RECIPE.model_dump_json()),
+    )
+
+    results: list[BaseRecipeCreate] = []
+    failures = 0
+    for _ in range(20):
+        try:
+            results.append(extract("Extract the recipe: tomato soup")[-1])
+        except anthropic.APIConnectionError:
+            failures += 1
+
+    assert failures + len(results) == 20
+    assert 0 < failures < 20
+    assert all(r == RECIPE for r in results)
+    assert len(client.calls) == 20
+
+
+def test_calls_log_tokens_and_latency(
+    monkeypatch: pytest.MonkeyPatch, caplog: pytest.LogCaptureFixture
+) -> None:
+    stub_client(
+        monkeypatch,
+        fast=StubModel(RECIPE.model_dump_json()),
+        default=StubModel(RECIPE.model_dump_json()),
+    )
+
+    with caplog.at_level(logging.INFO, logger=parsing.logger.name):
+        extract("Extract the recipe: tomato soup")
+
+    [message] = [
+        r.getMessage()
+        for r in caplog.records
+        if r.getMessage().startswith("recipe extraction with")
+    ]
+    assert settings.recipe_extraction_fast_model in message
+    assert "1000 input tokens (900 cached" in message
@@ -0,0 +1,104 @@
+import asyncio
+import importlib
+import json
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager, nullcontext
+from datetime import UTC, datetime
+from typing import Any
+from uuid import uuid4
+
+import pytest
+
+from src.crud.models import (
+    Meal,
+    PushPermissionStatus,
+    RecipeType,
+    User,
+    UserPrivacyPreference,
+)
+from src.parsing import ExtractionRetry, PartialRecipe, RecipeExtractionUpdate
+from src.schemas import BaseRecipeCreate, MadeUpRecipeLocation, RecipeLocation
+
+## the controllers package exports the router under the module's name
+recipes = importlib.import_module("src.controllers.recipes")
+
+USER = User(
+    id=uuid4(),
+    email="test@example.com",
+    name="Test User",
+    created_at=datetime(2026, 1, 1, tzinfo=UTC),
+    updated_at=datetime(2026, 1, 1, tzinfo=UTC),
+    privacy_preference=UserPrivacyPreference.PUBLIC,
+    expo_push_token=None,
+    push_permission=PushPermissionStatus.NONE,
+    seasonal_region=None,
+)
+
+RECIPE = BaseRecipeCreate(
+    name="Tomato Soup",
+    author="",
+    cuisine="Italian",
+    time_estimate_minutes=30,
+    tags=[],
+    dietary_restrictions_met=[],
+    ingredients=[],
+    instructions=[],
+    type=RecipeType.MAIN,
+    meal=Meal.DINNER,
+)
+
+
+class StubConnection:
+    def begin(self) -> nullcontext[None]:
+        return nullcontext()
+
+
+@asynccontextmanager
+async def stub_db_connection() -> AsyncIterator[StubConnection]:
+    yield StubConnection()
+
+
+async def _updates(
+    updates: list[RecipeExtractionUpdate],
+) -> AsyncGenerator[RecipeExtractionUpdate]:
+    for update in updates:
+        yield update
+
+
+def import_events(updates: list[RecipeExtractionUpdate]) -> list[dict[str, Any]]:
+    async def collect() -> list[bytes]:
+        return [
+            line
+            async for line in recipes.stream_recipe_import_ndjson(
+                user=USER,
+                updates=_updates(updates),
+                location=RecipeLocation(
+                    location=MadeUpRecipeLocation(location="made_up")
+                ),
+                notes=None,
+            )
+        ]
+
+    return [json.loads(line) for line in asyncio.run(collect())]
+
+
+def test_save_failures_end_the_stream_with_an_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def fail(**_: object) -> None:
+        raise RuntimeError("connection reset")
+
+    monkeypatch.setattr(recipes, "create_db_connection", stub_db_connection)
+    monkeypatch.setattr(recipes, "ingest_recipe", fail)
+
+    events = import_events(
+        [
+            PartialRecipe(name="Tomato Soup"),
+            ExtractionRetry(model="default"),
+            PartialRecipe(name="Tomato Soup"),
+            RECIPE,
+        ]
+    )
+
+    assert [e["type"] for e in events] == ["partial", "reset", "partial", "error"]
+    assert events[-1]["detail"] == "Could not save recipe"
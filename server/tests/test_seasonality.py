@@ -0,0 +1,29 @@
+import pytest
+
+from src.services.seasonality import (
+    SEASONAL_REGIONS,
+    load_seasonal_calendar,
+    month_bit,
+    recipe_peak_months,
+)
+
+
+def test_every_region_has_a_calendar() -> None:
+    assert len(SEASONAL_REGIONS) > 1
+    assert "northeast_us" in SEASONAL_REGIONS
+
+    for region in SEASONAL_REGIONS:
+        assert load_seasonal_calendar(region)
+
+
+@pytest.mark.parametrize(
+    ("region", "peak_month", "off_month"),
+    [("northeast_us", 8, 1), ("southeast_australia", 1, 7)],
+)
+def test_peak_months_follow_the_region(
+    region: str, peak_month: int, off_month: int
+) -> None:
+    peak_months = recipe_peak_months(region, ["cherry tomato"])
+
+    assert peak_months & month_bit(peak_month)
+    assert not peak_months & month_bit(off_month)
@@ -0,0 +1,78 @@
+import asyncio
+from collections.abc import Callable
+from uuid import UUID
+
+import pytest
+import sqlalchemy
+
+from src.controllers.sharing import share_recipes_with_users
+from src.crud.models import User
+from src.crud.sharing import ShareRecipesRow
+from src.dependencies import create_db_connection
+
+CREATE_RECIPE = """
+INSERT INTO recipe (user_id, name, author, cuisine, location, time_estimate_minutes)
+VALUES (
+    :user_id,
+    'Tomato Soup',
+    'Test Author',
+    'Italian',
+    '{"location": {"location": "made_up"}}',
+    30
+)
+RETURNING id
+"""
+
+
+async def _create_recipe(user_id: UUID) -> UUID:
+    async with create_db_connection() as conn, conn.begin():
+        recipe_id: UUID = (
+            await conn.execute(sqlalchemy.text(CREATE_RECIPE), {"user_id": user_id})
+        ).scalar_one()
+
+    return recipe_id
+
+
+async def _share(
+    sharer_id: UUID, recipe_id: UUID, to_user_id: UUID
+) -> list[ShareRecipesRow]:
+    async with create_db_connection() as conn, conn.begin():
+        return await share_recipes_with_users(
+            conn=conn,
+            sharer_id=sharer_id,
+            recipe_ids=[recipe_id],
+            to_user_ids=[to_user_id],
+        )
+
+
+async def _count_share_requests(recipe_id: UUID) -> int:
+    async with create_db_connection() as conn:
+        count: int = (
+            await conn.execute(
+                sqlalchemy.text(
+                    "SELECT COUNT(*) FROM recipe_share_request "
+                    "WHERE recipe_id = :recipe_id"
+                ),
+                {"recipe_id": recipe_id},
+            )
+        ).scalar_one()
+
+    return count
+
+
+@pytest.mark.db
+def test_only_the_owner_can_share_a_recipe(
+    runner: asyncio.Runner, create_user: Callable[[], User]
+) -> None:
+    owner, other, recipient = create_user(), create_user(), create_user()
+    recipe_id = runner.run(_create_recipe(owner.id))
+
+    [result] = runner.run(_share(other.id, recipe_id, recipient.id))
+
+    assert result.status == "recipe_not_found"
+    assert runner.run(_count_share_requests(recipe_id)) == 0
+
+    [result] = runner.run(_share(owner.id, recipe_id, recipient.id))
+
+    assert result.status == "shared"
+    assert runner.run(_count_share_requests(recipe_id)) == 1